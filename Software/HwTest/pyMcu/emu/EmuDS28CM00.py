@@ -0,0 +1,39 @@
+# File: EmuDS28CM00.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating the DS28CM00 I2C/SMBus silicon serial number.
+#
+
+
+
+import EmuI2CDevice
+import I2C_DS28CM00
+
+
+
+class EmuDS28CM00(EmuI2CDevice.EmuI2CDevice):
+
+    # Hardware parameters.
+    hwFamilyCode        = 0x70
+
+
+
+    # Initialize the emulated DS28CM00.
+    def __init__(self, deviceName, serialNumber=0x0000c0ffee01):
+        EmuI2CDevice.EmuI2CDevice.__init__(self, deviceName)
+        self.regs[0x00] = self.hwFamilyCode
+        for i in range(6):
+            self.regs[i + 1] = (serialNumber >> (8 * i)) & 0xff
+        # CRC over the family code and the serial number.
+        self.regs[0x07] = I2C_DS28CM00.I2C_DS28CM00.crc_calc(self.hwFamilyCode, serialNumber, 0x00)
+        self.regs[0x08] = 0x00  # Control register.
+
+
+
+    # Only the control register is writable.
+    def reg_write(self, regAdr, value):
+        if regAdr == 0x08:
+            self.regs[regAdr] = value & 0x01
@@ -0,0 +1,86 @@
+# File: EmuFireFly.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating the register map of a Samtec FireFly module. The lower
+# registers 0..127 are always accessible. The upper registers 128..255 are
+# selected by the page select byte in register 127.
+#
+
+
+
+import EmuI2CDevice
+
+
+
+class EmuFireFly(EmuI2CDevice.EmuI2CDevice):
+
+    # Power domain which must be on for the device to respond.
+    powerDomain         = "firefly"
+
+    # Hardware parameters.
+    hwRegPageSelect     = 127
+    hwRegUpperMin       = 128
+    hwPageTimeAtTemp    = 0x0b
+    hwTimeAtTempSlots   = 22
+
+
+
+    # Initialize the emulated FireFly module.
+    def __init__(self, deviceName, serialNumber="SN00000001", temperature=42):
+        EmuI2CDevice.EmuI2CDevice.__init__(self, deviceName)
+        # Upper pages: {page: {register address: value}}.
+        self.pages = {}
+        self.regs[22] = temperature & 0xff                  # Temperature.
+        self.set_int(26, 2, 33000)                          # Supply voltage: 3.3 V.
+        self.set_int(38, 2, 1234)                           # Operating time: 2468 hours.
+        self.set_int(111, 4, 0x01020304)                    # Firmware version.
+        self.set_str(0x00, 152, 10, "SAMTEC")               # Vendor name.
+        self.set_str(0x00, 171, 16, deviceName)             # Vendor part number.
+        self.set_str(0x00, 189, 10, serialNumber)           # Vendor serial number.
+        # Time at temperature: 3 bytes per slot, unit 5 minutes.
+        for slot in range(self.hwTimeAtTempSlots):
+            adr = self.hwRegUpperMin + 3 * slot
+            value = 120 * (slot + 1) if slot < 12 else 0
+            for i in range(3):
+                self.page_regs(self.hwPageTimeAtTemp)[adr + i] = (value >> (8 * (2 - i))) & 0xff
+
+
+
+    # Get the registers of an upper page.
+    def page_regs(self, page):
+        return self.pages.setdefault(page, {})
+
+
+
+    # Set a big endian integer value in the lower registers.
+    def set_int(self, regAdr, size, value):
+        for i in range(size):
+            self.regs[regAdr + i] = (value >> (8 * (size - 1 - i))) & 0xff
+
+
+
+    # Set a string padded with spaces in the upper registers of a page.
+    def set_str(self, page, regAdr, size, string):
+        string = string[:size].ljust(size)
+        for i in range(size):
+            self.page_regs(page)[regAdr + i] = ord(string[i])
+
+
+
+    # Read a register.
+    def reg_read(self, regAdr):
+        if regAdr < self.hwRegUpperMin:
+            return self.regs.get(regAdr, 0x00)
+        return self.page_regs(self.regs.get(self.hwRegPageSelect, 0x00)).get(regAdr, 0x00)
+
+
+
+    # Write a register.
+    def reg_write(self, regAdr, value):
+        if regAdr < self.hwRegUpperMin:
+            self.regs[regAdr] = value & 0xff
+        else:
+            self.page_regs(self.regs.get(self.hwRegPageSelect, 0x00))[regAdr] = value & 0xff
@@ -0,0 +1,81 @@
+# File: EmuI2CBus.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating an I2C bus with devices attached directly or behind
+# PCA9547 multiplexers.
+#
+
+
+
+class EmuI2CBus:
+
+    # Error flags of the MCU I2C master (see driverlib/i2c.h).
+    hwErrorTimeout      = 0x00000002
+    hwErrorNack         = 0x00000010
+
+
+
+    # Initialize the emulated I2C bus. The function powerCheck(domain) returns
+    # whether a power domain is on.
+    def __init__(self, port, powerCheck):
+        self.port = port
+        self.powerCheck = powerCheck
+        self.devices = {}
+        self.muxes = []
+
+
+
+    # Add a device to the bus.
+    def add_device(self, slaveAddr, device):
+        self.devices[slaveAddr] = device
+
+
+
+    # Add a multiplexer to the bus.
+    def add_mux(self, slaveAddr, mux):
+        self.devices[slaveAddr] = mux
+        self.muxes.append(mux)
+
+
+
+    # Reset all multiplexers on the bus.
+    def reset_muxes(self):
+        for mux in self.muxes:
+            mux.reset()
+
+
+
+    # Find the device that responds to a slave address.
+    def find_device(self, slaveAddr):
+        device = self.devices.get(slaveAddr)
+        if device is None:
+            for mux in self.muxes:
+                device = mux.get_devices().get(slaveAddr)
+                if device is not None:
+                    break
+        if device is None:
+            return None
+        if device.powerDomain and not self.powerCheck(device.powerDomain):
+            return None
+        return device
+
+
+
+    # I2C write access. Return the error flags of the I2C master.
+    def write(self, slaveAddr, data):
+        device = self.find_device(slaveAddr)
+        if device is None or not device.i2c_write(data):
+            return self.hwErrorNack
+        return 0
+
+
+
+    # I2C read access. Return the error flags of the I2C master and the data.
+    def read(self, slaveAddr, cnt):
+        device = self.find_device(slaveAddr)
+        if device is None:
+            return self.hwErrorNack, [0x00] * cnt
+        return 0, device.i2c_read(cnt)
@@ -0,0 +1,72 @@
+# File: EmuI2CDevice.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating a generic I2C device with 8-bit registers. The first
+# byte of a write access sets the register pointer, which is incremented after
+# each register access. This is the base class of the emulated I2C devices.
+#
+
+
+
+class EmuI2CDevice:
+
+    # Power domain which must be on for the device to respond. None means that
+    # the device is always powered.
+    powerDomain         = None
+
+
+
+    # Initialize the emulated I2C device.
+    def __init__(self, deviceName, regs=None):
+        self.deviceName = deviceName
+        self.regs = {}
+        if regs:
+            self.regs.update(regs)
+        self.pointer = 0x00
+        self.accessRead = 0
+        self.accessWrite = 0
+
+
+
+    # Read a register.
+    def reg_read(self, regAdr):
+        return self.regs.get(regAdr, 0x00) & 0xff
+
+
+
+    # Write a register.
+    def reg_write(self, regAdr, value):
+        self.regs[regAdr] = value & 0xff
+
+
+
+    # Increment the register pointer.
+    def pointer_inc(self):
+        self.pointer = (self.pointer + 1) & 0xff
+
+
+
+    # I2C write access. Return True if the device acknowledged the data.
+    def i2c_write(self, data):
+        self.accessWrite += 1
+        if not data:
+            return True
+        self.pointer = data[0]
+        for datum in data[1:]:
+            self.reg_write(self.pointer, datum)
+            self.pointer_inc()
+        return True
+
+
+
+    # I2C read access. Return the data read.
+    def i2c_read(self, cnt):
+        self.accessRead += 1
+        data = []
+        for i in range(cnt):
+            data.append(self.reg_read(self.pointer))
+            self.pointer_inc()
+        return data
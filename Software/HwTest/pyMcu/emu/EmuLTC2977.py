@@ -0,0 +1,38 @@
+# File: EmuLTC2977.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating the LTC2977 8-channel PMBus power system manager IC.
+#
+
+
+
+import EmuPmbusDevice
+
+
+
+class EmuLTC2977(EmuPmbusDevice.EmuPmbusDevice):
+
+    # Hardware parameters.
+    hwPages             = 8
+    hwVoutExponent      = -13
+    # PAGE, WRITE_PROTECT, READ_VIN, READ_TEMPERATURE_1, MFR_PAGE_FF_MASK
+    hwGlobalCmds        = [0x00, 0x10, 0x88, 0x8d, 0xe4]
+
+
+
+    # Initialize the emulated LTC2977. The output voltages of the channels are
+    # given in volts.
+    def __init__(self, deviceName, vout=None, vin=12.0, temperature=40.0):
+        EmuPmbusDevice.EmuPmbusDevice.__init__(self, deviceName)
+        if not vout:
+            vout = [1.0] * self.hwPages
+        self.set_word(0, 0x88, self.float_to_l11(vin))                  # READ_VIN
+        self.set_word(0, 0x8d, self.float_to_l11(temperature))          # READ_TEMPERATURE_1
+        for page in range(self.hwPages):
+            self.set_byte(page, 0x01, 0x80)                             # OPERATION
+            self.set_byte(page, 0x02, 0x1e)                             # ON_OFF_CONFIG
+            self.set_word(page, 0x8b, self.float_to_l16(vout[page], self.hwVoutExponent))   # READ_VOUT
+            self.set_word(page, 0xd0, 0x0000)                           # MFR_CONFIG_LTC2977
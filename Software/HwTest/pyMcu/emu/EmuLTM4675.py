@@ -0,0 +1,26 @@
+# File: EmuLTM4675.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating the LTM4675 dual 9A or single 18A uModule regulator
+# with digital power system management. Its PMBus commands used by pyMcu are
+# the same as the ones of the LTM4700.
+#
+
+
+
+import EmuLTM4700
+
+
+
+class EmuLTM4675(EmuLTM4700.EmuLTM4700):
+
+    # Initialize the emulated LTM4675.
+    def __init__(self, deviceName, vout=None, iout=None, vin=12.0, iin=0.5, temperature=40.0):
+        if not vout:
+            vout = [1.8, 3.3]
+        if not iout:
+            iout = [2.0, 1.0]
+        EmuLTM4700.EmuLTM4700.__init__(self, deviceName, vout, iout, vin, iin, temperature)
@@ -0,0 +1,44 @@
+# File: EmuLTM4700.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating the LTM4700 dual 50A or single 100A uModule regulator
+# with digital power system management.
+#
+
+
+
+import EmuPmbusDevice
+
+
+
+class EmuLTM4700(EmuPmbusDevice.EmuPmbusDevice):
+
+    # Hardware parameters.
+    hwPages             = 2
+    hwVoutExponent      = -12
+    # PAGE, WRITE_PROTECT, READ_VIN, READ_IIN, READ_TEMPERATURE_2
+    hwGlobalCmds        = [0x00, 0x10, 0x88, 0x89, 0x8e]
+
+
+
+    # Initialize the emulated LTM4700. The output voltages and currents of the
+    # channels are given in volts and amperes.
+    def __init__(self, deviceName, vout=None, iout=None, vin=12.0, iin=1.0, temperature=45.0):
+        EmuPmbusDevice.EmuPmbusDevice.__init__(self, deviceName)
+        if not vout:
+            vout = [0.85] * self.hwPages
+        if not iout:
+            iout = [5.0] * self.hwPages
+        self.set_word(0, 0x88, self.float_to_l11(vin))                  # READ_VIN
+        self.set_word(0, 0x89, self.float_to_l11(iin))                  # READ_IIN
+        self.set_word(0, 0x8e, self.float_to_l11(temperature))          # READ_TEMPERATURE_2
+        for page in range(self.hwPages):
+            self.set_byte(page, 0x01, 0x80)                             # OPERATION
+            self.set_byte(page, 0x02, 0x1e)                             # ON_OFF_CONFIG
+            self.set_word(page, 0x8b, self.float_to_l16(vout[page], self.hwVoutExponent))   # READ_VOUT
+            self.set_word(page, 0x8c, self.float_to_l11(iout[page]))    # READ_IOUT
+            self.set_word(page, 0x8d, self.float_to_l11(temperature + 5.0 * page))  # READ_TEMPERATURE_1
+            self.set_word(page, 0xd0, 0x0000)                           # MFR_CONFIG
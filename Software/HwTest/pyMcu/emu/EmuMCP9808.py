@@ -0,0 +1,66 @@
+# File: EmuMCP9808.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating the MCP9808 digital temperature sensor. The registers
+# are 16 bits wide (MSB first), except for the resolution register, which is 8
+# bits wide.
+#
+
+
+
+import EmuI2CDevice
+
+
+
+class EmuMCP9808(EmuI2CDevice.EmuI2CDevice):
+
+    # Hardware parameters.
+    hwPointerResolution = 0x08
+
+
+
+    # Initialize the emulated MCP9808.
+    def __init__(self, deviceName, temperature=30.0):
+        EmuI2CDevice.EmuI2CDevice.__init__(self, deviceName)
+        raw = int(abs(temperature) / 0.0625) & 0xfff
+        if temperature < 0:
+            raw = (~raw + 1) & 0x1fff
+        self.regs = {
+            0x01: 0x0000,       # Configuration.
+            0x05: raw,          # Ambient temperature.
+            0x06: 0x0054,       # Manufacturer ID.
+            0x07: 0x0400,       # Device ID and revision.
+            0x08: 0x03,         # Resolution.
+        }
+
+
+
+    # I2C write access: The first byte is the register pointer, followed by the
+    # register data.
+    def i2c_write(self, data):
+        self.accessWrite += 1
+        if not data:
+            return True
+        self.pointer = data[0] & 0x0f
+        if len(data) < 2:
+            return True
+        if self.pointer == self.hwPointerResolution:
+            self.regs[self.pointer] = data[1] & 0x03
+        elif len(data) >= 3:
+            self.regs[self.pointer] = ((data[1] << 8) | data[2]) & 0xffff
+        return True
+
+
+
+    # I2C read access: Read the register selected by the pointer.
+    def i2c_read(self, cnt):
+        self.accessRead += 1
+        value = self.regs.get(self.pointer, 0x0000)
+        if self.pointer == self.hwPointerResolution:
+            data = [value & 0xff]
+        else:
+            data = [(value >> 8) & 0xff, value & 0xff]
+        return (data + [0x00] * cnt)[:cnt]
@@ -0,0 +1,48 @@
+# File: EmuMCP9903.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating the MCP9903 temperature monitor with one internal and
+# two external temperature diodes.
+#
+
+
+
+import EmuI2CDevice
+
+
+
+class EmuMCP9903(EmuI2CDevice.EmuI2CDevice):
+
+    # Register addresses of the temperatures: (high byte, low byte).
+    hwRegTempInt        = (0x00, 0x29)
+    hwRegTempExt1       = (0x01, 0x10)
+    hwRegTempExt2       = (0x23, 0x24)
+
+
+
+    # Initialize the emulated MCP9903.
+    def __init__(self, deviceName, tempInt=35.0, tempExt1=50.0, tempExt2=45.0):
+        EmuI2CDevice.EmuI2CDevice.__init__(self, deviceName)
+        self.regs = {
+            0x03: 0x00,         # Configuration.
+            0x09: 0x00,         # Configuration.
+            0x04: 0x06,         # Conversion rate.
+            0x0a: 0x06,         # Conversion rate.
+            0xfd: 0x21,         # Product ID.
+            0xfe: 0x5d,         # Manufacturer ID.
+            0xff: 0x01,         # Revision.
+        }
+        self.set_temperature(self.hwRegTempInt, tempInt)
+        self.set_temperature(self.hwRegTempExt1, tempExt1)
+        self.set_temperature(self.hwRegTempExt2, tempExt2)
+
+
+
+    # Set a temperature in degC.
+    def set_temperature(self, regAdr, temperature):
+        raw = int(round(temperature * 8)) & 0x7ff
+        self.regs[regAdr[0]] = (raw >> 3) & 0xff
+        self.regs[regAdr[1]] = (raw & 0x7) << 5
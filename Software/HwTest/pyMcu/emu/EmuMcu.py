@@ -0,0 +1,401 @@
+# File: EmuMcu.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating the command set of the cm_mcu_hwtest firmware of the
+# TM4C1290NCPDT MCU on the ATLAS MDT Trigger Processor (TP) Command Module
+# (CM). The I2C devices are provided by pluggable device models attached to
+# the emulated I2C buses.
+#
+
+
+
+import EmuI2CBus
+
+
+
+class EmuMcu:
+
+    # Firmware information.
+    fwName              = "cm_mcu_hwtest"
+    fwVersion           = "0.5.0"
+    fwReleaseDate       = "24 Jun 2024"
+
+    # MCU-specific variables and parameters.
+    mcuResponseOk       = "OK"
+    mcuResponseWarning  = "WARNING"
+    mcuResponseError    = "ERROR"
+    mcuStrDelimiterDataBlock = ",;"
+
+    # Hardware parameters.
+    hwI2CBusNum         = 10
+    hwI2CDataMax        = 32        # Size of the I2C data buffer of the firmware.
+    hwUartPorts         = [1, 3]    # UART ports available when the UI runs on the SM SoC UART.
+    hwUartDataMax       = 32
+    hwPowerKu15p        = 0x07
+    hwPowerZu11eg       = 0x38
+    hwPowerFireFly      = 0x80
+    hwPowerAll          = hwPowerKu15p | hwPowerZu11eg | hwPowerFireFly
+    hwReservedClock     = 0x01
+    hwReservedKu15p     = 0x02
+    hwReservedZu11eg    = 0x04
+    hwReservedAll       = hwReservedClock | hwReservedKu15p | hwReservedZu11eg
+    # Power domains: name: (GPIO power bits, GPIO reserved bits for power up,
+    # GPIO reserved bits for power down, description).
+    hwPowerDomains = {
+        "all":      (hwPowerAll, hwReservedAll, hwReservedAll, "All power domains are"),
+        "clock":    (0x00, hwReservedClock, hwReservedClock, "The clock power is"),
+        "firefly":  (hwPowerFireFly, 0x00, 0x00, "The FireFly power is"),
+        "kup":      (hwPowerKu15p, hwReservedClock | hwReservedKu15p, hwReservedKu15p, "The KU15P power is"),
+        "zup":      (hwPowerZu11eg, hwReservedClock | hwReservedZu11eg, hwReservedZu11eg, "The ZU11EG power is"),
+    }
+    # Read-only GPIO types.
+    hwGpioReadOnly      = ["sm-pwr-en", "pe-int"]
+
+    # Timing parameters in seconds. They are used to calculate the execution
+    # time of the commands.
+    timeI2CByte         = 9 / 100e3     # 9 bits per byte at 100 kHz.
+    timeI2CTransaction  = 50e-6         # Overhead per I2C transaction.
+    timeCmd             = 20e-6         # Overhead per MCU command.
+
+
+
+    # Initialize the emulated MCU.
+    def __init__(self):
+        self.i2cBus = []
+        for i in range(self.hwI2CBusNum):
+            self.i2cBus.append(EmuI2CBus.EmuI2CBus(i, self.power_is_on))
+        self.gpio = {
+            "sm-pwr-en": 0x01, "cm-ready": 0x00, "led-status": 0x00, "led-user": 0x00,
+            "mux-hs-sel": 0x00, "mux-hs-pd": 0x00, "mux-clk-sel": 0x00, "power": 0x00,
+            "kup": 0x00, "zup": 0x00, "reset": 0x00, "reserved": 0x00, "pe-int": 0x00,
+            "spare": 0x00,
+        }
+        self.uartData = {port: [] for port in self.hwUartPorts}
+        self.tempAnalog = [45.0, 43.5, 41.25, 47.0, 39.75]
+        # Execution time of the last command in seconds.
+        self.execTime = 0
+        self.cmdCount = 0
+
+
+
+    # Convert a string to an integer like the C function strtoul with base 0.
+    @classmethod
+    def str2int(cls, string):
+        try:
+            if len(string) > 1 and string[0] == '0' and string[1] not in "xX":
+                return int(string, 8)
+            return int(string, 0)
+        except ValueError:
+            return 0
+
+
+
+    # Check if a power domain is on.
+    def power_is_on(self, domain):
+        if domain == "clock":
+            return bool(self.gpio["reserved"] & self.hwReservedClock)
+        if domain == "firefly":
+            return bool(self.gpio["power"] & self.hwPowerFireFly)
+        return True
+
+
+
+    # Execute an MCU command line. Return the output of the command.
+    def execute(self, cmdLine):
+        self.cmdCount += 1
+        self.execTime = self.timeCmd
+        params = cmdLine.split()
+        if not params:
+            return None
+        cmd = params[0]
+        params = params[1:]
+        cmdLower = cmd.lower()
+        if cmdLower == "help":
+            return self.cmd_help()
+        elif cmdLower == "info":
+            return self.cmd_info()
+        elif cmdLower == "delay":
+            return self.cmd_delay(cmd, params)
+        elif cmdLower == "gpio":
+            return self.cmd_gpio(cmd, params)
+        elif cmdLower == "i2c":
+            return self.cmd_i2c(cmd, params)
+        elif cmdLower == "i2c-bw":
+            return self.cmd_i2c_bw(cmd, cmdLine)
+        elif cmdLower == "i2c-det":
+            return self.cmd_i2c_det(cmd, params)
+        elif cmdLower == "temp-a":
+            return self.cmd_temp_a(params)
+        elif cmdLower == "uart":
+            return self.cmd_uart(cmd, params)
+        elif cmdLower == "uart-s":
+            return self.cmd_uart_s(cmd, params)
+        elif cmdLower == "power":
+            return self.cmd_power(cmd, params)
+        return "{0:s}: Unknown command `{1:s}'.".format(self.mcuResponseError, cmd)
+
+
+
+    # Show help.
+    def cmd_help(self):
+        return "Available commands:\n" + \
+            "  help                                Show this help text.\n" + \
+            "  delay   MICROSECONDS                Delay execution.\n" + \
+            "  gpio    TYPE [VALUE]                Get/Set the value of a GPIO type.\n" + \
+            "  i2c     PORT SLV-ADR ACC NUM|DATA   I2C access (ACC bits: R/W, Sr, nP, Q).\n" + \
+            "  i2c-bw  PORT SLV-ADR DATA [,DATA]   I2C burst write. Send chunks of DATA.\n" + \
+            "  i2c-det PORT [MODE]                 I2C detect devices (MODE: 0 = auto,\n" + \
+            "                                          1 = quick command, 2 = read).\n" + \
+            "  info                                Show information about this firmware.\n" + \
+            "  temp-a  [COUNT]                     Read analog temperatures.\n" + \
+            "  uart    PORT R/W NUM|DATA           UART access (R/W: 0 = write, 1 = read).\n" + \
+            "  uart-s  PORT BAUD [PARITY] [LOOP]   Set up the UART port.\n" + \
+            "  power   DOMAIN [MODE]               Power domain control (0 = down, 1 = up)."
+
+
+
+    # Show information.
+    def cmd_info(self):
+        return "MDT-TP CM demonstrator MCU `{0:s}' firmware version {1:s}.\n".format(self.fwName, self.fwVersion) + \
+            "Release date: {0:s}\n".format(self.fwReleaseDate) + \
+            "This is the pyMcu emulator of the MCU firmware."
+
+
+
+    # Delay execution.
+    def cmd_delay(self, cmd, params):
+        if not params:
+            return "{0:s}: Parameter required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+        self.execTime += self.str2int(params[0]) / 1e6
+        return "{0:s}.".format(self.mcuResponseOk)
+
+
+
+    # Get/set GPIOs.
+    def cmd_gpio(self, cmd, params):
+        if not params:
+            return "{0:s}: GPIO type required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+        gpioType = params[0].lower()
+        if gpioType not in self.gpio:
+            return "{0:s}: Unknown GPIO type `{1:s}'!".format(self.mcuResponseError, params[0])
+        if len(params) < 2:
+            return "{0:s}: Current GPIO {1:s} value: 0x{2:02x}".format(self.mcuResponseOk, params[0], self.gpio[gpioType])
+        if gpioType in self.hwGpioReadOnly:
+            return "{0:s}: GPIO {1:s} is read-only!".format(self.mcuResponseWarning, params[0])
+        self.gpio[gpioType] = self.str2int(params[1]) & 0xffffffff
+        return "{0:s}: GPIO {1:s} set to 0x{2:02x}.".format(self.mcuResponseOk, params[0], self.gpio[gpioType])
+
+
+
+    # Format the I2C master error flags.
+    def i2c_error(self, port, status):
+        s = "{0:s}: Error flags from I2C the master {1:d}: 0x{2:08x}".format(self.mcuResponseError, port, status)
+        if status & EmuI2CBus.EmuI2CBus.hwErrorTimeout:
+            s += "\n{0:s}: I2C timeout.".format(self.mcuResponseError)
+        if status & EmuI2CBus.EmuI2CBus.hwErrorNack:
+            s += "\n{0:s}: NACK received.".format(self.mcuResponseError)
+        return s
+
+
+
+    # Check the I2C port number.
+    def i2c_port_check(self, port):
+        if port >= self.hwI2CBusNum:
+            return "{0:s}: Only I2C port numbers 0..{1:d} are supported!".format(self.mcuResponseError, self.hwI2CBusNum - 1)
+        return None
+
+
+
+    # Add the time of an I2C transaction with the given number of data bytes.
+    def i2c_time(self, cnt):
+        self.execTime += self.timeI2CTransaction + (cnt + 1) * self.timeI2CByte
+
+
+
+    # I2C access.
+    def cmd_i2c(self, cmd, params):
+        if len(params) < 1:
+            return "{0:s}: I2C port number required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+        if len(params) < 2:
+            return "{0:s}: I2C slave address required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+        if len(params) < 3:
+            return "{0:s}: I2C access mode required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+        port = self.str2int(params[0]) & 0xff
+        slaveAddr = self.str2int(params[1]) & 0xff
+        accMode = self.str2int(params[2]) & 0x0f
+        read = accMode & 0x01
+        quickCmd = accMode & 0x08
+        data = [self.str2int(i) & 0xff for i in params[3:self.hwI2CDataMax]]
+        if not read and not quickCmd and not data:
+            return "{0:s}: At least one data byte required after I2C write command `{1:s}'.".format(self.mcuResponseError, cmd)
+        error = self.i2c_port_check(port)
+        if error:
+            return error
+        bus = self.i2cBus[port]
+        if quickCmd:
+            self.i2c_time(0)
+            status = 0 if bus.find_device(slaveAddr) else EmuI2CBus.EmuI2CBus.hwErrorNack
+        elif not read:
+            self.i2c_time(len(data))
+            status = bus.write(slaveAddr, data)
+        else:
+            cnt = min(data[0] if data else 1, self.hwI2CDataMax)
+            self.i2c_time(cnt)
+            status, data = bus.read(slaveAddr, cnt)
+        if status:
+            return self.i2c_error(port, status)
+        s = "{0:s}.".format(self.mcuResponseOk)
+        if read and not quickCmd:
+            s += " Data:" + "".join(" 0x{0:02x}".format(datum) for datum in data)
+        return s
+
+
+
+    # I2C burst write.
+    def cmd_i2c_bw(self, cmd, cmdLine):
+        port = None
+        slaveAddr = None
+        paramStr = cmdLine.split(None, 1)[1] if len(cmdLine.split(None, 1)) > 1 else ""
+        for delimiter in self.mcuStrDelimiterDataBlock[1:]:
+            paramStr = paramStr.replace(delimiter, self.mcuStrDelimiterDataBlock[0])
+        for block in paramStr.split(self.mcuStrDelimiterDataBlock[0]):
+            params = block.split()
+            if port is None:
+                if len(params) < 1:
+                    return "{0:s}: I2C port number required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+                port = self.str2int(params[0]) & 0xff
+                error = self.i2c_port_check(port)
+                if error:
+                    return error
+                if len(params) < 2:
+                    return "{0:s}: I2C slave address required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+                slaveAddr = self.str2int(params[1]) & 0xff
+                if len(params) < 3:
+                    return "{0:s}: At least one data byte required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+                params = params[2:]
+            if not params:
+                continue
+            data = [self.str2int(i) & 0xff for i in params]
+            self.i2c_time(len(data))
+            status = self.i2cBus[port].write(slaveAddr, data)
+            if status:
+                return self.i2c_error(port, status) + "\n{0:s}: Burst write failed!".format(self.mcuResponseError)
+        if port is None:
+            return "{0:s}: I2C port number required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+        return "{0:s}.".format(self.mcuResponseOk)
+
+
+
+    # Detect I2C devices.
+    def cmd_i2c_det(self, cmd, params):
+        if not params:
+            return "{0:s}: I2C port number required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+        port = self.str2int(params[0]) & 0xff
+        error = self.i2c_port_check(port)
+        if error:
+            return error
+        s = "{0:s}. I2C device(s) found at slave address:".format(self.mcuResponseOk)
+        for slaveAddr in range(0x01, 0x80):
+            self.i2c_time(0)
+            if self.i2cBus[port].find_device(slaveAddr):
+                s += " 0x{0:02x}".format(slaveAddr)
+        return s
+
+
+
+    # Read analog temperatures.
+    def cmd_temp_a(self, params):
+        cnt = self.str2int(params[0]) & 0xffffff if params else 1
+        names = ["KUP MGTAVCC/ADC/AUX", "KUP MGTAVTT", "KUP DDR4/IO/Exp. Con./Misc.",
+                 "ZUP MGTAVCC/MGTAVTT", "ZUP DDR4/IO/LDO/Misc."]
+        lines = []
+        for i in range(cnt):
+            lines.append("{0:s}: ".format(self.mcuResponseOk) + ", ".join(
+                "{0:s}: {1:3d}.{2:02d} degC".format(name, int(temp), int(abs(temp - int(temp)) * 100))
+                for name, temp in zip(names, self.tempAnalog)))
+        return "\n".join(lines)
+
+
+
+    # UART access. The UARTs are in loopback mode.
+    def cmd_uart(self, cmd, params):
+        if len(params) < 1:
+            return "{0:s}: UART port number required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+        if len(params) < 2:
+            return "{0:s}: UART read/write required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+        port = self.str2int(params[0]) & 0xff
+        read = self.str2int(params[1]) & 0x01
+        data = [self.str2int(i) & 0xff for i in params[2:self.hwUartDataMax]]
+        if not read and not data:
+            return "{0:s}: At least one data byte required after UART write command `{1:s}'.".format(self.mcuResponseError, cmd)
+        if port not in self.uartData:
+            return "{0:s}: Only UART port numbers {1:d} and {2:d} are supported!".\
+                format(self.mcuResponseError, self.hwUartPorts[0], self.hwUartPorts[1])
+        uartData = self.uartData[port]
+        if not read:
+            uartData.extend(data)
+            return "{0:s}.".format(self.mcuResponseOk)
+        # Read all available data.
+        if not data:
+            if not uartData:
+                return "{0:s}: No data available.".format(self.mcuResponseWarning)
+            s = "{0:s}. Data:".format(self.mcuResponseOk) + "".join(" 0x{0:02x}".format(datum) for datum in uartData)
+            uartData.clear()
+            return s
+        # Read given number of data.
+        cnt = min(data[0], self.hwUartDataMax)
+        dataRd = uartData[:cnt]
+        del uartData[:cnt]
+        if len(dataRd) != cnt:
+            s = "{0:s}: Could only read {1:d} data bytes from the UART {2:d} instead of {3:d}.".\
+                format(self.mcuResponseWarning, len(dataRd), port, cnt)
+        else:
+            s = "{0:s}.".format(self.mcuResponseOk)
+        if dataRd:
+            s += " Data:" + "".join(" 0x{0:02x}".format(datum) for datum in dataRd)
+        return s
+
+
+
+    # UART setup. The settings have no effect in the emulator.
+    def cmd_uart_s(self, cmd, params):
+        if len(params) < 1:
+            return "{0:s}: UART port number required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+        if len(params) < 2:
+            return "{0:s}: UART baud rate required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+        return "{0:s}.".format(self.mcuResponseOk)
+
+
+
+    # Power domain control.
+    def cmd_power(self, cmd, params):
+        if not params:
+            return "{0:s}: Power domain required after command `{1:s}'.".format(self.mcuResponseError, cmd)
+        domain = params[0].lower()
+        if domain not in self.hwPowerDomains:
+            return "{0:s}: Unknown power domains `{1:s}'!".format(self.mcuResponseError, params[0])
+        powerBits, reservedBitsUp, reservedBitsDown, description = self.hwPowerDomains[domain]
+        power = self.gpio["power"]
+        reserved = self.gpio["reserved"]
+        # Get the power status.
+        if len(params) < 2:
+            gpioStr = "GPIO power = 0x{0:02x}, GPIO reserved = 0x{1:02x}".format(power, reserved)
+            if (power & powerBits) == powerBits and (reserved & reservedBitsUp) == reservedBitsUp:
+                return "{0:s}: {1:s} completely ON. {2:s}".format(self.mcuResponseOk, description, gpioStr)
+            elif not power & powerBits and not reserved & reservedBitsUp:
+                return "{0:s}: {1:s} completely OFF. {2:s}".format(self.mcuResponseOk, description, gpioStr)
+            return "{0:s}: {1:s} PARTIALLY ON. {2:s}".format(self.mcuResponseError, description, gpioStr)
+        # Set the power status.
+        if self.str2int(params[1]):
+            self.gpio["power"] = power | powerBits
+            self.gpio["reserved"] = reserved | reservedBitsUp
+        else:
+            if domain == "clock" and reserved & (self.hwReservedKu15p | self.hwReservedZu11eg):
+                return "{0:s}: Cannot power off the clock domain while the KU15P or the ZU11EG are powered. Turn them off first.".\
+                    format(self.mcuResponseError)
+            self.gpio["power"] = power & ~powerBits
+            self.gpio["reserved"] = reserved & ~reservedBitsDown
+        return "{0:s}.".format(self.mcuResponseOk)
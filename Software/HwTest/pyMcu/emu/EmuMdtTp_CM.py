@@ -0,0 +1,82 @@
+# File: EmuMdtTp_CM.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating the MCU of the ATLAS MDT Trigger Processor (TP)
+# Command Module (CM) together with the I2C devices attached to it. The I2C
+# topology matches the one used by the MdtTp_CM class.
+#
+
+
+
+import EmuMcu
+import EmuPCA9547
+import EmuDS28CM00
+import EmuMCP9808
+import EmuMCP9903
+import EmuLTC2977
+import EmuLTM4700
+import EmuLTM4675
+import EmuSi53xx
+import EmuFireFly
+
+
+
+class EmuMdtTp_CM(EmuMcu.EmuMcu):
+
+    # Clock ICs behind the I2C mux IC55: (mux channel, slave address, name, design ID).
+    hwClockDevices = [
+        (0, 0x74, "IC54 (Si5341A)", "IC54"),
+        (0, 0x68, "IC56 (Si5345A)", "IC56"),
+        (0, 0x6b, "IC60 (Si5345A)", "IC60"),
+        (0, 0x6a, "IC82 (Si5344A)", "IC82"),
+        (1, 0x68, "IC61 (Si5342A)", "IC61"),
+        (1, 0x69, "IC62 (Si5345A)", "IC62"),
+        (1, 0x6a, "IC63 (Si5345A)", "IC63"),
+        (1, 0x6b, "IC81 (Si5342A)", "IC81"),
+        (2, 0x68, "IC83 (Si5342A)", "IC83"),
+        (2, 0x69, "IC84 (Si5345A)", "IC84"),
+        (2, 0x6a, "IC85 (Si5345A)", "IC85"),
+    ]
+    # Number of FireFly modules per direction.
+    hwFireFlyNum        = 8
+
+
+
+    # Initialize the emulated MDT-TP CM.
+    def __init__(self):
+        EmuMcu.EmuMcu.__init__(self)
+        # I2C port 4: serial number and temperature sensors.
+        self.i2cBus[4].add_device(0x50, EmuDS28CM00.EmuDS28CM00("IC114 (DS28CM00)"))
+        for i, slaveAddr in enumerate(range(0x18, 0x1d)):
+            self.i2cBus[4].add_device(slaveAddr, EmuMCP9808.EmuMCP9808("IC{0:d} (MCP9808)".format(34 + i), 30.0 + i * 0.5))
+        self.i2cBus[4].add_device(0x5c, EmuMCP9903.EmuMCP9903("IC39 (MCP9903)"))
+        # Power modules.
+        self.i2cBus[1].add_device(0x5c, EmuLTC2977.EmuLTC2977("IC26 (LTC2977)"))
+        self.i2cBus[1].add_device(0x5d, EmuLTC2977.EmuLTC2977("IC27 (LTC2977)"))
+        self.i2cBus[0].add_device(0x5e, EmuLTC2977.EmuLTC2977("IC49 (LTC2977)"))
+        self.i2cBus[0].add_device(0x5f, EmuLTC2977.EmuLTC2977("IC50 (LTC2977)"))
+        self.i2cBus[0].add_device(0x60, EmuLTC2977.EmuLTC2977("IC51 (LTC2977)"))
+        self.i2cBus[3].add_device(0x61, EmuLTC2977.EmuLTC2977("IC52 (LTC2977)"))
+        self.i2cBus[1].add_device(0x40, EmuLTM4700.EmuLTM4700("IC76 (LTM4700)"))
+        self.i2cBus[1].add_device(0x41, EmuLTM4700.EmuLTM4700("IC77 (LTM4700)"))
+        self.i2cBus[0].add_device(0x42, EmuLTM4700.EmuLTM4700("IC78 (LTM4700)"))
+        self.i2cBus[0].add_device(0x43, EmuLTM4700.EmuLTM4700("IC79 (LTM4700)"))
+        self.i2cBus[2].add_device(0x44, EmuLTM4675.EmuLTM4675("IC80 (LTM4675)"))
+        # Clock ICs behind the I2C mux IC55.
+        muxClock = EmuPCA9547.EmuPCA9547("IC55 (PCA9547PW)")
+        for channel, slaveAddr, deviceName, designId in self.hwClockDevices:
+            muxClock.add_device(channel, slaveAddr, EmuSi53xx.EmuSi53xx(deviceName, designId))
+        self.i2cBus[3].add_mux(0x70, muxClock)
+        # FireFly modules behind the I2C muxes IC24 (RX) and IC25 (TX).
+        muxFireFlyRx = EmuPCA9547.EmuPCA9547("IC24 (PCA9547PW)")
+        muxFireFlyTx = EmuPCA9547.EmuPCA9547("IC25 (PCA9547PW)")
+        for i in range(self.hwFireFlyNum):
+            muxFireFlyRx.add_device(i, 0x54, EmuFireFly.EmuFireFly("FireFly RX{0:d}".format(i + 1),
+                                    "SNRX{0:06d}".format(i + 1), 40 + i))
+            muxFireFlyTx.add_device(i, 0x50, EmuFireFly.EmuFireFly("FireFly TX{0:d}".format(i + 1),
+                                    "SNTX{0:06d}".format(i + 1), 44 + i))
+        self.i2cBus[2].add_mux(0x70, muxFireFlyRx)
+        self.i2cBus[2].add_mux(0x71, muxFireFlyTx)
@@ -0,0 +1,65 @@
+# File: EmuPCA9547.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating the PCA9547 8-channel I2C-bus multiplexer IC.
+#
+
+
+
+import EmuI2CDevice
+
+
+
+class EmuPCA9547(EmuI2CDevice.EmuI2CDevice):
+
+    # Hardware parameters.
+    hwChannels          = 8
+    hwEnable            = 0x08
+
+
+
+    # Initialize the emulated multiplexer.
+    def __init__(self, deviceName):
+        EmuI2CDevice.EmuI2CDevice.__init__(self, deviceName)
+        self.control = 0x00
+        # Devices on the downstream channels: {channel: {slave address: device}}.
+        self.channels = {channel: {} for channel in range(self.hwChannels)}
+
+
+
+    # Add a device to a downstream channel.
+    def add_device(self, channel, slaveAddr, device):
+        self.channels[channel][slaveAddr] = device
+
+
+
+    # Get the devices of the currently enabled downstream channel.
+    def get_devices(self):
+        if not self.control & self.hwEnable:
+            return {}
+        return self.channels[self.control & 0x07]
+
+
+
+    # Reset the multiplexer. All channels are disabled.
+    def reset(self):
+        self.control = 0x00
+
+
+
+    # I2C write access: Set the control register.
+    def i2c_write(self, data):
+        self.accessWrite += 1
+        if data:
+            self.control = data[-1] & 0x0f
+        return True
+
+
+
+    # I2C read access: Read the control register.
+    def i2c_read(self, cnt):
+        self.accessRead += 1
+        return [self.control] * cnt
@@ -0,0 +1,107 @@
+# File: EmuPmbusDevice.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating a generic PMBus device with pages. The command data is
+# stored per page, except for the commands that are global for all pages. This
+# is the base class of the emulated LTC2977, LTM4700 and LTM4675 devices.
+#
+
+
+
+import EmuI2CDevice
+
+
+
+class EmuPmbusDevice(EmuI2CDevice.EmuI2CDevice):
+
+    # Hardware parameters.
+    hwPages             = 1
+    hwCmdCodePage       = 0x00
+    hwPageAll           = 0xff
+    hwGlobalCmds        = [0x00, 0x10, 0x88]    # PAGE, WRITE_PROTECT, READ_VIN
+
+
+
+    # Initialize the emulated PMBus device.
+    def __init__(self, deviceName):
+        EmuI2CDevice.EmuI2CDevice.__init__(self, deviceName)
+        self.page = 0
+        # Command data: {(page, command code): [data bytes]}. The page is None
+        # for global commands.
+        self.cmdData = {}
+        self.cmdData[(None, self.hwCmdCodePage)] = [0x00]
+
+
+
+    # Convert a value to the LINEAR11 format.
+    @classmethod
+    def float_to_l11(cls, value):
+        n = 0
+        while abs(value) * (2 ** -n) >= 1023 and n < 15:
+            n += 1
+        while abs(value) * (2 ** -n) < 512 and n > -16:
+            n -= 1
+        y = int(round(value * (2 ** -n))) & 0x7ff
+        return ((n & 0x1f) << 11) | y
+
+
+
+    # Convert a value to the LINEAR16 format with the given exponent.
+    @classmethod
+    def float_to_l16(cls, value, exponent):
+        return int(round(value * (2 ** -exponent))) & 0xffff
+
+
+
+    # Get the storage key of a command.
+    def cmd_key(self, page, cmdCode):
+        if cmdCode in self.hwGlobalCmds:
+            return (None, cmdCode)
+        return (page, cmdCode)
+
+
+
+    # Set the data of a command as little endian word.
+    def set_word(self, page, cmdCode, value):
+        self.cmdData[self.cmd_key(page, cmdCode)] = [value & 0xff, (value >> 8) & 0xff]
+
+
+
+    # Set the data of a command as byte.
+    def set_byte(self, page, cmdCode, value):
+        self.cmdData[self.cmd_key(page, cmdCode)] = [value & 0xff]
+
+
+
+    # I2C write access: The first byte is the command code, followed by the
+    # command data.
+    def i2c_write(self, data):
+        self.accessWrite += 1
+        if not data:
+            return True
+        self.pointer = data[0]
+        if len(data) < 2:
+            return True
+        if self.pointer == self.hwCmdCodePage:
+            if data[1] != self.hwPageAll and data[1] >= self.hwPages:
+                return False
+            self.page = data[1]
+            self.cmdData[(None, self.hwCmdCodePage)] = [data[1]]
+        elif self.page == self.hwPageAll and self.pointer not in self.hwGlobalCmds:
+            for page in range(self.hwPages):
+                self.cmdData[(page, self.pointer)] = list(data[1:])
+        else:
+            self.cmdData[self.cmd_key(self.page, self.pointer)] = list(data[1:])
+        return True
+
+
+
+    # I2C read access: Read the data of the command selected before.
+    def i2c_read(self, cnt):
+        self.accessRead += 1
+        page = 0 if self.page == self.hwPageAll else self.page
+        data = list(self.cmdData.get(self.cmd_key(page, self.pointer), []))
+        return (data + [0x00] * cnt)[:cnt]
@@ -0,0 +1,51 @@
+# File: EmuSi53xx.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class emulating the register map of the Si5341/Si5342/Si5344/Si5345
+# clock ICs. Register 0x01 of every page is the page register.
+#
+
+
+
+import EmuI2CDevice
+
+
+
+class EmuSi53xx(EmuI2CDevice.EmuI2CDevice):
+
+    # Power domain which must be on for the device to respond.
+    powerDomain         = "clock"
+
+    # Hardware parameters.
+    hwRegPage           = 0x01
+    hwRegDesignId       = 0x026b    # DESIGN_ID0..DESIGN_ID7.
+    hwDesignIdLen       = 8
+
+
+
+    # Initialize the emulated Si53xx.
+    def __init__(self, deviceName, designId=""):
+        EmuI2CDevice.EmuI2CDevice.__init__(self, deviceName)
+        self.page = 0x00
+        for i, char in enumerate(designId[:self.hwDesignIdLen]):
+            self.regs[self.hwRegDesignId + i] = ord(char)
+
+
+
+    # Read a register of the current page.
+    def reg_read(self, regAdr):
+        if regAdr == self.hwRegPage:
+            return self.page
+        return self.regs.get((self.page << 8) | regAdr, 0x00)
+
+
+
+    # Write a register of the current page.
+    def reg_write(self, regAdr, value):
+        if regAdr == self.hwRegPage:
+            self.page = value & 0xff
+        else:
+            self.regs[(self.page << 8) | regAdr] = value & 0xff
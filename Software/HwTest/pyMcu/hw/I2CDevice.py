@@ -2,7 +2,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 30 Apr 2020
-# Rev.: 24 Jun 2026
+# Rev.: 17 Oct 2026
 #
 # Python class implementing generic hardware access for I2C devices.
 #
@@ -117,27 +117,30 @@ class I2CDevice:
             for datum in dataWr:
                 print(" 0x{0:02x}".format(datum), end='')
             self.print_details()
-        # No repeated start, omit stop condition after write.
-        ret = self.mcuI2C.ms_write_adv(self.slaveAddr, dataWr, False, False)
-        if ret:
-            self.errorCount += 1
-            print(self.prefixErrorDevice + "Error writing data!", end='')
-            self.print_details()
-            return ret, 0xff
-        self.accessWrite += 1
-        self.bytesWritten += len(dataWr)
-        # Read access with repeated start.
-        if self.debugLevel >= 3:
-            print(self.prefixDebugDevice + "Reading data with repeated start.", end='')
-            self.print_details()
-        # Repeated start, generate stop condition after write.
-        ret, dataRd = self.mcuI2C.ms_read_adv(self.slaveAddr, readCnt, True, True)
-        if ret or len(dataRd) <= 0:
-            self.errorCount += 1
-            print(self.prefixErrorDevice + "Error reading data!", end='')
-            self.print_details()
-            print(self.prefixErrorDevice + "Error code: {0:d}: ".format(ret))
-            return ret, dataRd
+        # Other clients of the MCU command broker must not access the I2C
+        # master port between the write and the read.
+        with self.mcuI2C.mcuSer.exclusive():
+            # No repeated start, omit stop condition after write.
+            ret = self.mcuI2C.ms_write_adv(self.slaveAddr, dataWr, False, False)
+            if ret:
+                self.errorCount += 1
+                print(self.prefixErrorDevice + "Error writing data!", end='')
+                self.print_details()
+                return ret, 0xff
+            self.accessWrite += 1
+            self.bytesWritten += len(dataWr)
+            # Read access with repeated start.
+            if self.debugLevel >= 3:
+                print(self.prefixDebugDevice + "Reading data with repeated start.", end='')
+                self.print_details()
+            # Repeated start, generate stop condition after write.
+            ret, dataRd = self.mcuI2C.ms_read_adv(self.slaveAddr, readCnt, True, True)
+            if ret or len(dataRd) <= 0:
+                self.errorCount += 1
+                print(self.prefixErrorDevice + "Error reading data!", end='')
+                self.print_details()
+                print(self.prefixErrorDevice + "Error code: {0:d}: ".format(ret))
+                return ret, dataRd
         self.accessRead += 1
         self.bytesRead += len(dataRd)
         if self.debugLevel >= 3:
@@ -165,3 +168,11 @@ class I2CDevice:
         print()
         return 0
 
+
+
+    # Get the latency histogram and counters of the MCU commands sent to the
+    # I2C device. Return None if no command was sent yet.
+    def get_stats(self):
+        stats = self.mcuI2C.mcuSer.stats.snapshot_i2c(self.mcuI2C.port, self.slaveAddr)
+        return next(iter(stats.values()), None)
+
@@ -0,0 +1,103 @@
+# File: I2CDeviceAsync.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class implementing generic hardware access for I2C devices with
+# asyncio.
+#
+
+
+
+import McuI2CAsync
+
+
+
+class I2CDeviceAsync:
+
+    # Message prefixes and separators.
+    prefixDetails       = " - "
+    separatorDetails    = " - "
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+
+
+    # Initialize the I2C device.
+    def __init__(self, mcuI2CAsync, slaveAddr, deviceName):
+        self.mcuI2CAsync = mcuI2CAsync
+        self.slaveAddr = slaveAddr
+        self.deviceName = deviceName
+        self.prefixDebugDevice = self.prefixDebug + self.deviceName + ": "
+        self.prefixErrorDevice = self.prefixError + self.deviceName + ": "
+        self.errorCount = 0
+        self.accessRead = 0
+        self.accessWrite = 0
+        self.bytesRead = 0
+        self.bytesWritten = 0
+
+
+
+    # Write followed by a read with repeated start. This is required for SMBus
+    # and PMBus read access.
+    async def write_read(self, dataWr, readCnt):
+        if self.debugLevel >= 3:
+            print(self.prefixDebugDevice + "Writing data.", end='')
+            print(self.prefixDetails + "Data:", end='')
+            for datum in dataWr:
+                print(" 0x{0:02x}".format(datum), end='')
+            self.print_details()
+        # No other task may access the MCU between the write without stop
+        # condition and the read with repeated start.
+        async with self.mcuI2CAsync.mcuSerAsync.exclusive():
+            # No repeated start, omit stop condition after write.
+            ret = await self.mcuI2CAsync.ms_write_adv(self.slaveAddr, dataWr, False, False)
+            if ret:
+                self.errorCount += 1
+                print(self.prefixErrorDevice + "Error writing data!", end='')
+                self.print_details()
+                return ret, 0xff
+            self.accessWrite += 1
+            self.bytesWritten += len(dataWr)
+            # Read access with repeated start.
+            if self.debugLevel >= 3:
+                print(self.prefixDebugDevice + "Reading data with repeated start.", end='')
+                self.print_details()
+            # Repeated start, generate stop condition after write.
+            ret, dataRd = await self.mcuI2CAsync.ms_read_adv(self.slaveAddr, readCnt, True, True)
+        if ret or len(dataRd) <= 0:
+            self.errorCount += 1
+            print(self.prefixErrorDevice + "Error reading data!", end='')
+            self.print_details()
+            print(self.prefixErrorDevice + "Error code: {0:d}: ".format(ret))
+            return ret, dataRd
+        self.accessRead += 1
+        self.bytesRead += len(dataRd)
+        if self.debugLevel >= 3:
+            print(self.prefixDebugDevice + "Data read:", end='')
+            for datum in dataRd:
+                print(" 0x{0:02x}".format(datum), end='')
+            print()
+        return 0, dataRd
+
+
+
+    # Print details.
+    def print_details(self):
+        print(self.prefixDetails, end='')
+        print("I2C master port: {0:d}".format(self.mcuI2CAsync.port), end='')
+        print(self.separatorDetails + "Slave address: 0x{0:02x}".format(self.slaveAddr), end='')
+        if self.debugLevel >= 1:
+            print(self.separatorDetails + "Error count: {0:d}".format(self.errorCount), end='')
+        if self.debugLevel >= 2:
+            print(self.separatorDetails + "Read access count: {0:d}".format(self.accessRead), end='')
+            print(self.separatorDetails + "Write access count: {0:d}".format(self.accessWrite), end='')
+        if self.debugLevel >= 2:
+            print(self.separatorDetails + "Bytes read: {0:d}".format(self.bytesRead), end='')
+            print(self.separatorDetails + "Bytes written: {0:d}".format(self.bytesWritten), end='')
+        print()
+        return 0
@@ -0,0 +1,234 @@
+# File: I2CScheduler.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class for scheduling register reads from I2C devices on all I2C
+# master ports of the MCU. The reads are collected first and then sorted by
+# I2C master port, I2C multiplexer channel, device and page, so that the
+# multiplexers and pages are switched as rarely as possible. All resulting
+# MCU commands are sent as one pipelined command stream (see
+# McuSerial.send_pipelined). The data read is returned by the key of each read.
+#
+# Devices are the I2C device classes (e.g. I2C_FireFly, I2C_LTC2977). The
+# scheduler uses these attributes and methods:
+# - mcuI2C, slaveAddr: I2C master port and slave address.
+# - mux, muxChannel (optional): upstream I2C multiplexer (see I2C_PCA9547
+#   class) and its channel.
+# - hwRegPageSelect, page_is_set, page_cache, invalidate_page (only for reads
+#   with a page): page select register and page cache of the device.
+#
+
+
+
+import McuI2C
+import McuSerial
+
+
+
+class I2CScheduler:
+
+    # Message prefixes and separators.
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel          = 0     # Debug verbosity.
+
+    # Indices of the values of a read.
+    readIdxKey          = 0     # Key of the read.
+    readIdxDevice       = 1     # I2C device.
+    readIdxRegAdr       = 2     # Register address.
+    readIdxCnt          = 3     # Number of bytes to read.
+    readIdxPage         = 4     # Page of the register or None.
+
+
+
+    # Initialize the scheduler.
+    def __init__(self, mcuSer):
+        self.mcuSer = mcuSer
+        self.reads = []
+        self.errorCount = 0
+
+
+
+    # Add a register read. The key identifies the data read in the results.
+    def add_read(self, key, device, regAdr, cnt, page=None):
+        self.reads.append((key, device, regAdr, cnt, page))
+
+
+
+    # Remove all reads.
+    def clear(self):
+        self.reads = []
+
+
+
+    # Get the value of the control register of the multiplexer for the channel
+    # of a device. Return None if the device is not behind a multiplexer.
+    @classmethod
+    def mux_control(cls, device):
+        mux = getattr(device, "mux", None)
+        if mux is None or getattr(device, "muxChannel", None) is None:
+            return None
+        return (device.muxChannel & 0x0f) | mux.hwEnable
+
+
+
+    # Sort the reads, so that the multiplexers and pages are switched as
+    # rarely as possible. The order of the I2C master ports, the multiplexers
+    # and the devices is the order of their first read.
+    def sort_reads(self):
+        order = {}
+        def rank(obj):
+            return order.setdefault(id(obj), len(order))
+        keys = []
+        for read in self.reads:
+            device = read[self.readIdxDevice]
+            mux = getattr(device, "mux", None)
+            control = self.mux_control(device)
+            page = read[self.readIdxPage]
+            keys.append((device.mcuI2C.port, -1 if mux is None else rank(mux), -1 if control is None else control,
+                         rank(device), -1 if page is None else page, read[self.readIdxRegAdr]))
+        return [read for key, read in sorted(zip(keys, self.reads), key=lambda item: item[0])]
+
+
+
+    # Plan the MCU commands of the reads. Return the list of MCU commands, the
+    # I2C master port, key, offset and number of bytes of each command (key
+    # None for commands not returning data) and the final multiplexer and page
+    # states.
+    def plan(self):
+        cmds = []
+        cmdInfo = []
+        muxState = {}       # {multiplexer: control register value}
+        muxSwitched = set() # Multiplexers switched by the planned commands.
+        pageState = {}      # {device: page}
+        for key, device, regAdr, cnt, page in self.sort_reads():
+            mcuI2C = device.mcuI2C
+            # Switch the multiplexer.
+            control = self.mux_control(device)
+            if control is not None:
+                mux = device.mux
+                if mux in muxState:
+                    switch = muxState[mux] != control
+                else:
+                    switch = not mux.control_is_set(control)
+                if switch:
+                    cmds.append(mcuI2C.ms_cmd_write_adv(mux.slaveAddr, [control], False, True))
+                    cmdInfo.append((mcuI2C, None, 0, 0))
+                    muxSwitched.add(mux)
+                    # The pages of the devices behind the multiplexer must be
+                    # selected again.
+                    for dev in list(pageState):
+                        if getattr(dev, "mux", None) is mux:
+                            del pageState[dev]
+                muxState[mux] = control
+            # Select the page.
+            if page is not None:
+                if device in pageState:
+                    switch = pageState[device] != page
+                elif control is not None and device.mux in muxSwitched:
+                    switch = True
+                else:
+                    switch = not device.page_is_set(page)
+                if switch:
+                    cmds.append(mcuI2C.ms_cmd_write_adv(device.slaveAddr, [device.hwRegPageSelect, page], False, True))
+                    cmdInfo.append((mcuI2C, None, 0, 0))
+                pageState[device] = page
+            # Read the data. Split reads larger than the data buffer of the
+            # MCU firmware.
+            for offset in range(0, cnt, mcuI2C.hwReadCntMax):
+                cntBlock = min(mcuI2C.hwReadCntMax, cnt - offset)
+                cmds.append(mcuI2C.ms_cmd_write_adv(device.slaveAddr, [(regAdr + offset) & 0xff], False, False))
+                cmdInfo.append((mcuI2C, None, 0, 0))
+                cmds.append(mcuI2C.ms_cmd_read_adv(device.slaveAddr, cntBlock, True, True))
+                cmdInfo.append((mcuI2C, key, offset, cntBlock))
+        return cmds, cmdInfo, muxState, pageState
+
+
+
+    # Execute all reads. Return the results as a dictionary {key: data},
+    # where data is None if the read failed.
+    def run(self):
+        # Other clients of the MCU command broker must not switch the
+        # multiplexers or pages in between.
+        with self.mcuSer.exclusive():
+            return self.run_locked()
+
+
+
+    # Execute all reads. The caller must have exclusive access to the MCU (see
+    # McuSerial.exclusive).
+    def run_locked(self):
+        cmds, cmdInfo, muxState, pageState = self.plan()
+        results = {read[self.readIdxKey]: bytearray(read[self.readIdxCnt]) for read in self.reads}
+        failed = set()
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Executing {0:d} read(s) with {1:d} MCU command(s).".format(len(self.reads), len(cmds)))
+        ret = 0
+        if cmds:
+            ret, responses = self.mcuSer.send_pipelined(cmds)
+        else:
+            responses = []
+        portsFailed = set()
+        portsSetupFailed = set()    # Ports with a failed write (multiplexer, page or register address).
+        for i, (mcuI2C, key, offset, cnt) in enumerate(cmdInfo):
+            # After a failed write on this port, the multiplexer channel, the
+            # page or the register address of the following reads is unknown.
+            if key is not None and mcuI2C in portsSetupFailed:
+                failed.add(key)
+                continue
+            if i >= len(responses):
+                # No response received.
+                portsFailed.add(mcuI2C)
+                if key is not None:
+                    failed.add(key)
+                continue
+            response = responses[i]
+            if McuSerial.McuSerial.eval_response(response) != McuSerial.McuSerial.mcuResponseCodeOk:
+                self.errorCount += 1
+                mcuI2C.errorCount += 1
+                portsFailed.add(mcuI2C)
+                print(self.prefixError + "Error sending command to the I2C master port {0:d}!".format(mcuI2C.port))
+                if self.debugLevel >= 1:
+                    print(self.prefixError + "Command sent to MCU: " + cmds[i])
+                    print(self.prefixError + "Response from MCU:")
+                    print(response)
+                if key is None:
+                    portsSetupFailed.add(mcuI2C)
+                else:
+                    failed.add(key)
+                continue
+            if key is None:
+                mcuI2C.accessWrite += 1
+                continue
+            data = McuI2C.McuI2C.ms_parse_read_data(response)
+            if data is None or len(data) != cnt:
+                self.errorCount += 1
+                mcuI2C.errorCount += 1
+                print(self.prefixError + "Error parsing data read from the I2C master port {0:d}!".format(mcuI2C.port))
+                failed.add(key)
+                continue
+            mcuI2C.accessRead += 1
+            mcuI2C.bytesRead += cnt
+            results[key][offset:offset + cnt] = data
+        # A failed access may leave the devices on the bus in an unknown state.
+        for mcuI2C in portsFailed:
+            mcuI2C.ms_invalidate()
+        # Update the multiplexer and page caches.
+        for mux, control in muxState.items():
+            if mux.mcuI2C in portsFailed:
+                mux.invalidate()
+            else:
+                mux.control_cache(control)
+        for device, page in pageState.items():
+            control = self.mux_control(device)
+            if device.mcuI2C in portsFailed or (control is not None and muxState.get(device.mux) != control):
+                device.invalidate_page()
+            else:
+                device.page_cache(page)
+        if failed or portsFailed:
+            ret = ret or -1
+        return ret, {key: None if key in failed else bytes(data) for key, data in results.items()}
@@ -0,0 +1,187 @@
+# File: I2CWriteBatcher.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class for batching register writes to I2C devices on all I2C master
+# ports of the MCU. The writes are collected first and then grouped by I2C
+# master port, I2C multiplexer channel and device. All writes to a device are
+# packed into as few I2C burst write commands (`i2c-bw') as the command
+# buffer of the MCU firmware allows, keeping their order. All resulting MCU
+# commands are sent as one pipelined command stream (see
+# McuSerial.send_pipelined).
+#
+# Devices are the I2C device classes (e.g. I2C_MCP9808, I2C_LTC2977). The
+# batcher uses these attributes and methods:
+# - mcuI2C, slaveAddr, deviceName: I2C master port, slave address and name.
+# - mux, muxChannel (optional): upstream I2C multiplexer (see I2C_PCA9547
+#   class) and its channel.
+# - hwRegPageSelect, page_cache, invalidate_page (optional): page select
+#   register and page cache of the device, updated on writes to the page
+#   select register.
+# - hwCmdCodesConfigKeep, config_cache_clear (optional): configuration cache
+#   of the device, cleared on writes of other commands.
+#
+
+
+
+import McuSerial
+import I2CScheduler
+
+
+
+class I2CWriteBatcher:
+
+    # Message prefixes and separators.
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel          = 0     # Debug verbosity.
+
+
+
+    # Initialize the batcher.
+    def __init__(self, mcuSer):
+        self.mcuSer = mcuSer
+        self.writes = []
+        self.errorCount = 0
+
+
+
+    # Add a write of data bytes to a device, e.g. register address and value.
+    def add_write(self, device, data):
+        data = [datum & 0xff for datum in data]
+        # The write must fit into a single burst write command.
+        if not data or len(device.mcuI2C.ms_cmd_write_burst(device.slaveAddr, [data])) > device.mcuI2C.hwCmdLenMax:
+            self.errorCount += 1
+            print(self.prefixError + "{0:s}: Invalid number of data bytes {1:d} to write!".format(device.deviceName, len(data)))
+            return -1
+        # Any write except the ones listed may change the configuration.
+        if hasattr(device, "config_cache_clear") and data[0] not in device.hwCmdCodesConfigKeep:
+            device.config_cache_clear()
+        self.writes.append((device, data))
+        return 0
+
+
+
+    # Remove all writes.
+    def clear(self):
+        self.writes = []
+
+
+
+    # Sort the writes by I2C master port, multiplexer channel and device. The
+    # order of the I2C master ports, the multiplexers and the devices is the
+    # order of their first write. The writes to a device keep their order.
+    def sort_writes(self):
+        order = {}
+        def rank(obj):
+            return order.setdefault(id(obj), len(order))
+        keys = []
+        for device, data in self.writes:
+            mux = getattr(device, "mux", None)
+            control = I2CScheduler.I2CScheduler.mux_control(device)
+            keys.append((device.mcuI2C.port, -1 if mux is None else rank(mux), -1 if control is None else control,
+                         rank(device)))
+        return [write for key, write in sorted(zip(keys, self.writes), key=lambda item: item[0])]
+
+
+
+    # Plan the MCU commands of the writes. Return the list of MCU commands, the
+    # device and number of bytes written of each command and the final
+    # multiplexer and page states.
+    def plan(self):
+        cmds = []
+        cmdInfo = []
+        muxState = {}       # {multiplexer: control register value}
+        pageState = {}      # {device: page}
+        blocks = []         # Blocks of the burst write command being assembled.
+        blocksDevice = None # Device of these blocks.
+        for device, data in self.sort_writes():
+            # Complete the burst write command, if the device changes or the
+            # command would become too long.
+            if blocks and (device is not blocksDevice or \
+               len(device.mcuI2C.ms_cmd_write_burst(device.slaveAddr, blocks + [data])) > device.mcuI2C.hwCmdLenMax):
+                cmds.append(blocksDevice.mcuI2C.ms_cmd_write_burst(blocksDevice.slaveAddr, blocks))
+                cmdInfo.append((blocksDevice, sum(len(block) for block in blocks)))
+                blocks = []
+            # Switch the multiplexer.
+            control = I2CScheduler.I2CScheduler.mux_control(device)
+            if control is not None:
+                mux = device.mux
+                if mux in muxState:
+                    switch = muxState[mux] != control
+                else:
+                    switch = not mux.control_is_set(control)
+                if switch:
+                    cmds.append(mux.mcuI2C.ms_cmd_write_adv(mux.slaveAddr, [control], False, True))
+                    cmdInfo.append((mux, 1))
+                muxState[mux] = control
+            # Track the page selected.
+            if getattr(device, "hwRegPageSelect", None) == data[0] and len(data) == 2:
+                pageState[device] = data[1]
+            blocks.append(data)
+            blocksDevice = device
+        if blocks:
+            cmds.append(blocksDevice.mcuI2C.ms_cmd_write_burst(blocksDevice.slaveAddr, blocks))
+            cmdInfo.append((blocksDevice, sum(len(block) for block in blocks)))
+        return cmds, cmdInfo, muxState, pageState
+
+
+
+    # Execute all writes.
+    def run(self):
+        # Other clients of the MCU command broker must not switch the
+        # multiplexers or pages in between.
+        with self.mcuSer.exclusive():
+            return self.run_locked()
+
+
+
+    # Execute all writes. The caller must have exclusive access to the MCU (see
+    # McuSerial.exclusive).
+    def run_locked(self):
+        cmds, cmdInfo, muxState, pageState = self.plan()
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Executing {0:d} write(s) with {1:d} MCU command(s).".format(len(self.writes), len(cmds)))
+        ret = 0
+        if cmds:
+            ret, responses = self.mcuSer.send_pipelined(cmds)
+        else:
+            responses = []
+        portsFailed = set()
+        for i, (device, cnt) in enumerate(cmdInfo):
+            mcuI2C = device.mcuI2C
+            if i >= len(responses) or McuSerial.McuSerial.eval_response(responses[i]) != McuSerial.McuSerial.mcuResponseCodeOk:
+                self.errorCount += 1
+                mcuI2C.errorCount += 1
+                portsFailed.add(mcuI2C)
+                print(self.prefixError + "{0:s}: Error writing data to the I2C master port {1:d}!".format(device.deviceName, mcuI2C.port))
+                if self.debugLevel >= 1:
+                    print(self.prefixError + "Command sent to MCU: " + cmds[i])
+                    if i < len(responses):
+                        print(self.prefixError + "Response from MCU:")
+                        print(responses[i])
+                continue
+            mcuI2C.accessWrite += 1
+            mcuI2C.bytesWritten += cnt
+        # A failed access may leave the devices on the bus in an unknown state.
+        for mcuI2C in portsFailed:
+            mcuI2C.ms_invalidate()
+        # Update the multiplexer and page caches.
+        for mux, control in muxState.items():
+            if mux.mcuI2C in portsFailed:
+                mux.invalidate()
+            else:
+                mux.control_cache(control)
+        for device, page in pageState.items():
+            control = I2CScheduler.I2CScheduler.mux_control(device)
+            if device.mcuI2C in portsFailed or (control is not None and muxState.get(device.mux) != control):
+                device.invalidate_page()
+            else:
+                device.page_cache(page)
+        if portsFailed:
+            ret = ret or -1
+        return ret
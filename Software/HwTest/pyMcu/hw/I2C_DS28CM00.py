@@ -2,9 +2,11 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 08 May 2020
-# Rev.: 24 Jul 2020
+# Rev.: 17 Oct 2026
 #
 # Python class for communicating with the DS28CM00 silicon serial number IC.
+# The family code, the serial number and the CRC are read with a single I2C
+# access, using the address auto-increment of the device.
 #
 
 
@@ -28,6 +30,10 @@ class I2C_DS28CM00:
     # Hardware parameters.
     hwAdrMin            = 0x00
     hwAdrMax            = 0x08
+    hwAdrCrc            = 0x07  # Address of the CRC register.
+
+    # Lookup table of the CRC-8 (polynomial x^8 + x^5 + x^4 + 1, LSB first).
+    crcTable            = None
 
 
 
@@ -162,16 +168,42 @@ class I2C_DS28CM00:
 
 
 
+    # Calculate the CRC-8 of a sequence of bytes with a lookup table. The
+    # result is the same as the one of crc_calc.
+    @classmethod
+    def crc8(cls, data):
+        if cls.crcTable is None:
+            crcTable = []
+            for i in range(256):
+                crc = i
+                for j in range(8):
+                    crc = (crc >> 1) ^ 0x8c if crc & 0x01 else crc >> 1
+                crcTable.append(crc)
+            cls.crcTable = crcTable
+        crc = 0
+        for datum in data:
+            crc = cls.crcTable[crc ^ datum]
+        return crc
+
+
+
     # Read all information.
     def read_all(self):
-        ret, deviceFamilyCode = self.read_reg(0x00)
-        serialNumber = 0
-        for i in range(0, 6):
-            retTmp, snTmp = self.read_reg(i + 1)
-            ret |= retTmp
-            serialNumber |= (snTmp & 0xff) << (8 * i)
-        retTmp, crc = self.read_reg(0x07)
-        ret |= retTmp
-        crcError = crc != self.crc_calc(deviceFamilyCode, serialNumber, crc)
-        return ret, deviceFamilyCode, serialNumber, crc, crcError
+        self.i2cDevice.debugLevel = self.debugLevel
+        # Debug info.
+        if self.debugLevel >= 2:
+            print(self.prefixDebugDevice + "Reading the family code, the serial number and the CRC.", end='')
+            self.i2cDevice.print_details()
+        # Read the registers 0x00 to 0x07 with a single write-read access.
+        ret, dataRd = self.i2cDevice.write_read([0x00], self.hwAdrCrc + 1)
+        if ret or len(dataRd) != self.hwAdrCrc + 1:
+            print(self.prefixErrorDevice + "Error reading the family code, the serial number and the CRC!", end='')
+            self.i2cDevice.print_details()
+            return -1, 0xff, 0xffffffffffff, 0xff, True
+        dataRd = bytes(dataRd)
+        deviceFamilyCode = dataRd[0]
+        serialNumber = int.from_bytes(dataRd[1:self.hwAdrCrc], 'little')
+        crc = dataRd[self.hwAdrCrc]
+        crcError = crc != self.crc8(dataRd[0:self.hwAdrCrc])
+        return 0, deviceFamilyCode, serialNumber, crc, crcError
 
@@ -2,13 +2,24 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 10 Nov 2020
-# Rev.: 09 Sep 2022
+# Rev.: 17 Oct 2026
 #
 # Python class for communicating with a Samtec FireFly optical assembly.
+# Register ranges are read with a single I2C access, using the address
+# auto-increment of the module.
+# The identity of the modules (firmware version, vendor name, part number and
+# serial number) is cached across runs (see McuCache class). The cached
+# identity is validated with the vendor serial number, so that only the
+# serial number needs to be read as long as the module is not replaced.
+# The page selected by the page select byte is tracked, so that selecting the
+# same page again does not access the I2C bus. The tracked page becomes invalid
+# when the upstream I2C multiplexer is switched or when other clients of the
+# MCU command broker may have accessed the module (see McuI2C.ms_generation).
 #
 
 
 
+import McuCache
 import McuI2C
 import I2CDevice
 
@@ -30,6 +41,26 @@ class I2C_FireFly:
     deviceTypeTX        = 'tx'
     hwAdrMin            = 0x00
     hwAdrMax            = 0xff
+    hwRegTemperature    = 22    # Internal temperature monitor.
+    hwRegPageSelect     = 127   # Page select byte.
+    hwPageVendor        = 0x00  # Upper page with the vendor information.
+    hwPageTimeAtTemp    = 0x0b  # Upper page with the time at temperature histogram.
+    hwRegTimeAtTemp     = 128   # First register of the time at temperature histogram.
+    hwTimeAtTempSlots   = 22    # Number of slots of the time at temperature histogram.
+    hwTimeAtTempBytes   = 3     # Number of bytes per slot of the time at temperature histogram.
+
+    # Page cache configuration.
+    cachePage           = True  # Skip setting the page if it is already set.
+
+    # Identity cache configuration.
+    cacheIdentity       = True          # Cache the identity of the module.
+    cacheIdentityName   = "firefly"     # Name of the cache file.
+    identityCache       = None          # Cached identities of all modules: {key: identity}.
+
+    # Upstream I2C multiplexer (see I2C_PCA9547 class) and its channel. They
+    # are set by the owner of the multiplexer.
+    mux                 = None
+    muxChannel          = None
 
 
 
@@ -46,6 +77,10 @@ class I2C_FireFly:
         self.i2cDevice.debugLevel = self.debugLevel
         self.prefixDebugDevice = self.prefixDebug + self.deviceName + ": "
         self.prefixErrorDevice = self.prefixError + self.deviceName + ": "
+        # Selected page and the generation of the I2C bus and the multiplexer
+        # when it was selected.
+        self.pageCached = None
+        self.pageGeneration = None
 
 
 
@@ -223,24 +258,107 @@ class I2C_FireFly:
                 format(value, regName, regAdr), end='')
             self.i2cDevice.print_details()
             print(self.prefixErrorDevice + "Error code: {0:d}: ".format(ret))
+            if regAdr == self.hwRegPageSelect:
+                self.invalidate_page()
             return -1
+        if regAdr == self.hwRegPageSelect:
+            self.page_cache(value)
         return 0
 
 
 
+    # Get the generation of the selected page. It changes on errors, on a
+    # reset of the I2C bus, when the power of the board is changed, when
+    # other clients of the MCU command broker may have accessed the MCU and
+    # when the upstream I2C multiplexer is switched.
+    def page_generation(self):
+        return self.mcuI2C.ms_generation(), self.mux.switchCount if self.mux else None
+
+
+
+    # Check if the page is already selected.
+    def page_is_set(self, page):
+        return self.cachePage and page == self.pageCached and self.pageGeneration == self.page_generation()
+
+
+
+    # Remember the selected page.
+    def page_cache(self, page):
+        self.pageCached = page
+        self.pageGeneration = self.page_generation()
+
+
+
+    # Invalidate the selected page, e.g. if another master may have changed
+    # it.
+    def invalidate_page(self):
+        self.pageCached = None
+        self.pageGeneration = None
+
+
+
+    # Select a page of the upper memory. The page select byte is only written
+    # if the page is not already selected.
+    def set_page(self, page):
+        if self.page_is_set(page):
+            return 0
+        return self.write_reg(self.hwRegPageSelect, page)
+
+
+
+    # Read a block of consecutive registers with a single I2C access, using
+    # the address auto-increment of the module. Blocks larger than the data
+    # buffer of the MCU firmware are split. On error, the values of the
+    # registers not read are 0xff.
+    def read_reg_block(self, regAdrStart, cnt):
+        self.i2cDevice.debugLevel = self.debugLevel
+        if self.check_adr(regAdrStart) or self.check_adr(regAdrStart + cnt - 1):
+            return -1, bytes([0xff] * max(cnt, 0))
+        regAdrEnd = regAdrStart + cnt - 1
+        regName = self.adr_to_name(regAdrStart)
+        # Debug info.
+        if self.debugLevel >= 2:
+            print(self.prefixDebugDevice + "Reading the values of the \"{0:s}\", register addresses 0x{1:02x}..0x{2:02x}.".\
+                format(regName, regAdrStart, regAdrEnd), end='')
+            self.i2cDevice.print_details()
+        data = bytearray()
+        for regAdr in range(regAdrStart, regAdrEnd + 1, self.mcuI2C.hwReadCntMax):
+            cntBlock = min(self.mcuI2C.hwReadCntMax, regAdrEnd + 1 - regAdr)
+            # Write command and read data with repeated start.
+            ret, dataRd = self.i2cDevice.write_read([regAdr], cntBlock)
+            # Evaluate response.
+            if ret:
+                print(self.prefixErrorDevice + "Error reading the values of the \"{0:s}\", register addresses 0x{1:02x}..0x{2:02x}!".\
+                    format(regName, regAdrStart, regAdrEnd), end='')
+                self.i2cDevice.print_details()
+                print(self.prefixErrorDevice + "Error code: {0:d}: ".format(ret))
+                return -1, bytes(data) + bytes([0xff] * (cnt - len(data)))
+            if len(dataRd) != cntBlock:
+                print(self.prefixErrorDevice + "Error reading the values of the \"{0:s}\", register addresses 0x{1:02x}..0x{2:02x}: Incorrect amount of data received!".\
+                    format(regName, regAdrStart, regAdrEnd), end='')
+                self.i2cDevice.print_details()
+                return -1, bytes(data) + bytes([0xff] * (cnt - len(data)))
+            data += dataRd
+        # Debug info.
+        if self.debugLevel >= 2:
+            print(self.prefixDebugDevice + "Read the values of the \"{0:s}\", register addresses 0x{1:02x}..0x{2:02x}:".\
+                format(regName, regAdrStart, regAdrEnd), end='')
+            for datum in data:
+                print(" 0x{0:02x}".format(datum), end='')
+            self.i2cDevice.print_details()
+        return 0, bytes(data)
+
+
+
     # Read a register range as integer.
     def read_reg_range_int(self, regAdrStart, regAdrEnd):
         if regAdrStart > regAdrEnd:
             print(self.prefixErrorDevice + "Error reading register range: Start address {0:d} larger than end address {1:d}!".\
                 format(regAdrStart, regAdrEnd))
             return -1, -1
-        ret = 0
-        value = 0
-        for i in range(regAdrStart, regAdrEnd + 1):
-            retTmp, valueTmp = self.read_reg(i)
-            ret |= retTmp
-            value |= (valueTmp & 0xff) << (8 * (regAdrEnd - i))
-        return ret, value
+        ret, data = self.read_reg_block(regAdrStart, regAdrEnd - regAdrStart + 1)
+        # The first register holds the most significant byte.
+        return ret, int.from_bytes(data, 'big')
 
 
 
@@ -250,22 +368,24 @@ class I2C_FireFly:
             print(self.prefixErrorDevice + "Error reading register range: Start address {0:d} larger than end address {1:d}!".\
                 format(regAdrStart, regAdrEnd))
             return -1, ""
-        ret = 0
-        string = ""
-        for i in range(regAdrStart, regAdrEnd + 1):
-            retTmp, valueTmp = self.read_reg(i)
-            ret |= retTmp
-            string += chr(valueTmp)
-        return ret, string
+        ret, data = self.read_reg_block(regAdrStart, regAdrEnd - regAdrStart + 1)
+        return ret, data.decode('latin-1')
 
 
 
     # Read device temperature.
     def read_temperature(self):
-        ret, temperatureTmp = self.read_reg(22)
+        ret, temperatureTmp = self.read_reg(self.hwRegTemperature)
+        return ret, self.raw_to_temperature(temperatureTmp)
+
+
+
+    # Convert the raw value of the internal temperature monitor to a
+    # temperature value.
+    @classmethod
+    def raw_to_temperature(cls, raw):
         # Convert to signed value.
-        temperature = temperatureTmp - 256 * (temperatureTmp > 128)
-        return ret, temperature
+        return raw - 256 * (raw > 128)
 
 
 
@@ -301,39 +421,124 @@ class I2C_FireFly:
 
     # Read vendor name.
     def read_vendor_name(self):
-        # Set the page select byte.
-        self.write_reg(127, 0x00)
-        ret, vendorName = self.read_reg_range_str(152, 161)
-        return ret, vendorName
+        with self.mcuI2C.mcuSer.exclusive():
+            # Set the page select byte.
+            if self.set_page(self.hwPageVendor):
+                return -1, ""
+            ret, vendorName = self.read_reg_range_str(152, 161)
+            return ret, vendorName
 
 
 
     # Read vendor part number.
     def read_vendor_part_number(self):
-        # Set the page select byte.
-        self.write_reg(127, 0x00)
-        ret, vendorPartNumber = self.read_reg_range_str(171, 186)
-        return ret, vendorPartNumber
+        with self.mcuI2C.mcuSer.exclusive():
+            # Set the page select byte.
+            if self.set_page(self.hwPageVendor):
+                return -1, ""
+            ret, vendorPartNumber = self.read_reg_range_str(171, 186)
+            return ret, vendorPartNumber
 
 
 
     # Read vendor serial number.
     def read_vendor_serial_number(self):
-        # Set the page select byte.
-        self.write_reg(127, 0x00)
-        ret, vendorSerialNumber = self.read_reg_range_str(189, 198)
-        return ret, vendorSerialNumber
+        with self.mcuI2C.mcuSer.exclusive():
+            # Set the page select byte.
+            if self.set_page(self.hwPageVendor):
+                return -1, ""
+            ret, vendorSerialNumber = self.read_reg_range_str(189, 198)
+            return ret, vendorSerialNumber
 
 
 
     # Read device time at temperature.
     def read_time_at_temperature(self, temperaturSlot):
-        # Set the page select byte.
-        self.write_reg(127, 0x0b)
-        ret, timeAtTemperatureTmp = self.read_reg_range_int(128 + (3 * temperaturSlot), 130 + (3 * temperaturSlot))
-        # Convert to hours.
-        timeAtTemperature = timeAtTemperatureTmp * 5 / 60
-        return ret, timeAtTemperature
+        with self.mcuI2C.mcuSer.exclusive():
+            # Set the page select byte.
+            if self.set_page(self.hwPageTimeAtTemp):
+                return -1, float(-1)
+            regAdr = self.hwRegTimeAtTemp + self.hwTimeAtTempBytes * temperaturSlot
+            ret, timeAtTemperatureTmp = self.read_reg_range_int(regAdr, regAdr + self.hwTimeAtTempBytes - 1)
+            # Convert to hours.
+            timeAtTemperature = timeAtTemperatureTmp * 5 / 60
+            return ret, timeAtTemperature
+
+
+
+    # Read the device time at temperature of all temperature slots. The
+    # register range is read in blocks of McuI2C.hwReadCntMax bytes (66 bytes
+    # as 32 + 32 + 2 bytes).
+    def read_time_at_temperature_all(self):
+        with self.mcuI2C.mcuSer.exclusive():
+            # Set the page select byte.
+            if self.set_page(self.hwPageTimeAtTemp):
+                return -1, [float(-1)] * self.hwTimeAtTempSlots
+            ret, data = self.read_reg_block(self.hwRegTimeAtTemp, self.hwTimeAtTempBytes * self.hwTimeAtTempSlots)
+            timeAtTemperature = []
+            for i in range(0, len(data), self.hwTimeAtTempBytes):
+                # Convert to hours.
+                timeAtTemperature.append(int.from_bytes(data[i:i + self.hwTimeAtTempBytes], 'big') * 5 / 60)
+            return ret, timeAtTemperature
+
+
+
+    # Get the key of the module in the identity cache. The module is
+    # identified by the serial device of the MCU, the I2C master port, the
+    # multiplexer channel and the slave address.
+    def identity_key(self):
+        cacheKey = self.mcuI2C.mcuSer.cacheKey
+        if not cacheKey:
+            return None
+        return "{0:s}:{1:d}:{2:s}:0x{3:02x}".format(cacheKey, self.mcuI2C.port,
+            "-" if self.muxChannel is None else str(self.muxChannel), self.slaveAddr)
+
+
+
+    # Check if a field of the identity is valid, i.e. not empty and made of
+    # printable ASCII characters only.
+    @classmethod
+    def identity_field_valid(cls, field):
+        return bool(field.strip()) and all(" " <= char <= "~" for char in field)
+
+
+
+    # Read the identity of the module: firmware version, vendor name, vendor
+    # part number and vendor serial number. If the vendor serial number
+    # matches the cached identity, the other fields are taken from the cache.
+    def read_identity(self):
+        with self.mcuI2C.mcuSer.exclusive():
+            ret, vendorSerialNumber = self.read_vendor_serial_number()
+            if ret:
+                return ret, ["", "", "", vendorSerialNumber]
+            # An empty, erased or garbled serial number does not identify the
+            # module.
+            key = self.identity_key() if self.cacheIdentity else None
+            if not self.identity_field_valid(vendorSerialNumber):
+                key = None
+            # Use the cached identity.
+            if key:
+                if I2C_FireFly.identityCache is None:
+                    I2C_FireFly.identityCache = McuCache.McuCache(self.cacheIdentityName).load()
+                identity = I2C_FireFly.identityCache.get(key)
+                if isinstance(identity, list) and len(identity) == 4 and identity[3] == vendorSerialNumber:
+                    if self.debugLevel >= 2:
+                        print(self.prefixDebugDevice + "Using the cached identity of the module with serial number `{0:s}'.".\
+                            format(vendorSerialNumber), end='')
+                        self.i2cDevice.print_details()
+                    return 0, list(identity)
+            # Read the identity.
+            ret, firmwareVersion = self.read_firmware_version()
+            retTmp, vendorName = self.read_vendor_name()
+            ret |= retTmp
+            retTmp, vendorPartNumber = self.read_vendor_part_number()
+            ret |= retTmp
+            identity = [firmwareVersion, vendorName, vendorPartNumber, vendorSerialNumber]
+            # Cache only a complete and valid identity.
+            if key and not ret and all(self.identity_field_valid(field) for field in identity):
+                I2C_FireFly.identityCache[key] = identity
+                McuCache.McuCache(self.cacheIdentityName).set(key, identity)
+            return ret, identity
 
 
 
@@ -2,10 +2,13 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 28 Apr 2021
-# Rev.: 09 Sep 2022
+# Rev.: 17 Oct 2026
 #
 # Python class for communicating with the LTM4700 dual 50A or single 100A
 # uModule regulator with digital power system management IC.
+# The selected page is cached, so that selecting the same page again does not
+# access the I2C bus. The static configuration registers, e.g. MFR_CONFIG, are
+# cached until the next write command.
 #
 # Hints:
 # - See datasheet "ltm4700.pdf" for details.
@@ -31,6 +34,7 @@ class I2C_LTM4700:
 
     # Hardware parameters.
     hwCmdCodePage           = 0x00  # Command code for channel/page number.
+    hwRegPageSelect         = hwCmdCodePage     # Page select register (see I2CScheduler class).
     hwCmdCodeOperation      = 0x01
     hwCmdCodeOnOffConfig    = 0x02
     hwCmdCodeClearFaults    = 0x03
@@ -47,6 +51,13 @@ class I2C_LTM4700:
     hwPageMin               = 0     # Lowest hardware channel/page number.
     hwPageMax               = 1     # Highest hardware channel/page number.
     hwPage                  = 0     # Current hardware channel/page number.
+
+    # Page cache configuration.
+    cachePage               = True  # Skip setting the page if it is already set.
+    # Configuration cache.
+    cacheConfig             = True  # Cache the static configuration registers.
+    hwCmdCodesConfigKeep    = [hwCmdCodePage, hwCmdCodeWriteProtect, hwCmdCodeClearFaults]
+                                    # Writing these commands does not change the configuration.
     hwChannels              = 2
 
 
@@ -61,6 +72,14 @@ class I2C_LTM4700:
         self.prefixDebugDevice = self.prefixDebug + self.deviceName + ": "
         self.prefixErrorDevice = self.prefixError + self.deviceName + ": "
         self.errorCount = 0
+        # Generation of the I2C master port when hwPage was set. None if the
+        # page of the device is unknown.
+        self.pageGeneration = None
+        # Cached static configuration registers: {(page, command code): data}.
+        self.configCache = {}
+        # Generation of the I2C master port when the configuration cache was
+        # filled.
+        self.configGeneration = None
 
 
 
@@ -178,11 +197,15 @@ class I2C_LTM4700:
                 self.errorCount += 1
                 return -1
             self.hwPage = data[0]
+            self.pageGeneration = None
         # Assemble command and data to write.
         dataWr = []
         dataWr.append(cmdCode)
         for datum in data:
             dataWr.append(datum & 0xff)
+        # Any other command may change the configuration.
+        if cmdCode not in self.hwCmdCodesConfigKeep:
+            self.config_cache_clear()
         # Write command and data.
         ret = self.i2cDevice.write(dataWr)
         # Evaluate response.
@@ -191,18 +214,43 @@ class I2C_LTM4700:
             self.i2cDevice.print_details()
             print(self.prefixErrorDevice + "Error code: {0:d}: ".format(ret))
             return -1
+        if cmdCode == self.hwCmdCodePage:
+            self.page_cache(data[0])
         return 0
 
 
 
+    # Check if the page is already set. The cached page becomes invalid on
+    # errors, on a reset of the I2C bus, when the power of the board is
+    # changed and when other clients of the MCU command broker may have set
+    # the page (see McuI2C.ms_generation).
+    def page_is_set(self, page):
+        return self.cachePage and page == self.hwPage and \
+            self.pageGeneration is not None and self.pageGeneration == self.mcuI2C.ms_generation()
+
+
+
+    # Remember the selected page.
+    def page_cache(self, page):
+        self.hwPage = page
+        self.pageGeneration = self.mcuI2C.ms_generation()
+
+
+
+    # Invalidate the cached page, e.g. if another master may have changed it.
+    def invalidate_page(self):
+        self.pageGeneration = None
+
+
+
     # Set the channel/page numer.
     def set_page(self, page):
         if self.check_page_number(page):
             self.errorCount += 1
             return -1
-        self.hwPage = page
-        self.write(self.hwCmdCodePage, [page])
-        return 0
+        if self.page_is_set(page):
+            return 0
+        return self.write(self.hwCmdCodePage, [page])
 
 
 
@@ -217,11 +265,54 @@ class I2C_LTM4700:
         if self.check_page_number(page):
             self.errorCount += 1
             return -1, 0xff
-        self.hwPage = page
+        self.page_cache(page)
         return 0, page
 
 
 
+    # Read a static configuration register of a page. Use page None for
+    # registers which are not paged. The data is cached until the next write
+    # command, which may change the configuration, or until the I2C master port
+    # was reset or accessed by another client of the MCU command broker.
+    def read_config(self, cmdCode, dataLen, page):
+        with self.mcuI2C.mcuSer.exclusive():
+            key = (page, cmdCode)
+            if self.configGeneration != self.mcuI2C.ms_generation():
+                self.config_cache_clear()
+            if self.cacheConfig and key in self.configCache:
+                return 0, self.configCache[key]
+            if page is not None and self.set_page(page):
+                return -1, None
+            ret, data = self.read(cmdCode, dataLen)
+            if ret:
+                return -1, None
+            if self.cacheConfig:
+                if not self.configCache:
+                    self.configGeneration = self.mcuI2C.ms_generation()
+                self.configCache[key] = data
+            return 0, data
+
+
+
+    # Clear the configuration cache.
+    def config_cache_clear(self):
+        self.configCache = {}
+        self.configGeneration = None
+
+
+
+    # Fill the configuration cache with the static configuration registers of
+    # all channels.
+    def config_cache_fill(self):
+        self.config_cache_clear()
+        ret = 0
+        for channel in range(self.hwChannels):
+            if self.read_mfr_config(channel)[0]:
+                ret = -1
+        return ret
+
+
+
     # Calculate a float value from an L11 (Linear_5s_11s) value.
     @classmethod
     def l11_to_float(cls, b):
@@ -353,33 +444,35 @@ class I2C_LTM4700:
 
     # Read the measured output voltage.
     def read_vout(self, channel):
-        if self.set_page(channel):
-            self.errorCount += 1
-            return -1, float(-1)
-        # Read the VOUT value.
-        ret, data = self.read(self.hwCmdCodeReadVout, 2)
-        if ret:
-            self.errorCount += 1
-            print(self.prefixErrorDevice + "Error reading the output voltage of channel {0:d}. Error code: 0x{1:02x}: ".format(channel, ret))
-            return -1, float(-1)
-        voutRaw = (data[1] << 8) + data[0]
-        return 0, self.l16_to_float(voutRaw)
+        with self.mcuI2C.mcuSer.exclusive():
+            if self.set_page(channel):
+                self.errorCount += 1
+                return -1, float(-1)
+            # Read the VOUT value.
+            ret, data = self.read(self.hwCmdCodeReadVout, 2)
+            if ret:
+                self.errorCount += 1
+                print(self.prefixErrorDevice + "Error reading the output voltage of channel {0:d}. Error code: 0x{1:02x}: ".format(channel, ret))
+                return -1, float(-1)
+            voutRaw = (data[1] << 8) + data[0]
+            return 0, self.l16_to_float(voutRaw)
 
 
 
     # Read the average output current in amperes.
     def read_iout(self, channel):
-        if self.set_page(channel):
-            self.errorCount += 1
-            return -1, float(-1)
-        # Read the IOUT value.
-        ret, data = self.read(self.hwCmdCodeReadIout, 2)
-        if ret:
-            self.errorCount += 1
-            print(self.prefixErrorDevice + "Error reading the output current of channel {0:d}. Error code: 0x{1:02x}: ".format(channel, ret))
-            return -1, float(-1)
-        ioutRaw = (data[1] << 8) + data[0]
-        return 0, self.l11_to_float(ioutRaw)
+        with self.mcuI2C.mcuSer.exclusive():
+            if self.set_page(channel):
+                self.errorCount += 1
+                return -1, float(-1)
+            # Read the IOUT value.
+            ret, data = self.read(self.hwCmdCodeReadIout, 2)
+            if ret:
+                self.errorCount += 1
+                print(self.prefixErrorDevice + "Error reading the output current of channel {0:d}. Error code: 0x{1:02x}: ".format(channel, ret))
+                return -1, float(-1)
+            ioutRaw = (data[1] << 8) + data[0]
+            return 0, self.l11_to_float(ioutRaw)
 
 
 
@@ -409,10 +502,10 @@ class I2C_LTM4700:
 
     # Read the channel specific configuration register MFR_CONFIG_LTM4700.
     def read_mfr_config(self, channel):
-        if self.set_page(channel):
+        if self.check_page_number(channel):
             self.errorCount += 1
             return -1, 0xffff
-        ret, data = self.read(self.hwCmdCodeMfrConfigChan, 2)
+        ret, data = self.read_config(self.hwCmdCodeMfrConfigChan, 2, channel)
         if ret:
             self.errorCount += 1
             print(self.prefixErrorDevice + "Error reading the channel specific configuration register. Error code: 0x{0:02x}: ".format(ret))
@@ -439,16 +532,15 @@ class I2C_LTM4700:
         ret, iin = self.read_iin()
         if ret:
             return -1, [-1]
-        # Output voltages and currents.
+        # Output voltages and currents. Read both values of a channel in a
+        # row, so that each page is selected only once.
         vout = []
+        iout = []
         for channel in range(self.hwChannels):
             ret, voutChannel = self.read_vout(channel)
             if ret:
                 return -1, [-1]
             vout.append(voutChannel)
-        # Output currents.
-        iout = []
-        for channel in range(self.hwChannels):
             ret, ioutChannel = self.read_iout(channel)
             if ret:
                 return -1, [-1]
@@ -2,7 +2,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 04 May 2020
-# Rev.: 24 Jul 2020
+# Rev.: 17 Oct 2026
 #
 # Python class for communicating with the MCP9808 digital temperature sensor
 # IC.
@@ -29,6 +29,8 @@ class I2C_MCP9808:
     # Hardware parameters.
     hwPointerMin        = 0x00
     hwPointerMax        = 0x08
+    hwPointerConfig     = 0x01
+    hwPointerResolution = 0x08
 
 
 
@@ -302,7 +304,7 @@ class I2C_MCP9808:
 
     # Write the configuration register.
     def write_config(self, value):
-        ret = self.write_reg_word(0x01, value)
+        ret = self.write_reg_word(self.hwPointerConfig, value)
         return ret
 
 
@@ -330,6 +332,6 @@ class I2C_MCP9808:
 
     # Write the resolution register.
     def write_resolution(self, value):
-        ret = self.write_reg_byte(0x08, value)
+        ret = self.write_reg_byte(self.hwPointerResolution, value)
         return ret
 
@@ -2,7 +2,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 05 May 2020
-# Rev.: 24 Jul 2020
+# Rev.: 17 Oct 2026
 #
 # Python class for communicating with the MCP9903 multi-channel low-temperature
 # remote diode sensor IC.
@@ -29,6 +29,23 @@ class I2C_MCP9903:
     # Hardware parameters.
     hwAdrMin            = 0x00
     hwAdrMax            = 0xff
+    hwRegConfig0        = 0x03
+    hwRegConfig1        = 0x09
+    # Temperature registers of the channels: (integer value, fractional
+    # portion).
+    hwRegTempInt        = (0x00, 0x29)
+    hwRegTempExt1       = (0x01, 0x10)
+    hwRegTempExt2       = (0x23, 0x24)
+    # Blocks of consecutive registers read by read_all_temperatures:
+    # (first register address, number of registers). All integer values are
+    # read before the fractional portions, since the device holds the
+    # fractional portion of a channel once its integer value was read.
+    hwTempBlocks        = [(0x00, 2), (0x23, 2), (0x10, 1), (0x29, 1)]
+
+    # Indices of the temperatures returned by read_all_temperatures.
+    tempIdxInt          = 0     # Internal diode.
+    tempIdxExt1         = 1     # External diode 1.
+    tempIdxExt2         = 2     # External diode 2.
 
 
 
@@ -165,6 +182,43 @@ class I2C_MCP9903:
 
 
 
+    # Read a block of consecutive registers with a single I2C access, using
+    # the address auto-increment of the device.
+    def read_reg_block(self, regAdrStart, cnt):
+        self.i2cDevice.debugLevel = self.debugLevel
+        if self.check_adr(regAdrStart) or self.check_adr(regAdrStart + cnt - 1):
+            return -1, bytes([0xff] * cnt)
+        regName = self.adr_to_name(regAdrStart)
+        # Debug info.
+        if self.debugLevel >= 2:
+            print(self.prefixDebugDevice + "Reading {0:d} register(s) starting with the {1:s}, register address 0x{2:02x}.".\
+                format(cnt, regName, regAdrStart), end='')
+            self.i2cDevice.print_details()
+        # Write command and read data with repeated start.
+        ret, dataRd = self.i2cDevice.write_read([regAdrStart], cnt)
+        # Evaluate response.
+        if ret:
+            print(self.prefixErrorDevice + "Error reading {0:d} register(s) starting with the {1:s}, register address 0x{2:02x}!".\
+                format(cnt, regName, regAdrStart), end='')
+            self.i2cDevice.print_details()
+            print(self.prefixErrorDevice + "Error code: {0:d}: ".format(ret))
+            return -1, bytes([0xff] * cnt)
+        if len(dataRd) != cnt:
+            print(self.prefixErrorDevice + "Error reading {0:d} register(s) starting with the {1:s}, register address 0x{2:02x}: Incorrect amount of data received!".\
+                format(cnt, regName, regAdrStart), end='')
+            self.i2cDevice.print_details()
+            return -1, bytes([0xff] * cnt)
+        # Debug info.
+        if self.debugLevel >= 2:
+            print(self.prefixDebugDevice + "Read {0:d} register(s) starting with the {1:s}, register address 0x{2:02x}:".\
+                format(cnt, regName, regAdrStart), end='')
+            for datum in dataRd:
+                print(" 0x{0:02x}".format(datum), end='')
+            self.i2cDevice.print_details()
+        return 0, bytes(dataRd)
+
+
+
     # Convert a raw value to a temperature value.
     @classmethod
     def raw_to_temperature(cls, rawInt, rawFract):
@@ -179,6 +233,26 @@ class I2C_MCP9903:
 
 
 
+    # Read the temperatures of all channels with as few I2C accesses as the
+    # register map allows. The temperatures are returned as a list, see
+    # tempIdxXxx for the indices.
+    def read_all_temperatures(self):
+        ret = 0
+        regs = {}
+        for regAdrStart, cnt in self.hwTempBlocks:
+            retTmp, data = self.read_reg_block(regAdrStart, cnt)
+            ret |= retTmp
+            for i in range(cnt):
+                regs[regAdrStart + i] = data[i]
+        temperatures = [0.0] * 3
+        for idx, regAdr in [(self.tempIdxInt, self.hwRegTempInt),
+                            (self.tempIdxExt1, self.hwRegTempExt1),
+                            (self.tempIdxExt2, self.hwRegTempExt2)]:
+            temperatures[idx] = self.raw_to_temperature(regs[regAdr[0]], regs[regAdr[1]])
+        return ret, temperatures
+
+
+
     # Read the internal diode temperature.
     def read_temp_int(self):
         retInt, valueInt = self.read_reg(0x00)
@@ -264,14 +338,14 @@ class I2C_MCP9903:
 
     # Write the configuration register 0.
     def write_config_0(self, value):
-        ret = self.write_reg(0x03, value)
+        ret = self.write_reg(self.hwRegConfig0, value)
         return ret
 
 
 
     # Write the configuration register 1.
     def write_config_1(self, value):
-        ret = self.write_reg(0x09, value)
+        ret = self.write_reg(self.hwRegConfig1, value)
         return ret
 
 
@@ -2,10 +2,14 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 28 Apr 2020
-# Rev.: 24 Jul 2020
+# Rev.: 17 Oct 2026
 #
 # Python class for communicating with the PCA9547 8-channel I2C-bus multiplexer
 # IC.
+# The channel set last is cached, so that setting the same channel again does
+# not access the I2C bus. The cache is invalidated on errors, on a reset of the
+# I2C bus, when the power of the board is changed and when other clients of the
+# MCU command broker may have switched the channel (see McuI2C.ms_generation).
 #
 
 
@@ -29,6 +33,11 @@ class I2C_PCA9547:
     # Hardware parameters.
     hwChannelMin        = 0x00  # Lowest hardware channel number.
     hwChannelMax        = 0x0f  # Highest hardware channel number.
+    hwEnable            = 0x08  # Enable bit of the control register.
+
+    # Channel cache configuration.
+    cacheChannel        = True  # Skip setting the channel if it is already set.
+    verifyChannel       = False # Read back the control register instead of trusting the cached channel.
 
 
 
@@ -41,6 +50,14 @@ class I2C_PCA9547:
         self.i2cDevice.debugLevel = self.debugLevel
         self.prefixDebugDevice = self.prefixDebug + self.deviceName + ": "
         self.prefixErrorDevice = self.prefixError + self.deviceName + ": "
+        # Cached value of the control register and the generation of the I2C
+        # master port when it was cached.
+        self.controlCached = None
+        self.controlGeneration = None
+        self.skipCount = 0
+        # Number of channel changes. The devices behind the multiplexer use it
+        # to detect that the multiplexer was switched.
+        self.switchCount = 0
 
 
 
@@ -60,7 +77,14 @@ class I2C_PCA9547:
         if self.check_channel_number(channel):
             return -1
         channel &= 0x0f
-        channel |= 0x08     # Set the enable bit.
+        channel |= self.hwEnable    # Set the enable bit.
+        # Skip the access if the channel is already set.
+        if self.control_is_set(channel):
+            self.skipCount += 1
+            if self.debugLevel >= 3:
+                print(self.prefixDebugDevice + "Channel 0x{0:02x} is already set.".format(channel), end='')
+                self.i2cDevice.print_details()
+            return 0
         # Debug info.
         if self.debugLevel >= 2:
             print(self.prefixDebugDevice + "Setting the channel to 0x{0:02x}.".format(channel), end='')
@@ -69,10 +93,12 @@ class I2C_PCA9547:
         ret = self.i2cDevice.write([channel])
         # Evaluate response.
         if ret:
+            self.invalidate()
             print(self.prefixErrorDevice + "Error setting the channel to 0x{0:02x}!".format(channel), end='')
             self.i2cDevice.print_details()
             print(self.prefixErrorDevice + "Error code: {0:d}: ".format(ret))
             return -1
+        self.control_cache(channel)
         return 0
 
 
@@ -85,13 +111,15 @@ class I2C_PCA9547:
             print(self.prefixDebugDevice + "Disabling all channels.", end='')
             self.i2cDevice.print_details()
         # Write data.
-        ret = self.i2cDevice.write([0x08])
+        ret = self.i2cDevice.write([self.hwEnable])
         # Evaluate response.
         if ret:
+            self.invalidate()
             print(self.prefixErrorDevice + "Error disabling all channels!", end='')
             self.i2cDevice.print_details()
             print(self.prefixErrorDevice + "Error code: {0:d}: ".format(ret))
             return -1
+        self.control_cache(self.hwEnable)
         return 0
 
 
@@ -107,10 +135,48 @@ class I2C_PCA9547:
         ret, data = self.i2cDevice.read(1)
         # Evaluate response.
         if ret or len(data) != 1:
+            self.invalidate()
             print(self.prefixErrorDevice + "Error reading the multiplexer channel!", end='')
             self.i2cDevice.print_details()
             if ret:
                 print(self.prefixErrorDevice + "Reading of data returned error code {0:d}.".format(ret))
             return -1, 0xff
+        self.control_cache(data[0])
         return 0, data[0]
 
+
+
+    # Cache the value of the control register.
+    def control_cache(self, control):
+        if control != self.controlCached:
+            self.switchCount += 1
+        if self.cacheChannel:
+            self.controlCached = control
+            self.controlGeneration = self.mcuI2C.ms_generation()
+
+
+
+    # Check if the control register is set to the given value. In verify mode,
+    # the control register is read back if the cached value matches.
+    def control_is_set(self, control):
+        if not self.cacheChannel or self.controlCached != control or \
+           self.controlGeneration != self.mcuI2C.ms_generation():
+            return False
+        if self.verifyChannel:
+            ret, controlRead = self.get_channel()
+            if ret or controlRead != control:
+                if self.debugLevel >= 1:
+                    print(self.prefixDebugDevice + "Cached channel 0x{0:02x} does not match the hardware.".format(control), end='')
+                    self.i2cDevice.print_details()
+                return False
+        return True
+
+
+
+    # Invalidate the cached channel, e.g. if another master may have changed
+    # it.
+    def invalidate(self):
+        self.controlCached = None
+        self.controlGeneration = None
+        self.switchCount += 1
+
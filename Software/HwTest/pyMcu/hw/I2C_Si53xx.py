@@ -2,18 +2,26 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 29 Apr 2020
-# Rev.: 24 Jun 2026
+# Rev.: 17 Oct 2026
 #
 # Python class for communicating with Silicon Labs Si5341/40 and Si5345/44/42
 # devices.
+# The register map files are compiled to programs of I2C writes, which are
+# cached across runs (see McuCache class). In differential mode, only the
+# registers which differ from the register map file are written. The design
+# ID written by the register map files is used to detect chips which already
+# hold the configuration.
 #
 
 
 
+import hashlib
 import os
 import time
+import McuCache
 import McuI2C
 import I2CDevice
+import I2CScheduler
 
 
 
@@ -30,6 +38,37 @@ class I2C_Si53xx:
 
     # Hardware parameters.
     fileRegMapMarkComment = "#"
+    hwRegPageSelect     = 0x01      # Page register, available on all pages.
+    hwDelay             = 0.3       # Delay marked in the register map files in seconds.
+    burstBlocksMax      = 20        # Maximum number of blocks per burst write.
+    readGapMax          = 8         # Maximum number of registers not needed read to merge two reads.
+    hwRegDesignId       = 0x026b    # DESIGN_ID0..DESIGN_ID7, set by ClockBuilder Pro.
+    hwDesignIdLen       = 8
+    hwRegsSelfClearing  = [0x001c, 0x0514]  # SOFT_RST_ALL and BW_UPDATE_PLL, they always read back 0.
+    hwRegStatus         = 0x000c    # Internal status bits.
+    hwStatusNotReady    = 0x0b      # SYSINCAL, LOSXAXB and LOL (Si5341/40) or XAXB_ERR (Si5345/44/42).
+
+    # Page cache configuration.
+    cachePage           = True      # Skip setting the page if it is already set.
+
+    # Programs compiled from register map files.
+    cacheProgram        = True      # Cache the compiled programs across runs.
+    cacheProgramName    = "si53xx"  # Name of the cache file.
+    programVersion      = 2         # Version of the program format.
+    programCache        = None      # Cached programs: {key: program}.
+    # Sections of a program. The sections of the register map files are marked
+    # by comments, e.g. `# Start configuration preamble'.
+    sectionPreamble     = "preamble"
+    sectionRegisters    = "registers"
+    sectionPostamble    = "postamble"
+    sectionDelay        = "delay"
+    sectionMarkStart    = "Start configuration "
+
+    # Upstream I2C multiplexer (see I2C_PCA9547 class) and its channel. They
+    # are set by the owner of the multiplexer.
+    mux                 = None
+    muxChannel          = None
+
 
 
     # Initialize the I2C device.
@@ -41,106 +80,406 @@ class I2C_Si53xx:
         self.i2cDevice.debugLevel = self.debugLevel
         self.prefixDebugDevice = self.prefixDebug + self.deviceName + ": "
         self.prefixErrorDevice = self.prefixError + self.deviceName + ": "
+        # Selected page and the generation of the I2C bus and the multiplexer
+        # when it was selected.
+        self.pageCached = None
+        self.pageGeneration = None
 
 
 
-    # Load the configuration of an Si53xx IC from a register map file produced
-    # with the ClockBuilder Pro software.
-    def config_file(self, fileRegMapName, burstMode):
+    # Get the generation of the selected page. It changes on errors, on a
+    # reset of the I2C bus, when the power of the board is changed, when
+    # other clients of the MCU command broker may have accessed the MCU and
+    # when the upstream I2C multiplexer is switched.
+    def page_generation(self):
+        return self.mcuI2C.ms_generation(), self.mux.switchCount if self.mux else None
+
+
+
+    # Check if the page is already selected.
+    def page_is_set(self, page):
+        return self.cachePage and page == self.pageCached and self.pageGeneration == self.page_generation()
+
+
+
+    # Remember the selected page.
+    def page_cache(self, page):
+        self.pageCached = page
+        self.pageGeneration = self.page_generation()
+
+
+
+    # Invalidate the selected page, e.g. if another master may have changed
+    # it.
+    def invalidate_page(self):
+        self.pageCached = None
+        self.pageGeneration = None
+
+
+
+    # Encode register writes (address, value) to the data of the I2C writes,
+    # two bytes each: register address and value. The page register is only
+    # written if the page changes. Since the register map files are sorted by
+    # address, this is rarely the case. Return the data and the page selected
+    # at the end.
+    @classmethod
+    def encode_writes(cls, regs, pageCurrent=None):
+        data = bytearray()
+        for regAdr, value in regs:
+            # Extract page and register address.
+            # For details, see "AN926: Reading and Writing Registers with
+            # SPI and I2C", "an926-reading-writing-registers-spi-i2c.pdf".
+            pageByte = (regAdr >> 8) & 0xff
+            adrByte = regAdr & 0xff
+            # Writing the page register directly selects another page.
+            if adrByte == cls.hwRegPageSelect:
+                data += bytes([cls.hwRegPageSelect, value & 0xff])
+                pageCurrent = value & 0xff
+                continue
+            # Set the page register with the upper byte of the 2-byte address.
+            if pageByte != pageCurrent:
+                data += bytes([cls.hwRegPageSelect, pageByte])
+                pageCurrent = pageByte
+            # Send second byte of the addresse and the data byte.
+            data += bytes([adrByte, value & 0xff])
+        return bytes(data), pageCurrent
+
+
+
+    # Encode the sections (name, register writes) of a program. The selected
+    # page is tracked across the sections. Empty sections are dropped.
+    @classmethod
+    def encode_program(cls, sections):
+        program = []
+        pageCurrent = None
+        for section, regs in sections:
+            if section != cls.sectionDelay and not regs:
+                continue
+            data, pageCurrent = cls.encode_writes(regs, pageCurrent)
+            program.append((section, data))
+        return program
+
+
+
+    # Decode a program to its sections (name, register writes). Writes to the
+    # page register are not included.
+    @classmethod
+    def decode_program(cls, program):
+        sections = []
+        pageCurrent = 0x00
+        for section, data in program:
+            regs = []
+            for i in range(0, len(data) - 1, 2):
+                if data[i] == cls.hwRegPageSelect:
+                    pageCurrent = data[i + 1]
+                else:
+                    regs.append(((pageCurrent << 8) | data[i], data[i + 1]))
+            sections.append((section, regs))
+        return sections
+
+
+
+    # Get the registers of the configuration section of a program as a
+    # dictionary {address: value}. The last write of a register wins.
+    @classmethod
+    def program_regs(cls, program):
+        regs = {}
+        for section, sectionRegs in cls.decode_program(program):
+            if section == cls.sectionRegisters:
+                regs.update(sectionRegs)
+        return regs
+
+
+
+    # Compile the text of a register map file produced with the ClockBuilder
+    # Pro software to a program. The program is a list of sections (name,
+    # data) in the order of the register map file: preamble, delay, registers
+    # and postamble. The data of a section holds the I2C writes, two bytes
+    # each: register address and value. Register map files without section
+    # marks only have a registers section.
+    def compile_reg_map(self, fileRegMapName, fileRegMapText):
+        sections = [[self.sectionRegisters, []]]
+        fileRegMapLineCount = 0
+        for fileRegMapLine in fileRegMapText.splitlines():
+            fileRegMapLineCount += 1
+            if self.debugLevel >= 3:
+                print(self.prefixDebugDevice + "Processing line {0:d} of the register map file `{1:s}':".\
+                    format(fileRegMapLineCount, fileRegMapName))
+                print(self.prefixDebugDevice + fileRegMapLine.strip('\n\r'))
+            # Strip all leading and trailing white spaces, tabs, line feeds and carriage returns.
+            lineStripped = fileRegMapLine.strip(' \t\n\r')
+            # Remove comments.
+            if lineStripped.find(self.fileRegMapMarkComment) >= 0:
+                lineCommentRemoved = lineStripped[0:lineStripped.find(self.fileRegMapMarkComment)].strip(' \t')
+            else:
+                lineCommentRemoved = lineStripped
+            # If line includes word Delay in pos 2, then delay by 300 ms as required according to device specification.
+            if lineStripped.find("Delay") == 2:
+                sections.append([self.sectionDelay, []])
+                sections.append([self.sectionRegisters, []])
+                continue
+            # Start of a section.
+            if lineStripped.find(self.sectionMarkStart) == 2:
+                section = lineStripped[2 + len(self.sectionMarkStart):].strip(' \t').lower()
+                if section in [self.sectionPreamble, self.sectionRegisters, self.sectionPostamble]:
+                    sections.append([section, []])
+                continue
+            # Get list of elements.
+            lineElements = list(filter(None, lineCommentRemoved.split(",")))
+            lineElements = list(el.strip(' \t\n\r') for el in lineElements)
+            # Ignore lines without data.
+            if not lineElements:
+                continue
+            # Ignore lines with content "Address,Data".
+            if lineElements[0].lower() == "address":
+                continue
+            # Convert hexadecimal values from ??h to 0x??.
+            lineElements = list("0x" + el.strip("h") if el.find("h") >= 0 else el for el in lineElements)
+            # Convert to integers.
+            try:
+                lineData = [int(i, 0) for i in lineElements[0:2]]
+                sections[-1][1].append((lineData[0] & 0xffff, lineData[1] & 0xff))
+            except (ValueError, IndexError):
+                print(self.prefixErrorDevice + "Invalid data in register map file `{0:s}'! Line number: {1:d}, Data: {2:s}".\
+                    format(fileRegMapName, fileRegMapLineCount, lineCommentRemoved))
+                return -1, None
+        program = self.encode_program(sections)
+        return 0, program
+
+
+
+    # Get the program of a register map file. The compiled programs are cached
+    # across runs (see McuCache class), keyed by the hash of the content of
+    # the register map file, so that each file is only parsed once.
+    def load_program(self, fileRegMapName):
+        try:
+            with open(fileRegMapName, "rb") as fileRegMap:
+                fileRegMapData = fileRegMap.read()
+        except OSError as e:
+            print(self.prefixErrorDevice + "Cannot read the register map file `{0:s}': {1:s}".format(fileRegMapName, str(e)))
+            return -1, None
+        key = "{0:d}:{1:s}".format(self.programVersion, hashlib.sha256(fileRegMapData).hexdigest())
+        # Use the cached program.
+        if self.cacheProgram:
+            if I2C_Si53xx.programCache is None:
+                I2C_Si53xx.programCache = McuCache.McuCache(self.cacheProgramName).load()
+            program = I2C_Si53xx.programCache.get(key)
+            if isinstance(program, list):
+                if self.debugLevel >= 2:
+                    print(self.prefixDebugDevice + "Using the cached program of the register map file `{0:s}'.".format(fileRegMapName))
+                try:
+                    return 0, [(section, bytes.fromhex(data)) for section, data in program]
+                except (TypeError, ValueError):
+                    pass
+        # Compile the register map file.
+        ret, program = self.compile_reg_map(fileRegMapName, fileRegMapData.decode('UTF-8'))
+        if ret:
+            return ret, program
+        if self.cacheProgram:
+            I2C_Si53xx.programCache[key] = [[section, data.hex()] for section, data in program]
+            McuCache.McuCache(self.cacheProgramName).set(key, I2C_Si53xx.programCache[key])
+        return 0, program
+
+
+
+    # Split a program into phases, which are separated by the delays. Each
+    # phase is the list of I2C writes of the sections up to the next delay.
+    @classmethod
+    def program_phases(cls, program):
+        phases = [[]]
+        for section, data in program:
+            if section == cls.sectionDelay:
+                phases.append([])
+            else:
+                phases[-1] += [list(data[i:i + 2]) for i in range(0, len(data), 2)]
+        return phases
+
+
+
+    # Write the I2C writes of a phase.
+    def config_phase(self, blocks, burstMode, fileRegMapName=""):
+        # The phases select the pages without the page cache.
+        self.invalidate_page()
+        # Faster burst mode.
+        if burstMode:
+            for i in range(0, len(blocks), self.burstBlocksMax):
+                ret = self.i2cDevice.write_burst(blocks[i:i + self.burstBlocksMax])
+                if ret:
+                    print(self.prefixErrorDevice + "Error sending data of register map file `{0:s}' in I2C burst mode! Block: {1:d}".\
+                        format(fileRegMapName, i))
+                    return -1
+        # Slower step by step mode.
+        else:
+            for i, block in enumerate(blocks):
+                ret = self.i2cDevice.write(block)
+                if ret:
+                    print(self.prefixErrorDevice + "Error sending data of register map file `{0:s}'! Block: {1:d}".\
+                        format(fileRegMapName, i))
+                    return -1
+        return 0
+
+
+
+    # Read registers in bulk. Consecutive registers of a page are read with
+    # single I2C accesses, which may include a few registers not needed.
+    # Return the values as a dictionary {address: value}.
+    def read_regs(self, regAdrs):
+        scheduler = I2CScheduler.I2CScheduler(self.mcuI2C.mcuSer)
+        scheduler.debugLevel = self.debugLevel
+        regAdrs = sorted(set(regAdrs))
+        blocks = []     # Blocks of registers to read: [first address, last address].
+        for regAdr in regAdrs:
+            if blocks and (blocks[-1][1] >> 8) == (regAdr >> 8) and regAdr - blocks[-1][1] <= self.readGapMax + 1:
+                blocks[-1][1] = regAdr
+            else:
+                blocks.append([regAdr, regAdr])
+        for regAdrStart, regAdrEnd in blocks:
+            scheduler.add_read(regAdrStart, self, regAdrStart & 0xff, regAdrEnd - regAdrStart + 1, regAdrStart >> 8)
+        ret, results = scheduler.run()
+        values = {}
+        for regAdrStart, regAdrEnd in blocks:
+            data = results[regAdrStart]
+            if data is None:
+                continue
+            for i, value in enumerate(data):
+                values[regAdrStart + i] = value
+        if ret:
+            print(self.prefixErrorDevice + "Error reading back the registers!")
+            return -1, values
+        return 0, values
+
+
+
+    # Read the design ID. Trailing zeros are removed.
+    def read_design_id(self):
+        regAdrs = range(self.hwRegDesignId, self.hwRegDesignId + self.hwDesignIdLen)
+        ret, values = self.read_regs(regAdrs)
+        if ret:
+            return -1, ""
+        return 0, bytes([values[regAdr] for regAdr in regAdrs]).decode('latin-1').rstrip("\x00")
+
+
+
+    # Check if the IC already holds the configuration of a register map file.
+    # The design ID is compared first, which needs only a single read. Since
+    # variants of a configuration usually share the design ID, all registers
+    # of the register map file are read back and compared if verify is set.
+    # Finally, the registers left by the postamble must hold their final
+    # values and the IC must neither calibrate nor report a loss of the
+    # crystal or of lock. Otherwise, loading the configuration was not
+    # completed, e.g. it was interrupted before the postamble.
+    def config_is_loaded(self, fileRegMapName, verify=True):
+        ret, program = self.load_program(fileRegMapName)
+        if ret:
+            return -1, False
+        regs = self.program_regs(program)
+        regsPostamble = {}
+        for section, sectionRegs in self.decode_program(program):
+            if section == self.sectionPostamble:
+                regsPostamble.update(sectionRegs)
+        for regAdr in self.hwRegsSelfClearing:
+            regsPostamble.pop(regAdr, None)
+        regAdrs = range(self.hwRegDesignId, self.hwRegDesignId + self.hwDesignIdLen)
+        # The register map file does not set the design ID.
+        if any(regAdr not in regs for regAdr in regAdrs):
+            return 0, False
+        designId = bytes([regs[regAdr] for regAdr in regAdrs]).decode('latin-1').rstrip("\x00")
+        ret, designIdRead = self.read_design_id()
+        if ret:
+            return -1, False
+        if designIdRead != designId:
+            if self.debugLevel >= 1:
+                print(self.prefixDebugDevice + "Design ID `{0:s}' does not match `{1:s}' of the register map file `{2:s}'.".\
+                    format(designIdRead, designId, fileRegMapName))
+            return 0, False
+        if verify:
+            ret, values = self.read_regs(regs.keys())
+            if ret:
+                return -1, False
+            regsDiff = [regAdr for regAdr, value in regs.items() if values.get(regAdr) != value]
+            if regsDiff:
+                if self.debugLevel >= 1:
+                    print(self.prefixDebugDevice + "{0:d} of {1:d} registers differ from the register map file `{2:s}'.".\
+                        format(len(regsDiff), len(regs), fileRegMapName))
+                return 0, False
+        ret, values = self.read_regs(list(regsPostamble.keys()) + [self.hwRegStatus])
+        if ret:
+            return -1, False
+        regsDiff = [regAdr for regAdr, value in regsPostamble.items() if values.get(regAdr) != value]
+        if regsDiff:
+            if self.debugLevel >= 1:
+                print(self.prefixDebugDevice + "The postamble of the register map file `{0:s}' was not executed.".\
+                    format(fileRegMapName))
+            return 0, False
+        if values[self.hwRegStatus] & self.hwStatusNotReady:
+            if self.debugLevel >= 1:
+                print(self.prefixDebugDevice + "The IC is not ready. Status: 0x{0:02x}".format(values[self.hwRegStatus]))
+            return 0, False
+        return 0, True
+
+
+
+    # Get the phases of I2C writes for loading the configuration of a register
+    # map file produced with the ClockBuilder Pro software (see config_file).
+    # Between the phases, a delay of 300 ms is required.
+    def config_phases(self, fileRegMapName, differential=False):
         # Check if fileRegMapName exists.
         if not os.path.exists(fileRegMapName):
             print(self.prefixErrorDevice + "The register map file `{0:s}' does not exist!".format(fileRegMapName))
-            return -1
+            return -1, []
         # Check if fileRegMapName is a file.
         if not os.path.isfile(fileRegMapName):
             print(self.prefixErrorDevice + "The register map file `{0:s}' is not a file!".format(fileRegMapName))
-            return -1
+            return -1, []
         # Check if the register map file is readable.
         if not os.access(fileRegMapName, os.R_OK):
             print(self.prefixErrorDevice + "Cannot open the register map file `{0:s}'!".format(fileRegMapName))
-            return -1
+            return -1, []
+        ret, program = self.load_program(fileRegMapName)
+        if ret:
+            return -1, []
+        if differential:
+            sections = self.decode_program(program)
+            regs = self.program_regs(program)
+            ret, values = self.read_regs(regs.keys())
+            if ret:
+                print(self.prefixErrorDevice + "Writing all registers of the register map file `{0:s}'.".format(fileRegMapName))
+            else:
+                regsDiff = [(regAdr, value) for regAdr, value in regs.items() if values.get(regAdr) != value]
+                if self.debugLevel >= 1:
+                    print(self.prefixDebugDevice + "{0:d} of {1:d} registers differ from the register map file `{2:s}'.".\
+                        format(len(regsDiff), len(regs), fileRegMapName))
+                if not regsDiff:
+                    return 0, []
+                # Replace the registers sections by the registers which differ.
+                sectionsDiff = []
+                for section, sectionRegs in sections:
+                    if section != self.sectionRegisters:
+                        sectionsDiff.append((section, sectionRegs))
+                    elif regsDiff:
+                        sectionsDiff.append((section, regsDiff))
+                        regsDiff = []
+                program = self.encode_program(sectionsDiff)
+        return 0, self.program_phases(program)
 
-        fileRegMapLineCount = 0
-        if burstMode:
-            burstData = []
-        # Read and process the register map file.
-        with open(fileRegMapName, encoding='UTF-8') as fileRegMap:
-            for fileRegMapLine in fileRegMap:
-                fileRegMapLineCount += 1
+
+
+    # Load the configuration of an Si53xx IC from a register map file produced
+    # with the ClockBuilder Pro software.
+    # In differential mode, the registers of the register map file are read
+    # back and only the registers which differ are written. The preamble, the
+    # delay and the postamble are only executed if a register differs.
+    def config_file(self, fileRegMapName, burstMode, differential=False):
+        ret, phases = self.config_phases(fileRegMapName, differential)
+        if ret:
+            return -1
+        for phaseIdx, blocks in enumerate(phases):
+            # Delay by 300 ms as required according to the device
+            # specification.
+            if phaseIdx > 0:
                 if self.debugLevel >= 3:
-                    print(self.prefixDebugDevice + "Processing line {0:d} of the register map file `{1:s}':".\
-                        format(fileRegMapLineCount, fileRegMapName))
-                    print(self.prefixDebugDevice + fileRegMapLine.strip('\n\r'))
-                # Strip all leading and trailing white spaces, tabs, line feeds and carriage returns.
-                lineStripped = fileRegMapLine.strip(' \t\n\r')
-                # Remove comments.
-                if lineStripped.find(self.fileRegMapMarkComment) >= 0:
-                    lineCommentRemoved = lineStripped[0:lineStripped.find(self.fileRegMapMarkComment)].strip(' \t')
-                else:
-                    lineCommentRemoved = lineStripped
-                # If line includes word Delay in pos 2, then delay by 300 ms as required according to device specification.
-                if lineStripped.find("Delay") == 2:
-                    # Send preamble data before delay in burst mode.
-                    if burstMode:
-                        ret = self.i2cDevice.write_burst(burstData)
-                        if ret:
-                            print(self.prefixErrorDevice + "Error sending data of register map file `{0:s}' in I2C burst mode! Line number: {1:d}, Data: {2:s}".\
-                                format(fileRegMapName, fileRegMapLineCount, lineCommentRemoved))
-                            return -1
-                        # Clear burst data after sending.
-                        burstData = []
-                    if self.debugLevel >= 3:
-                        print(self.prefixDebugDevice + "Delay found, delaying 300 ms.")
-                    time.sleep(0.3)
-                    continue
-                # Get list of elements.
-                lineElements = list(filter(None, lineCommentRemoved.split(",")))
-                lineElements = list(el.strip(' \t\n\r') for el in lineElements)
-                # Ignore lines without data.
-                if not lineElements:
-                    continue
-                # Ignore lines with content "Address,Data".
-                if lineElements[0].lower() == "address":
-                    continue
-                # Convert hexadecimal values from ??h to 0x??.
-                lineElements = list("0x" + el.strip("h") if el.find("h") >= 0 else el for el in lineElements)
-                # Convert to integers.
-                lineData = [int(i, 0) for i in lineElements]
-                # Extract page, register address and data from lineData.
-                # For details, see "AN926: Reading and Writing Registers with
-                # SPI and I2C", "an926-reading-writing-registers-spi-i2c.pdf".
-                pageByte = (lineData[0] >> 8) & 0xff
-                adrByte = lineData[0] & 0xff
-                dataByte = lineData[1] & 0xff
-                # Faster burst mode.
-                if burstMode:
-                    burstData.append([0x01, pageByte])
-                    burstData.append([adrByte, dataByte])
-                    # Send out burst data when a certain length is reached.
-                    if len(burstData) >= 20:
-                        ret = self.i2cDevice.write_burst(burstData)
-                        if ret:
-                            print(self.prefixErrorDevice + "Error sending data of register map file `{0:s}' in I2C burst mode! Line number: {1:d}, Data: {2:s}".\
-                                format(fileRegMapName, fileRegMapLineCount, lineCommentRemoved))
-                            return -1
-                        # Clear burst data after sending.
-                        burstData = []
-                # Slower step by step mode.
-                else:
-                    # Set the page register with the upper byte of the 2-byte address.
-                    ret = self.i2cDevice.write([0x01, pageByte])
-                    # Send second byte of the addresse and the data byte.
-                    ret = self.i2cDevice.write([adrByte, dataByte])
-                    if ret:
-                        print(self.prefixErrorDevice + "Error sending data of register map file `{0:s}'! Line number: {1:d}, Data: {2:s}".\
-                            format(fileRegMapName, fileRegMapLineCount, lineCommentRemoved))
-                        return -1
-            # Send remaining data in burst mode.
-            if burstData:
-                ret = self.i2cDevice.write_burst(burstData)
-                if ret:
-                    print(self.prefixErrorDevice + "Error sending data of register map file `{0:s}' in I2C burst mode! Line number: {1:d}, Data: {2:s}".\
-                        format(fileRegMapName, fileRegMapLineCount, lineCommentRemoved))
-                    return -1
+                    print(self.prefixDebugDevice + "Delay found, delaying 300 ms.")
+                time.sleep(self.hwDelay)
+            if self.config_phase(blocks, burstMode, fileRegMapName):
+                return -1
         return 0
-
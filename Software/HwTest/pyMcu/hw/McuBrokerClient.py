@@ -0,0 +1,130 @@
+# File: McuBrokerClient.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class for accessing the TM4C1290NCPDT MCU through the MCU command
+# broker (pyMcuBroker.py) instead of the serial port. It provides the subset of
+# the pySerial interface used by the McuSerial class, so that the McuSerial
+# class can use the broker as its transport.
+# Besides MCU commands, the broker accepts commands to group a sequence of MCU
+# commands into a transaction (see McuSerial.exclusive). While a client is in
+# a transaction, the broker executes only the commands of this client.
+#
+
+
+
+import fcntl
+import select
+import socket
+import struct
+import termios
+
+
+
+class McuBrokerClient:
+
+    # Port names starting with this prefix select the broker. The remainder
+    # of the port name is the path of the Unix socket of the broker.
+    brokerPortPrefix    = "unix:"
+
+    # Broker commands. They start with a prefix which no MCU command uses.
+    # - begin: Start a transaction. The broker responds once the transaction
+    #   is started, with the number of MCU commands of other clients executed
+    #   since the last command of this client as the response payload.
+    # - end: End the transaction. The broker does not respond.
+    brokerCmdPrefix     = "@"
+    brokerCmdBegin      = brokerCmdPrefix + "begin"
+    brokerCmdEnd        = brokerCmdPrefix + "end"
+
+
+
+    # Initialize the broker client.
+    def __init__(self):
+        self.port = None
+        self.portstr = None
+        self.sock = None
+        # Serial port parameters. They are kept only for compatibility with
+        # pySerial. The serial port itself is set up by the broker.
+        self.baudrate = 115200
+        self.bytesize = 8
+        self.parity = 'N'
+        self.stopbits = 1
+        self.timeout = None
+        self.writeTimeout = None
+        self.xonxoff = False
+        self.rtscts = False
+        self.dsrdtr = False
+
+
+
+    # Check if the port name selects the broker.
+    @classmethod
+    def is_broker_port(cls, port):
+        return bool(port) and port.startswith(cls.brokerPortPrefix)
+
+
+
+    # Connect to the broker.
+    def open(self):
+        self.portstr = self.port
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.port[len(self.brokerPortPrefix):])
+
+
+
+    # Disconnect from the broker.
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+
+
+    # File descriptor of the connection, used for select.
+    def fileno(self):
+        return self.sock.fileno()
+
+
+
+    # Number of bytes available for reading.
+    @property
+    def in_waiting(self):
+        return struct.unpack('i', fcntl.ioctl(self.sock, termios.FIONREAD, b'\0\0\0\0'))[0]
+
+
+
+    # Write data.
+    def write(self, data):
+        self.sock.sendall(data)
+        return len(data)
+
+
+
+    # Data is sent immediately, so there is nothing to flush.
+    def flush(self):
+        pass
+
+
+
+    # Read up to size bytes. Wait at most timeout seconds for data to arrive.
+    def read(self, size=1):
+        if not select.select([self.sock], [], [], self.timeout)[0]:
+            return b""
+        data = self.sock.recv(size)
+        if not data:
+            raise ConnectionError("Connection closed by the MCU command broker.")
+        return data
+
+
+
+    # Read a line. Wait at most timeout seconds for each byte to arrive.
+    def readline(self):
+        line = b""
+        while not line.endswith(b"\n"):
+            data = self.read(1)
+            if not data:
+                break
+            line += data
+        return line
@@ -0,0 +1,105 @@
+# File: McuCache.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class for persisting data of the pyMcu classes across runs, e.g.
+# calibration values. The data is stored as JSON files in a cache directory.
+# Each file holds a dictionary, whose entries are typically keyed by host and
+# serial device.
+#
+
+
+
+import json
+import os
+import socket
+
+
+
+class McuCache:
+
+    # Cache directory. It can be overridden with the environment variable
+    # PYMCU_CACHE_DIR.
+    cacheDir            = os.environ.get("PYMCU_CACHE_DIR",
+                                         os.path.join(os.path.expanduser("~"), ".cache", "pyMcu"))
+
+    # Message prefixes and separators.
+    prefixWarning = "WARNING: {0:s}: ".format(__file__)
+    prefixDebug = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+
+
+    # Initialize the cache file with the given name.
+    def __init__(self, cacheName):
+        self.fileName = os.path.join(self.cacheDir, cacheName + ".json")
+
+
+
+    # Get the cache key for a serial device on this host.
+    @classmethod
+    def key_device(cls, port):
+        return "{0:s}:{1:s}".format(socket.gethostname(), port)
+
+
+
+    # Load all entries of the cache file. Return an empty dictionary if the
+    # file does not exist or is invalid.
+    def load(self):
+        try:
+            with open(self.fileName, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(self.prefixWarning + "Ignoring invalid cache file `{0:s}': {1:s}".format(self.fileName, str(e)))
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return data
+
+
+
+    # Get an entry of the cache file.
+    def get(self, key, default=None):
+        return self.load().get(key, default)
+
+
+
+    # Store all entries of the cache file. The file is replaced atomically, so
+    # that concurrent readers never see a partially written file.
+    def store(self, data):
+        fileNameTmp = "{0:s}.{1:d}.tmp".format(self.fileName, os.getpid())
+        try:
+            os.makedirs(self.cacheDir, exist_ok=True)
+            with open(fileNameTmp, "w") as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+            os.replace(fileNameTmp, self.fileName)
+        except Exception as e:
+            print(self.prefixWarning + "Cannot write cache file `{0:s}': {1:s}".format(self.fileName, str(e)))
+            return -1
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Updated cache file `{0:s}'.".format(self.fileName))
+        return 0
+
+
+
+    # Set an entry of the cache file.
+    def set(self, key, value):
+        data = self.load()
+        data[key] = value
+        return self.store(data)
+
+
+
+    # Delete an entry of the cache file.
+    def delete(self, key):
+        data = self.load()
+        if key not in data:
+            return 0
+        del data[key]
+        return self.store(data)
@@ -0,0 +1,130 @@
+# File: McuCapture.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class for capturing the communication with the TM4C1290NCPDT MCU to
+# a compact append-only binary file. Every MCU command is stored together with
+# the raw bytes of its response and its timing. The capture file can be
+# replayed with the McuReplay class.
+#
+# File format: The file starts with the magic string `capMagic'. It is
+# followed by records, each consisting of a header `capRecHeader' and the
+# command and the raw response data:
+# - Record type (1 byte): see recTypeXxx.
+# - Timestamp (8 bytes, double): time when the command was sent (UNIX time).
+# - Duration (8 bytes, double): time until the response was complete.
+# - Command length (2 bytes).
+# - Response length (4 bytes).
+# - Command (utf-8).
+# - Raw response data as received from the MCU.
+#
+
+
+
+import struct
+import time
+
+
+
+class McuCapture:
+
+    # Capture file parameters.
+    capMagic            = b"MCUCAP01"
+    capRecHeader        = struct.Struct("<BddHI")
+    recTypeSession      = ord('S')      # Start of a capture session. Command: port name.
+    recTypeResponse     = ord('R')      # Complete MCU response.
+    recTypeTimeout      = ord('T')      # Incomplete MCU response. Data: bytes received before the timeout.
+
+    # Message prefixes and separators.
+    prefixError = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+
+
+    # Initialize the capture.
+    def __init__(self):
+        self.fileName = None
+        self.file = None
+        self.recordCount = 0
+
+
+
+    # Open the capture file for appending and start a new capture session.
+    def open(self, fileName, port):
+        try:
+            self.file = open(fileName, "ab", buffering=0)
+            if self.file.tell() == 0:
+                self.file.write(self.capMagic)
+        except Exception as e:
+            print(self.prefixError + "Error opening capture file `{0:s}': {1:s}".format(fileName, str(e)))
+            self.file = None
+            return -1
+        self.fileName = fileName
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Capturing MCU communication to file `{0:s}'.".format(fileName))
+        self.write(self.recTypeSession, time.time(), 0, str(port), b"")
+        return 0
+
+
+
+    # Close the capture file.
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+        return 0
+
+
+
+    # Append a record to the capture file. Each record is written with a
+    # single system call, so that a crash leaves at most one truncated record.
+    def write(self, recType, timestamp, duration, cmd, raw):
+        if not self.file:
+            return -1
+        cmd = cmd.encode('utf-8')
+        self.file.write(self.capRecHeader.pack(recType, timestamp, duration, len(cmd), len(raw)) + cmd + raw)
+        self.recordCount += 1
+        return 0
+
+
+
+    # Record a complete MCU response.
+    def record_response(self, cmd, timestamp, duration, raw):
+        return self.write(self.recTypeResponse, timestamp, duration, cmd, raw)
+
+
+
+    # Record an incomplete MCU response.
+    def record_timeout(self, cmd, timestamp, duration, raw):
+        return self.write(self.recTypeTimeout, timestamp, duration, cmd, raw)
+
+
+
+    # Read all records from a capture file. Return a list of tuples
+    # (record type, timestamp, duration, command, raw response data) or None
+    # if the file is not a valid capture file. A truncated record at the end of
+    # the file is ignored.
+    @classmethod
+    def read_records(cls, fileName):
+        with open(fileName, "rb") as f:
+            data = f.read()
+        if not data.startswith(cls.capMagic):
+            return None
+        records = []
+        pos = len(cls.capMagic)
+        while pos + cls.capRecHeader.size <= len(data):
+            recType, timestamp, duration, cmdLen, rawLen = cls.capRecHeader.unpack_from(data, pos)
+            pos += cls.capRecHeader.size
+            if pos + cmdLen + rawLen > len(data):
+                break
+            cmd = data[pos:pos + cmdLen].decode('utf-8', errors='replace')
+            pos += cmdLen
+            raw = data[pos:pos + rawLen]
+            pos += rawLen
+            records.append((recType, timestamp, duration, cmd, raw))
+        return records
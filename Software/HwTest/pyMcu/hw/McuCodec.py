@@ -0,0 +1,70 @@
+# File: McuCodec.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class for encoding data bytes to the hex tokens of the MCU commands,
+# e.g. ` 0x12 0x34', and for decoding the hex data of the MCU responses, e.g.
+# `Data: 0x12 0x34'. It is shared by all MCU peripheral classes.
+#
+
+
+
+import re
+
+
+
+class McuCodec:
+
+    # Hex token of each byte value, as used in the MCU commands.
+    codecTokens         = [" 0x{0:02x}".format(i) for i in range(256)]
+    codecDelimiterBlock = ","
+    codecHexPrefix      = b"0x"
+    codecHexRe          = re.compile(rb"0x([0-9a-fA-F]+)")
+
+
+
+    # Encode data bytes to hex tokens. Values are truncated to 8 bits.
+    @classmethod
+    def encode(cls, data):
+        try:
+            # Negative values down to -256 map to the correct tokens as well.
+            return "".join(map(cls.codecTokens.__getitem__, data))
+        except (IndexError, TypeError):
+            return "".join([cls.codecTokens[int(datum) & 0xff] for datum in data])
+
+
+
+    # Encode blocks of data bytes to hex tokens. Each block is terminated by
+    # the block delimiter.
+    @classmethod
+    def encode_blocks(cls, blocks):
+        return "".join([cls.encode(block) + cls.codecDelimiterBlock for block in blocks])
+
+
+
+    # Decode the hex tokens between the positions start and end of the raw
+    # data of an MCU response to bytes.
+    @classmethod
+    def decode(cls, raw, start=0, end=None):
+        if end is None:
+            end = len(raw)
+        try:
+            # Fast path: all tokens have two hex digits, which is what the
+            # firmware sends.
+            return bytes.fromhex(raw[start:end].replace(cls.codecHexPrefix, b"").decode('ascii'))
+        except ValueError:
+            return bytes([int(i, 16) & 0xff for i in cls.codecHexRe.findall(raw, start, end)])
+
+
+
+    # Decode the hex tokens following a mark, e.g. b"Data:", between the
+    # positions start and end of the raw data of an MCU response to bytes.
+    # Return None if the mark is not found.
+    @classmethod
+    def decode_after(cls, raw, start, end, mark):
+        pos = raw.find(mark, start, end)
+        if pos < 0:
+            return None
+        return cls.decode(raw, pos + len(mark), end)
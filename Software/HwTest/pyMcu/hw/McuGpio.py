@@ -2,13 +2,14 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 15 Jun 2020
-# Rev.: 15 Jun 2020
+# Rev.: 17 Oct 2026
 #
 # Python class for setting and rading the GPIO pins of a given type.
 #
 
 
 
+import McuCodec
 import McuSerial
 
 
@@ -114,10 +115,9 @@ class McuGpio:
                 print(self.mcuSer.get_full())
             return ret, 0
         # Get and parse response from MCU.
-        hwMarkData = self.hwMarkDataPatternRead.format(gpioType)
-        dataStr = self.mcuSer.get()
-        dataPos = dataStr.find(hwMarkData)
-        if dataPos < 0:
+        hwMarkData = self.hwMarkDataPatternRead.format(gpioType).encode()
+        data = McuCodec.McuCodec.decode_after(*self.mcuSer.get_raw(), hwMarkData)
+        if data is None:
             self.errorCount += 1
             print(self.prefixError + "Error parsing data read from the GPIO {0:s}!".format(gpioType))
             if self.debugLevel >= 1:
@@ -125,11 +125,6 @@ class McuGpio:
                 print(self.prefixError + "Response from MCU:")
                 print(self.mcuSer.get_full())
             return -1, 0
-        # Get sub-string containing the data. Add the length of hwMarkData to
-        # point beyond the data mark.
-        dataStr = dataStr[dataPos+len(hwMarkData):].strip()
-        # Convert data string to list of data bytes.
-        data = [int(i, 0) for i in filter(None, dataStr.split(" "))]
         if self.debugLevel >= 2:
             print(self.prefixDebug + "Data read:", end='')
             for datum in data:
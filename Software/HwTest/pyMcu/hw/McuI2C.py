@@ -2,13 +2,14 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 28 Mar 2020
-# Rev.: 24 Jun 2026
+# Rev.: 17 Oct 2026
 #
 # Python class for using the I2C ports of the TM4C1290NCPDT MCU.
 #
 
 
 
+import McuCodec
 import McuSerial
 
 
@@ -27,6 +28,12 @@ class McuI2C:
     # Hardware parameters.
     hwMarkData          = "Data:"
     hwMarkDevAdr        = "I2C device(s) found at slave address:"
+    hwMarkDataRaw       = hwMarkData.encode()
+    hwMarkDevAdrRaw     = hwMarkDevAdr.encode()
+    hwReadCntMax        = 32        # Maximum number of bytes per read access (size of the I2C data buffer
+                                    # of the MCU firmware).
+    hwCmdLenMax         = 255       # Maximum length of an MCU command (size of the UART command buffer
+                                    # of the MCU firmware without the terminating zero).
 
 
 
@@ -57,6 +64,9 @@ class McuI2C:
         ret = self.mcuSer.eval()
         if ret:
             self.errorCount += 1
+            # A failed access may leave the devices on the bus in an unknown
+            # state.
+            self.ms_invalidate()
             print(self.prefixError + "Error sending command to the I2C master port {0:d}!".format(self.port))
             if self.debugLevel >= 1:
                 print(self.prefixError + "Command sent to MCU: " + cmd)
@@ -84,6 +94,32 @@ class McuI2C:
 
 
 
+    # Get the latency histograms and counters of the MCU commands sent to the
+    # I2C master port, per slave address.
+    def get_stats(self):
+        return self.mcuSer.stats.snapshot_i2c(self.port)
+
+
+
+    # Invalidate the device states cached for this I2C master port, e.g. the
+    # channels of the I2C multiplexers.
+    def ms_invalidate(self):
+        self.mcuSer.i2cBusGeneration[self.port] = self.mcuSer.i2cBusGeneration.get(self.port, 0) + 1
+
+
+
+    # Get the generation of the device states cached for this I2C master port.
+    # It changes whenever the cached states become invalid, i.e. on errors, on
+    # a bus reset, when the power of the board is changed, when the link to
+    # the MCU is resynchronized after a timeout and when other clients of the
+    # MCU command broker may have accessed the MCU (see
+    # McuSerial.broker_generation).
+    def ms_generation(self):
+        return self.mcuSer.powerGeneration, self.mcuSer.linkGeneration, self.mcuSer.broker_generation(), \
+            self.mcuSer.i2cBusGeneration.get(self.port, 0)
+
+
+
     # Write data to the I2C master port.
     def ms_write(self, slaveAddr, data):
         return self.ms_write_adv(slaveAddr, data, False, True)
@@ -99,9 +135,7 @@ class McuI2C:
                 print(self.prefixError + "At least one data byte must be provided!")
             return -1
         accMode = 0x00 | (0x02 if repeatedStart else 0) | (0x04 if not stop else 0)
-        cmd = "i2c {0:d} 0x{1:02x} 0x{2:01x}".format(self.port, slaveAddr & 0x7f, accMode)
-        for datum in data:
-            cmd += " 0x{0:02x}".format(datum & 0xff)
+        cmd = self.ms_cmd_write_adv(slaveAddr, data, repeatedStart, stop)
         if self.debugLevel >= 2:
             print(self.prefixDebug + "Writing data to the I2C master port {0:d}.".format(self.port), end='')
             print(self.separatorDetails + "Slave address: 0x{0:02x}".format(slaveAddr), end='')
@@ -126,11 +160,7 @@ class McuI2C:
             if self.debugLevel >= 1:
                 print(self.prefixError + "At least one data byte must be provided!")
             return -1
-        cmd = "i2c-bw {0:d} 0x{1:02x}".format(self.port, slaveAddr & 0x7f)
-        for block in burstDataWr:
-            for datum in block:
-                cmd += " 0x{0:02x}".format(datum & 0xff)
-            cmd += ","
+        cmd = self.ms_cmd_write_burst(slaveAddr, burstDataWr)
         if self.debugLevel >= 2:
             print(self.prefixDebug + "Writing data to the I2C master port {0:d} in burst mode.".format(self.port), end='')
             print(self.separatorDetails + "Slave address: 0x{0:02x}".format(slaveAddr), end='')
@@ -165,7 +195,7 @@ class McuI2C:
                 print(self.prefixError + "At least one data byte must be read!")
             return -1, []
         accMode = 0x01 | (0x02 if repeatedStart else 0) | (0x04 if not stop else 0)
-        cmd = "i2c {0:d} 0x{1:02x} 0x{2:01x} {3:d}".format(self.port, slaveAddr & 0x7f, accMode, cnt)
+        cmd = self.ms_cmd_read_adv(slaveAddr, cnt, repeatedStart, stop)
         if self.debugLevel >= 2:
             print(self.prefixDebug + "Reading data from the I2C master port {0:d}.".format(self.port), end='')
             print(self.separatorDetails + "Slave address: 0x{0:02x}".format(slaveAddr), end='')
@@ -175,10 +205,9 @@ class McuI2C:
         ret = self.ms_send_cmd(cmd)
         if ret:
             return ret, []
-        # Get and parse response from MCU.
-        dataStr = self.mcuSer.get()
-        dataPos = dataStr.find(self.hwMarkData)
-        if dataPos < 0:
+        # Parse the response from the MCU straight from the receive buffer.
+        data = self.ms_parse_read_data_raw(*self.mcuSer.get_raw())
+        if data is None:
             self.errorCount += 1
             print(self.prefixError + "Error parsing data read from the I2C master port {0:d}!".format(self.port))
             if self.debugLevel >= 1:
@@ -186,11 +215,6 @@ class McuI2C:
                 print(self.prefixError + "Response from MCU:")
                 print(self.mcuSer.get_full())
             return -1, []
-        # Get sub-string containing the data. Add the length of hwMarkData to
-        # point beyond the data mark.
-        dataStr = dataStr[dataPos+len(self.hwMarkData):].strip()
-        # Convert data string to list of data bytes.
-        data = [int(i, 0) for i in filter(None, dataStr.split(" "))]
         if self.debugLevel >= 2:
             print(self.prefixDebug + "Data read:", end='')
             for datum in data:
@@ -202,6 +226,44 @@ class McuI2C:
 
 
 
+    # Build the MCU command for writing data to the I2C master port.
+    def ms_cmd_write_adv(self, slaveAddr, data, repeatedStart, stop):
+        accMode = 0x00 | (0x02 if repeatedStart else 0) | (0x04 if not stop else 0)
+        return "i2c {0:d} 0x{1:02x} 0x{2:01x}".format(self.port, slaveAddr & 0x7f, accMode) + McuCodec.McuCodec.encode(data)
+
+
+
+    # Build the MCU command for writing data to the I2C master port in burst mode.
+    def ms_cmd_write_burst(self, slaveAddr, burstDataWr):
+        return "i2c-bw {0:d} 0x{1:02x}".format(self.port, slaveAddr & 0x7f) + McuCodec.McuCodec.encode_blocks(burstDataWr)
+
+
+
+    # Build the MCU command for reading data from the I2C master port.
+    def ms_cmd_read_adv(self, slaveAddr, cnt, repeatedStart, stop):
+        accMode = 0x01 | (0x02 if repeatedStart else 0) | (0x04 if not stop else 0)
+        return "i2c {0:d} 0x{1:02x} 0x{2:01x} {3:d}".format(self.port, slaveAddr & 0x7f, accMode, cnt)
+
+
+
+    # Parse the data read from the I2C master port out of the MCU response
+    # without the status. Return None if the response contains no data.
+    @classmethod
+    def ms_parse_read_data(cls, dataStr):
+        raw = dataStr.encode('utf-8')
+        return cls.ms_parse_read_data_raw(raw, 0, len(raw))
+
+
+
+    # Parse the data read from the I2C master port out of the raw data of the
+    # MCU response between the positions start and end without copying it.
+    # Return None if the response contains no data.
+    @classmethod
+    def ms_parse_read_data_raw(cls, raw, start, end):
+        return McuCodec.McuCodec.decode_after(raw, start, end, cls.hwMarkDataRaw)
+
+
+
     # Send a quick command.
     def ms_quick_cmd(self, slaveAddr, read):
         return self.ms_quick_cmd_adv(slaveAddr, read, False)
@@ -233,18 +295,13 @@ class McuI2C:
         if self.debugLevel >= 2:
             print(self.prefixDebug + "Detecting devices on I2C master port {0:d}.".format(self.port), end='')
             print()
-        # Temporarily increase the timeout of the serial device.
-        serTimeoutBackup = self.mcuSer.ser.timeout
-        self.mcuSer.ser.timeout = 0.01
         self.ms_send_cmd(cmd)
-        self.mcuSer.ser.timeout = serTimeoutBackup
         ret = self.mcuSer.eval()
         if ret:
             return ret, []
-        # Get and parse response from MCU.
-        devAdrStr = self.mcuSer.get()
-        devAdrPos = devAdrStr.find(self.hwMarkDevAdr)
-        if devAdrPos < 0:
+        # Parse the response from the MCU straight from the receive buffer.
+        devAdr = McuCodec.McuCodec.decode_after(*self.mcuSer.get_raw(), self.hwMarkDevAdrRaw)
+        if devAdr is None:
             self.errorCount += 1
             print(self.prefixError + "Error parsing device addresses while detecting I2C devices on the I2C master port {0:d}!".format(self.port))
             if self.debugLevel >= 1:
@@ -252,11 +309,6 @@ class McuI2C:
                 print(self.prefixError + "Response from MCU:")
                 print(self.mcuSer.get_full())
             return -1, []
-        # Get sub-string containing the data. Add the length of hwMarkDevAdr to
-        # point beyond the data mark.
-        devAdrStr = devAdrStr[devAdrPos+len(self.hwMarkDevAdr):].strip()
-        # Convert device address string to list of address bytes.
-        devAdr = [int(i, 0) for i in filter(None, devAdrStr.split(" "))]
         if self.debugLevel >= 2:
             print(self.prefixDebug + "I2C device{0:s} found at slave address:".format('' if len(devAdr) == 1 else 's'), end='')
             for adr in devAdr:
@@ -278,6 +330,7 @@ class McuI2C:
             print()
         # Send command.
         self.mcuSer.send(cmd)
+        self.ms_invalidate()
         # Debug: Show response.
         if self.debugLevel >= 3:
             print(self.prefixDebug + "Response from MCU:")
@@ -0,0 +1,159 @@
+# File: McuI2CAsync.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class for using the I2C ports of the TM4C1290NCPDT MCU with asyncio.
+#
+
+
+
+import McuI2C
+import McuSerialAsync
+
+
+
+class McuI2CAsync:
+
+    # Message prefixes and separators.
+    prefixDetails       = " - "
+    separatorDetails    = " - "
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+
+
+    # Initialize the I2C port of the MCU. The MCU commands are built and the
+    # MCU responses are parsed by an McuI2C object.
+    def __init__(self, mcuSerAsync, port):
+        self.port = port
+        self.mcuSerAsync = mcuSerAsync
+        self.mcuI2C = McuI2C.McuI2C(mcuSerAsync.mcuSer, port)
+        self.errorCount = 0
+        self.accessRead = 0
+        self.accessWrite = 0
+        self.bytesRead = 0
+        self.bytesWritten = 0
+
+
+
+    # Send an I2C command to the MCU. The caller must have exclusive access to
+    # the serial port.
+    async def ms_send_cmd(self, cmd):
+        # Debug: Show command.
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Sending command to the I2C master port {0:d}: ".format(self.port) + cmd)
+        # Send command.
+        await self.mcuSerAsync.send(cmd)
+        # Debug: Show response.
+        if self.debugLevel >= 3:
+            print(self.prefixDebug + "Response from MCU:")
+            print(await self.mcuSerAsync.get_full())
+        # Evaluate response.
+        ret = await self.mcuSerAsync.eval()
+        if ret:
+            self.errorCount += 1
+            self.mcuI2C.ms_invalidate()
+            print(self.prefixError + "Error sending command to the I2C master port {0:d}!".format(self.port))
+            if self.debugLevel >= 1:
+                print(self.prefixError + "Command sent to MCU: " + cmd)
+                print(self.prefixError + "Response from MCU:")
+                print(await self.mcuSerAsync.get_full())
+            return ret
+        return 0
+
+
+
+    # Print details.
+    def print_details(self):
+        print(self.prefixDetails, end='')
+        print("I2C master port: {0:d}".format(self.port), end='')
+        if self.debugLevel >= 1:
+            print(self.separatorDetails + "Error count: {0:d}".format(self.errorCount), end='')
+        if self.debugLevel >= 1:
+            print(self.separatorDetails + "Read access count: {0:d}".format(self.accessRead), end='')
+            print(self.separatorDetails + "Write access count: {0:d}".format(self.accessWrite), end='')
+        if self.debugLevel >= 1:
+            print(self.separatorDetails + "Bytes read: {0:d}".format(self.bytesRead), end='')
+            print(self.separatorDetails + "Bytes written: {0:d}".format(self.bytesWritten), end='')
+        print()
+        return 0
+
+
+
+    # Write data to the I2C master port.
+    async def ms_write(self, slaveAddr, data):
+        return await self.ms_write_adv(slaveAddr, data, False, True)
+
+
+
+    # Write data to the I2C master port (advanced).
+    async def ms_write_adv(self, slaveAddr, data, repeatedStart, stop):
+        if len(data) < 1:
+            # Do not increase the error counter here!
+            print(self.prefixError + "Error writing to the I2C master port {0:d}!".format(self.port))
+            if self.debugLevel >= 1:
+                print(self.prefixError + "At least one data byte must be provided!")
+            return -1
+        cmd = self.mcuI2C.ms_cmd_write_adv(slaveAddr, data, repeatedStart, stop)
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Writing data to the I2C master port {0:d}.".format(self.port), end='')
+            print(self.separatorDetails + "Slave address: 0x{0:02x}".format(slaveAddr), end='')
+            print(self.separatorDetails + "Command: " + cmd)
+        # Send command.
+        async with self.mcuSerAsync.exclusive():
+            ret = await self.ms_send_cmd(cmd)
+        self.accessWrite += 1
+        self.bytesWritten += len(data)
+        return ret
+
+
+
+    # Read data from the I2C master port.
+    async def ms_read(self, slaveAddr, cnt):
+        return await self.ms_read_adv(slaveAddr, cnt, False, True)
+
+
+
+    # Read data from the I2C master port (advanced).
+    async def ms_read_adv(self, slaveAddr, cnt, repeatedStart, stop):
+        if cnt < 1:
+            # Do not increase the error counter here!
+            print(self.prefixError + "Error reading from the I2C master port {0:d}!".format(self.port))
+            if self.debugLevel >= 1:
+                print(self.prefixError + "At least one data byte must be read!")
+            return -1, []
+        cmd = self.mcuI2C.ms_cmd_read_adv(slaveAddr, cnt, repeatedStart, stop)
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Reading data from the I2C master port {0:d}.".format(self.port), end='')
+            print(self.separatorDetails + "Slave address: 0x{0:02x}".format(slaveAddr), end='')
+            print(self.separatorDetails + "Command: " + cmd)
+        # Send command and get the response before another task can use the
+        # serial port.
+        async with self.mcuSerAsync.exclusive():
+            ret = await self.ms_send_cmd(cmd)
+            if ret:
+                return ret, []
+            raw, start, end = self.mcuSerAsync.mcuSer.get_raw()
+        # Parse response from MCU.
+        data = self.mcuI2C.ms_parse_read_data_raw(raw, start, end)
+        if data is None:
+            self.errorCount += 1
+            print(self.prefixError + "Error parsing data read from the I2C master port {0:d}!".format(self.port))
+            if self.debugLevel >= 1:
+                print(self.prefixError + "Command sent to MCU: " + cmd)
+                print(self.prefixError + "Response from MCU:")
+                print(self.mcuSerAsync.mcuSer.rx_parse(raw).rstrip('\n\r'))
+            return -1, []
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Data read:", end='')
+            for datum in data:
+                print(" 0x{0:02x}".format(datum), end='')
+            print()
+        self.accessRead += 1
+        self.bytesRead += len(data)
+        return 0, data
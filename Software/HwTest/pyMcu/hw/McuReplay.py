@@ -0,0 +1,193 @@
+# File: McuReplay.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class replaying the MCU responses recorded in a capture file (see
+# McuCapture class). It provides the subset of the pySerial interface used by
+# the McuSerial class, so that the McuSerial class can use it as its
+# transport. Use a port name of the form `replay:<capture file>' to serve the
+# responses as fast as possible or `replay-timed:<capture file>' to serve them
+# with the original timing.
+#
+
+
+
+import time
+import McuCapture
+
+
+
+class McuReplay:
+
+    # Port names starting with these prefixes select the replay.
+    replayPortPrefix        = "replay:"
+    replayTimedPortPrefix   = "replay-timed:"
+    # MCU response if no recorded response matches a command.
+    replayResponseMissing   = "ERROR: No recorded response for this command in the capture file."
+
+    # Message prefixes and separators.
+    prefixWarning = "WARNING: {0:s}: ".format(__file__)
+    prefixError = "ERROR: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+
+
+    # Initialize the replay.
+    def __init__(self):
+        self.port = None
+        self.portstr = None
+        self.timed = False
+        self.records = []
+        self.recordIdx = 0
+        self.txData = bytearray()       # Command being written.
+        self.rxData = bytearray()       # Response data ready to be read.
+        self.rxPending = []             # Response data not yet ready: [(ready time, data)].
+        self.mismatchCount = 0
+        # Serial port parameters. They are kept only for compatibility with
+        # pySerial.
+        self.baudrate = 115200
+        self.bytesize = 8
+        self.parity = 'N'
+        self.stopbits = 1
+        self.timeout = None
+        self.writeTimeout = None
+        self.xonxoff = False
+        self.rtscts = False
+        self.dsrdtr = False
+
+
+
+    # Check if the port name selects the replay.
+    @classmethod
+    def is_replay_port(cls, port):
+        return bool(port) and (port.startswith(cls.replayPortPrefix) or port.startswith(cls.replayTimedPortPrefix))
+
+
+
+    # Load the capture file.
+    def open(self, port=None):
+        if port:
+            self.port = port
+        self.portstr = self.port
+        if self.port.startswith(self.replayTimedPortPrefix):
+            self.timed = True
+            fileName = self.port[len(self.replayTimedPortPrefix):]
+        else:
+            self.timed = False
+            fileName = self.port[len(self.replayPortPrefix):]
+        records = McuCapture.McuCapture.read_records(fileName)
+        if records is None:
+            raise ValueError("File `{0:s}' is not an MCU capture file.".format(fileName))
+        self.records = [rec for rec in records if rec[0] != McuCapture.McuCapture.recTypeSession]
+        self.recordIdx = 0
+
+
+
+    # Nothing to close.
+    def close(self):
+        pass
+
+
+
+    # Find the next recorded response to a command. If the command does not
+    # match the next record, search the remaining records for it.
+    def find_record(self, cmd):
+        for i in range(self.recordIdx, len(self.records)):
+            if self.records[i][3] == cmd:
+                if i != self.recordIdx:
+                    self.mismatchCount += 1
+                    if self.debugLevel >= 1:
+                        print(self.prefixWarning + "Skipping {0:d} recorded command(s) to replay `{1:s}'.".\
+                            format(i - self.recordIdx, cmd))
+                self.recordIdx = i + 1
+                return self.records[i]
+        self.mismatchCount += 1
+        print(self.prefixError + "No recorded response for command `{0:s}'.".format(cmd))
+        return None
+
+
+
+    # Move the responses which are ready to the receive data.
+    def rx_update(self):
+        now = time.monotonic()
+        while self.rxPending and self.rxPending[0][0] <= now:
+            self.rxData += self.rxPending.pop(0)[1]
+
+
+
+    # Number of bytes available for reading.
+    @property
+    def in_waiting(self):
+        self.rx_update()
+        return len(self.rxData)
+
+
+
+    # Write data. Each complete command is answered with its recorded response.
+    def write(self, data):
+        self.txData += data
+        while True:
+            pos = self.txData.find(b"\r")
+            if pos < 0:
+                break
+            cmd = self.txData[:pos].decode('utf-8', errors='replace')
+            del self.txData[:pos + 1]
+            record = self.find_record(cmd)
+            if record is None:
+                raw = (cmd + "\r\r\n" + self.replayResponseMissing + "\r\n> ").encode('utf-8')
+                duration = 0
+            else:
+                raw = record[4]
+                duration = record[2]
+            if self.timed:
+                # The MCU executes the commands one after the other, so a
+                # command starts only after the previous one has finished.
+                timeStart = time.monotonic()
+                if self.rxPending:
+                    timeStart = max(timeStart, self.rxPending[-1][0])
+                timeReady = timeStart + duration
+                self.rxPending.append((timeReady, raw))
+            else:
+                self.rxData += raw
+        return len(data)
+
+
+
+    # Data is served from memory, so there is nothing to flush.
+    def flush(self):
+        pass
+
+
+
+    # Read up to size bytes. Wait at most timeout seconds for data to arrive.
+    def read(self, size=1):
+        self.rx_update()
+        if not self.rxData and self.rxPending:
+            timeWait = self.rxPending[0][0] - time.monotonic()
+            if self.timeout is not None:
+                timeWait = min(timeWait, self.timeout)
+            if timeWait > 0:
+                time.sleep(timeWait)
+            self.rx_update()
+        elif not self.rxData and self.timeout:
+            # A recorded timeout: no more data will arrive.
+            time.sleep(self.timeout)
+        data = bytes(self.rxData[:size])
+        del self.rxData[:size]
+        return data
+
+
+
+    # Read a line.
+    def readline(self):
+        line = b""
+        while not line.endswith(b"\n"):
+            data = self.read(1)
+            if not data:
+                break
+            line += data
+        return line
@@ -2,16 +2,34 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 24 Apr 2020
-# Rev.: 06 Apr 2023
+# Rev.: 17 Oct 2026
 #
 # Python class for communicating with the TM4C1290NCPDT MCU over a serial port
-# (UART).
+# (UART). Alternatively, the MCU can be accessed through the MCU command broker
+# (pyMcuBroker.py) by using a port name of the form `unix:<broker socket>'.
+# Sequences of commands which must not be interleaved with the commands of
+# other broker clients are grouped with exclusive.
+# The communication can be captured to a file with capture_start and replayed
+# later by using a port name of the form `replay:<capture file>' (see McuReplay
+# class).
+# The response timeouts are calibrated per command class from the measured
+# latencies of the serial link. They are persisted per host and serial device
+# (see McuCache class) and adapted at runtime.
 #
 
 
 
+import atexit
+import contextlib
+import select
 import sys
+import time
 import serial
+import McuBrokerClient
+import McuCache
+import McuCapture
+import McuReplay
+import McuStats
 
 
 
@@ -19,8 +37,35 @@ class McuSerial:
 
     # MCU-specific variables and parameters.
     mcuCmdPrompt = "> "
-    mcuReadLineMax          = 100
-    mcuResponse             = ""
+    mcuCmdPromptEnd         = b"\n> "      # End of a response: line break followed by the prompt.
+    mcuResponseTimeout      = 5.0           # Maximum time in seconds to wait for the prompt after a command.
+                                            # Used for commands without calibrated timeout.
+    mcuResponseTimeoutMin   = 0.1           # Minimum calibrated response timeout in seconds.
+    mcuTimeoutFactor        = 3.0           # Safety factor applied to the expected latency of a command.
+    mcuTimeoutDevFactor     = 4.0           # Weight of the latency deviation in the expected latency.
+    mcuTimeoutGainMean      = 0.125         # Gain of the moving average of the latency.
+    mcuTimeoutGainDev       = 0.25          # Gain of the moving average of the latency deviation.
+    mcuTimeoutCalibrate     = True          # Calibrate the timeouts when opening an uncalibrated serial port.
+    mcuTimeoutCalibrateCnt  = 8             # Number of commands sent per calibration measurement.
+    mcuTimeoutCache         = "timeouts"    # Name of the cache file for the calibrated timeouts.
+    timeoutSaveSerials      = []            # Serial ports whose calibrated timeouts are saved at exit.
+    timeoutSaveRegistered   = False         # The exit handler saving the timeouts is registered.
+    # Nominal execution time in seconds of the MCU command classes with
+    # calibrated timeouts, not including the transmission over the UART. All
+    # other commands, e.g. `power' and `delay', use mcuResponseTimeout.
+    mcuCmdExecTime          = {"help": 0.0, "info": 0.0, "gpio": 0.0, "i2c": 0.005, "i2c-bw": 0.05, "i2c-det": 0.1,
+                               "temp-a": 0.005, "uart": 0.005, "uart-s": 0.001}
+    mcuCmdBytesTypical      = 64            # Typical number of bytes transferred per MCU command.
+    mcuClearIdleBytes       = 32            # The serial port is considered idle after this number of byte times.
+    mcuPipelineDepth        = 8             # Maximum number of outstanding commands in pipelined mode.
+    mcuRxFifoSize           = 16            # Size of the UART RX FIFO of the MCU. The MCU firmware does not
+                                            # buffer the UART input, so while it executes a command, the
+                                            # following commands must fit into this FIFO.
+    # MCU commands changing the power of the board, given by their verb and
+    # GPIO type. Setting them invalidates the device states cached by the
+    # pyMcu classes, e.g. the channels of the I2C multiplexers.
+    mcuCmdPowerVerbs        = ["power"]
+    mcuCmdPowerGpioTypes    = ["power", "reserved", "reset"]
     mcuResponseOk           = "OK"
     mcuResponseWarning      = "WARNING"
     mcuResponseError        = "ERROR"
@@ -30,6 +75,12 @@ class McuSerial:
     mcuResponseCodeError    = 2
     mcuResponseCodeFatal    = 3
     mcuResponseCodeUnknown  = -1
+    mcuResponseWhitespace   = b" \t\r\n"
+    # Status prefixes of the raw MCU responses and their response codes.
+    mcuResponseStatusRaw    = [(mcuResponseOk.encode(), mcuResponseCodeOk),
+                               (mcuResponseWarning.encode(), mcuResponseCodeWarning),
+                               (mcuResponseError.encode(), mcuResponseCodeError),
+                               (mcuResponseFatal.encode(), mcuResponseCodeFatal)]
 
     # Message prefixes and separators.
     prefixDetails       = " - "
@@ -48,14 +99,18 @@ class McuSerial:
 
     # Initialize the serial port for communication with the MCU.
     def __init__(self, port):
-        self.ser = serial.Serial()
+        if McuBrokerClient.McuBrokerClient.is_broker_port(port):
+            self.ser = McuBrokerClient.McuBrokerClient()
+        elif McuReplay.McuReplay.is_replay_port(port):
+            self.ser = McuReplay.McuReplay()
+        else:
+            self.ser = serial.Serial()
         self.ser.port = port
         self.ser.baudrate = 115200
         self.ser.bytesize = serial.EIGHTBITS
         self.ser.parity = serial.PARITY_NONE
         self.ser.stopbits = serial.STOPBITS_ONE
-        #self.ser.timeout = None             # Blocking read.
-        self.ser.timeout = 0.00015          # Non-blocking read. Empiric value based on a Core i7-9700K CPU (min stable value: 0.00013).
+        self.ser.timeout = 0                # Non-blocking read. The receive engine waits for data with select.
         self.ser.xonxoff = False            # Disable software flow control.
         self.ser.rtscts = False             # Disable hardware (RTS/CTS) flow control.
         self.ser.dsrdtr = False             # Disable hardware (DSR/DTR) flow control.
@@ -65,11 +120,49 @@ class McuSerial:
         self.accessWrite = 0
         self.bytesRead = 0
         self.bytesWritten = 0
+        # Receive engine: reusable buffer for raw bytes and raw data of the
+        # last complete MCU response.
+        self.rxBuffer = bytearray()
+        self.rxSelectable = False
+        self.mcuResponseRaw = b""
+        # Last MCU response: The response string is only decoded on demand.
+        # The status code and the position of the payload (response without
+        # the status) inside the raw data are determined once on reception.
+        self.mcuResponseStr = ""
+        self.mcuResponseCode = None
+        self.mcuResponsePayloadStart = 0
+        self.mcuResponsePayloadEnd = 0
+        # Capture of the MCU communication.
+        self.capture = None
+        # Generation counters of the cached device states: one for the power
+        # state of the board, one for the synchronization of the link to the
+        # MCU and one per I2C master port. The device classes compare them to
+        # detect that their cached state became invalid.
+        self.powerGeneration = 0
+        self.linkGeneration = 0
+        self.i2cBusGeneration = {}
+        # Exclusive access to the MCU command broker: nesting depth and
+        # generation of the device states cached while other clients may
+        # have accessed the MCU (see broker_generation).
+        self.brokerPort = McuBrokerClient.McuBrokerClient.is_broker_port(port)
+        self.exclusiveDepth = 0
+        self.brokerGeneration = 0
+        # Latency histograms and counters of the MCU commands.
+        self.stats = McuStats.McuStats()
+        # Response timeouts: link round-trip time, time per byte and latency
+        # estimates per command class (moving average, deviation).
+        self.linkRtt = None
+        self.linkByteTime = 10 / self.ser.baudrate
+        self.timeoutEst = {}
+        # Key of the serial device in the cache files (see McuCache class).
+        self.cacheKey = McuCache.McuCache.key_device(port) if port else None
 
         try:
             if port:
                 self.ser.open()
                 self.simulateHwAccess = False
+                self.rxSelectable = self.rx_check_selectable()
+                self.timeout_init()
             else:
                 self.simulateHwAccess = True
                 if self.debugLevel >= 3:
@@ -92,7 +185,10 @@ class McuSerial:
         print(self.separatorDetails + "Data bytes: {0:d}".format(self.ser.bytesize), end='')
         print(self.separatorDetails + "Parity: " + self.ser.parity, end='')
         print(self.separatorDetails + "Stop bits: {0:d}".format(self.ser.stopbits), end='')
-        print(self.separatorDetails + "Timeout: {0:f}".format(self.ser.timeout), end='')
+        if self.linkRtt is not None:
+            print(self.separatorDetails + "Round-trip time: {0:f}".format(self.linkRtt), end='')
+        print(self.separatorDetails + "Byte time: {0:f}".format(self.linkByteTime), end='')
+        print(self.separatorDetails + "Response timeout: {0:f}".format(self.mcuResponseTimeout), end='')
         if self.debugLevel >= 1:
             print(self.separatorDetails + "Error count: {0:d}".format(self.errorCount), end='')
         if self.debugLevel >= 1:
@@ -115,10 +211,13 @@ class McuSerial:
                 print(self.simulateHwAccessMsg)
             return 0
         try:
-            cnt = 0
-            while cnt < self.mcuReadLineMax:
-                cnt += 1
-                self.ser.readline()
+            # Discard data until the serial port is idle, but at most for the
+            # maximum response time.
+            timeIdle = self.mcuClearIdleBytes * self.linkByteTime
+            timeEnd = time.monotonic() + self.mcuResponseTimeout
+            while self.rx_fill(timeIdle) and time.monotonic() < timeEnd:
+                pass
+            self.rxBuffer.clear()
             return 0
         except Exception as e:
             self.errorCount += 1
@@ -128,6 +227,27 @@ class McuSerial:
 
 
 
+    # Full MCU response including the status. It is decoded from the raw data
+    # when accessed for the first time.
+    @property
+    def mcuResponse(self):
+        if self.mcuResponseStr is None:
+            self.mcuResponseStr = self.rx_parse(self.mcuResponseRaw)
+        return self.mcuResponseStr
+
+
+
+    # Set the MCU response string, e.g. for simulated hardware access.
+    @mcuResponse.setter
+    def mcuResponse(self, response):
+        self.mcuResponseStr = response
+        self.mcuResponseCode = None
+        self.mcuResponseRaw = b""
+        self.mcuResponsePayloadStart = 0
+        self.mcuResponsePayloadEnd = 0
+
+
+
     # Get the full MCU response from the serial port including the status.
     def get_full(self):
         if self.simulateHwAccess:
@@ -143,48 +263,86 @@ class McuSerial:
     def get(self):
         if self.simulateHwAccess:
             return self.simulateHwAccessMsg
-        if self.mcuResponse.find(self.mcuResponseOk, 0, len(self.mcuResponseOk)) == 0:
-            s = self.mcuResponse[len(self.mcuResponseOk) + 1:]
-        elif self.mcuResponse.find(self.mcuResponseWarning, 0, len(self.mcuResponseWarning)) == 0:
-            s = self.mcuResponse[len(self.mcuResponseWarning) + 1:]
-        elif self.mcuResponse.find(self.mcuResponseError, 0, len(self.mcuResponseError)) == 0:
-            s = self.mcuResponse[len(self.mcuResponseError) + 1:]
-        elif self.mcuResponse.find(self.mcuResponseFatal, 0, len(self.mcuResponseFatal)) == 0:
-            s = self.mcuResponse[len(self.mcuResponseFatal) + 1:]
+        if self.mcuResponseCode is None:
+            s = self.get_response(self.mcuResponse)
         else:
-            s = self.mcuResponse
-        # Remove trailing space, newline and carriage return characters.
-        s = s.rstrip(' \n\r')
-        # Remove leading and trailing white spaces.
-        s = s.strip()
+            s = self.mcuResponseRaw[self.mcuResponsePayloadStart:self.mcuResponsePayloadEnd].\
+                decode('utf-8', errors='replace').replace('\r', '')
         if self.debugLevel >= 3:
             print(self.prefixDebug + "MCU response:\n" + s)
         return s
 
 
 
+    # Get the raw data of the MCU response and the start and end positions of
+    # the payload, i.e. the response without the status, inside it. This
+    # allows parsing the payload without copying it.
+    def get_raw(self):
+        if self.mcuResponseCode is None:
+            raw = self.get().encode('utf-8')
+            return raw, 0, len(raw)
+        return self.mcuResponseRaw, self.mcuResponsePayloadStart, self.mcuResponsePayloadEnd
+
+
+
+    # Get a read-only view of the payload of the MCU response without copying
+    # it.
+    def get_view(self):
+        raw, start, end = self.get_raw()
+        return memoryview(raw)[start:end]
+
+
+
+    # Strip the status from an MCU response.
+    @classmethod
+    def get_response(cls, response):
+        if response.find(cls.mcuResponseOk, 0, len(cls.mcuResponseOk)) == 0:
+            s = response[len(cls.mcuResponseOk) + 1:]
+        elif response.find(cls.mcuResponseWarning, 0, len(cls.mcuResponseWarning)) == 0:
+            s = response[len(cls.mcuResponseWarning) + 1:]
+        elif response.find(cls.mcuResponseError, 0, len(cls.mcuResponseError)) == 0:
+            s = response[len(cls.mcuResponseError) + 1:]
+        elif response.find(cls.mcuResponseFatal, 0, len(cls.mcuResponseFatal)) == 0:
+            s = response[len(cls.mcuResponseFatal) + 1:]
+        else:
+            s = response
+        # Remove trailing space, newline and carriage return characters.
+        s = s.rstrip(' \n\r')
+        # Remove leading and trailing white spaces.
+        return s.strip()
+
+
+
     # Evaluate the MCU response.
     def eval(self):
         if self.simulateHwAccess:
             if self.debugLevel >= 3:
                 print(self.simulateHwAccessMsg)
             return self.mcuResponseCodeOk
-        if self.mcuResponse.find(self.mcuResponseOk, 0, len(self.mcuResponseOk)) == 0:
-            ret = self.mcuResponseCodeOk
-        elif self.mcuResponse.find(self.mcuResponseWarning, 0, len(self.mcuResponseWarning)) == 0:
-            ret = self.mcuResponseCodeWarning
-        elif self.mcuResponse.find(self.mcuResponseError, 0, len(self.mcuResponseError)) == 0:
-            ret = self.mcuResponseCodeError
-        elif self.mcuResponse.find(self.mcuResponseFatal, 0, len(self.mcuResponseFatal)) == 0:
-            ret = self.mcuResponseCodeFatal
-        else:
-            ret = self.mcuResponseCodeUnknown
+        ret = self.mcuResponseCode
+        if ret is None:
+            ret = self.eval_response(self.mcuResponse)
         if self.debugLevel >= 3:
             print(self.prefixDebug + "Evaluation of MCU result: {0:d}".format(ret))
         return ret
 
 
 
+    # Get the status code of an MCU response.
+    @classmethod
+    def eval_response(cls, response):
+        if response.find(cls.mcuResponseOk, 0, len(cls.mcuResponseOk)) == 0:
+            return cls.mcuResponseCodeOk
+        elif response.find(cls.mcuResponseWarning, 0, len(cls.mcuResponseWarning)) == 0:
+            return cls.mcuResponseCodeWarning
+        elif response.find(cls.mcuResponseError, 0, len(cls.mcuResponseError)) == 0:
+            return cls.mcuResponseCodeError
+        elif response.find(cls.mcuResponseFatal, 0, len(cls.mcuResponseFatal)) == 0:
+            return cls.mcuResponseCodeFatal
+        return cls.mcuResponseCodeUnknown
+
+
+
     # Send a MCU command to the serial port.
     def send(self, cmd):
         # Clear previous MCU response.
@@ -196,62 +354,540 @@ class McuSerial:
         try:
             if self.debugLevel >= 2:
                 print(self.prefixDebug + "Sending MCU command: " + cmd)
-#            self.ser.write((cmd + "\r").encode('utf-8'))
-#            self.ser.flush()
-            # Work-around for the communication problem seen between the SM SoM and the CM MCU:
-            # - Send the carriage return separately from the command with an
-            #   additional write command and use a flush command after each
-            #   write command.
-            # - This method was empirically found and tested on 03 Apr 2023. It
-            #   improves the reliability of the communication between the SM
-            #   SoM and the CM MCU a lot, but not to 100%.
-            # - The root cause of the problem is unclear.
-            # - This work-around is not necessary when using the front-panel
-            #   UART with a PC.
-            self.ser.write(cmd.encode('utf-8'))
-            self.ser.flush()
-            self.ser.write("\r".encode('utf-8'))
-            self.ser.flush()
+            # Discard data left over from a previous command.
+            self.rxBuffer.clear()
+            timeStart = time.monotonic()
+            self.tx_write(cmd.encode('utf-8') + b"\r")
             self.accessWrite += 1
-            self.bytesWritten += len(cmd) + 1
         except Exception as e:
             self.errorCount += 1
             print(self.prefixError + "Error writing to serial port `" + self.ser.portstr + "': " + str(e))
             return -1
         try:
             self.accessRead += 1
-            # Remove the echo of the command.
-            cnt = 0
-            line = ""
-            serTimeoutBackup = self.ser.timeout
-            # Temporarily set a longer timeout.
-            self.ser.timeout = 0.05
-            while line.find('\n') < 0:
-                cnt += 1
-                line = self.ser.readline().decode('utf-8')
-                self.bytesRead += len(line)
-                if cnt > self.mcuReadLineMax:
-                    break
-            self.ser.timeout = serTimeoutBackup
-            # Read the response of the MCU and check for errors.
-            self.mcuResponse = ""
-            while line != self.mcuCmdPrompt:
-                cnt += 1
-                line = self.ser.readline().decode('utf-8')
-                self.bytesRead += len(line)
-                if line == self.mcuCmdPrompt:
-                    return 0
-                if cnt > self.mcuReadLineMax:
-                    self.errorCount += 1
-                    print(self.prefixError + "Incomplete response received from the MCU!")
-                    return 1
-                if line != "":
-                    self.mcuResponse += line.rstrip('\n\r')
-                    if line.find('\n') > 0:
-                        self.mcuResponse += '\n'
+            # Wait for the prompt, which marks the end of the MCU response.
+            raw = self.rx_receive(self.timeout_get(cmd))
+            self.rx_account(cmd, timeStart, raw)
+            if raw is None:
+                self.errorCount += 1
+                print(self.prefixError + "Incomplete response received from the MCU!")
+                self.rx_resync(timeStart + self.mcuResponseTimeout)
+                return 1
             return 0
         except Exception as e:
             self.errorCount += 1
             print(self.prefixError + "Error reading from serial port `" + self.ser.portstr + "': " + str(e))
             return -1
 
+
+
+    # Send several MCU commands back to back without waiting for the response
+    # to each command before sending the next one. The responses are returned
+    # in the order of the commands. Use eval_response and get_response to
+    # evaluate them.
+    def send_pipelined(self, cmds):
+        responses = []
+        # Clear previous MCU response.
+        self.mcuResponse = ""
+        if self.simulateHwAccess:
+            for cmd in cmds:
+                print(self.simulateHwAccessMsg + " Sending MCU command: " + cmd)
+                responses.append(self.mcuResponseOk + " (simulated hardware access)")
+            if responses:
+                self.mcuResponse = responses[-1]
+            return self.mcuResponseCodeOk, responses
+        txData = [cmd.encode('utf-8') + b"\r" for cmd in cmds]
+        txCmd = 0       # Index of the command being sent.
+        txPos = 0       # Number of bytes already sent of this command.
+        rxCmd = 0       # Index of the oldest command waiting for its response.
+        txTime = []     # Time when each command was sent.
+        txEnd = len(txData)     # Number of commands to send.
+        ret = 0
+        try:
+            # Discard data left over from a previous command.
+            self.rxBuffer.clear()
+            timeResponse = time.monotonic()     # Time of the last response.
+            timeEnd = None
+            while rxCmd < txEnd:
+                # Send as much data as the MCU can take. The oldest outstanding
+                # command is read by the MCU right away. All later commands
+                # wait in the UART RX FIFO of the MCU until it has finished
+                # executing the commands before.
+                if txCmd < txEnd and txCmd - rxCmd < self.mcuPipelineDepth:
+                    size = len(txData[txCmd]) - txPos
+                    if txCmd > rxCmd:
+                        queued = txPos
+                        for i in range(rxCmd + 1, txCmd):
+                            queued += len(txData[i])
+                        size = min(size, self.mcuRxFifoSize - queued)
+                    if size > 0:
+                        self.tx_write(txData[txCmd][txPos:txPos + size])
+                        txPos += size
+                        if txPos == len(txData[txCmd]):
+                            if self.debugLevel >= 2:
+                                print(self.prefixDebug + "Sending MCU command: " + cmds[txCmd])
+                            self.accessWrite += 1
+                            txTime.append(time.monotonic())
+                            txCmd += 1
+                            txPos = 0
+                        continue
+                # Wait for the response to the oldest outstanding command.
+                raw = self.rx_split()
+                if raw is None:
+                    # The MCU starts to execute a command after it has sent
+                    # the response to the previous command and the command was
+                    # sent.
+                    if timeEnd is None and rxCmd < txCmd:
+                        timeEnd = max(txTime[rxCmd], timeResponse) + \
+                            (self.mcuResponseTimeout if ret else self.timeout_get(cmds[rxCmd]))
+                    timeLeft = timeEnd - time.monotonic() if timeEnd is not None else self.mcuResponseTimeout
+                    if timeLeft <= 0:
+                        if ret:
+                            # The outstanding responses did not arrive.
+                            break
+                        self.errorCount += 1
+                        if rxCmd < txCmd:
+                            self.rx_account(cmds[rxCmd], max(txTime[rxCmd], timeResponse), None)
+                        print(self.prefixError + "Incomplete response received from the MCU for command `{0:s}'!".\
+                            format(cmds[rxCmd]))
+                        # Do not send further commands, but complete the
+                        # command being sent and wait for the responses of
+                        # all commands sent, so that they are not taken as
+                        # the responses to the next commands.
+                        ret = 1
+                        txEnd = txCmd + (1 if txPos else 0)
+                        timeEnd = max(txTime[rxCmd], timeResponse) + self.mcuResponseTimeout if rxCmd < txCmd else None
+                        continue
+                    self.rx_fill(timeLeft)
+                    continue
+                if ret:
+                    # Discard the responses after a timeout.
+                    rxCmd += 1
+                    timeResponse = time.monotonic()
+                    timeEnd = None
+                    continue
+                self.accessRead += 1
+                self.rx_account(cmds[rxCmd], max(txTime[rxCmd], timeResponse), raw)
+                responses.append(self.mcuResponse)
+                rxCmd += 1
+                timeResponse = time.monotonic()
+                timeEnd = None
+            if ret:
+                self.rx_resync(time.monotonic(), txCmd - rxCmd)
+            return ret, responses
+        except Exception as e:
+            self.errorCount += 1
+            print(self.prefixError + "Error accessing serial port `" + self.ser.portstr + "': " + str(e))
+            # Consume the responses of all commands sent.
+            try:
+                self.rx_resync(time.monotonic() + self.mcuResponseTimeout, txCmd - rxCmd)
+            except Exception:
+                pass
+            return -1, responses
+
+
+
+    # Get exclusive access to the MCU for a sequence of commands, e.g. an I2C
+    # write without stop condition followed by a read with repeated start, or
+    # setting an I2C multiplexer channel followed by accesses to the devices
+    # behind it. This only has an effect when the MCU is accessed through the
+    # MCU command broker, which then does not execute the commands of other
+    # clients until the sequence is finished. Nested use is allowed.
+    @contextlib.contextmanager
+    def exclusive(self):
+        if self.exclusiveDepth or not self.brokerPort or self.simulateHwAccess:
+            self.exclusiveDepth += 1
+            try:
+                yield
+            finally:
+                self.exclusiveDepth -= 1
+            return
+        self.broker_begin()
+        self.exclusiveDepth = 1
+        try:
+            yield
+        finally:
+            self.exclusiveDepth = 0
+            self.broker_end()
+
+
+
+    # Start a transaction of the MCU command broker. The broker responds with
+    # the number of commands of other clients executed since the last command
+    # of this client. If there are any, the cached device states are
+    # invalidated.
+    def broker_begin(self):
+        cmd = McuBrokerClient.McuBrokerClient.brokerCmdBegin
+        ret = self.send(cmd)
+        if ret or self.eval() != self.mcuResponseCodeOk:
+            self.errorCount += 1
+            print(self.prefixError + "Error starting a transaction of the MCU command broker `{0:s}'!".format(self.ser.port))
+            self.brokerGeneration += 1
+            return -1
+        try:
+            cmdCountOthers = int(self.get())
+        except ValueError:
+            cmdCountOthers = -1
+        if cmdCountOthers:
+            if self.debugLevel >= 2:
+                print(self.prefixDebug + "Other clients of the MCU command broker executed {0:d} command(s).".\
+                    format(cmdCountOthers))
+            self.brokerGeneration += 1
+        return 0
+
+
+
+    # End a transaction of the MCU command broker. The broker does not respond
+    # to this.
+    def broker_end(self):
+        cmd = McuBrokerClient.McuBrokerClient.brokerCmdEnd
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Sending MCU command broker command: " + cmd)
+        try:
+            self.tx_write(cmd.encode('utf-8') + b"\r")
+        except Exception as e:
+            self.errorCount += 1
+            print(self.prefixError + "Error writing to serial port `" + self.ser.portstr + "': " + str(e))
+            return -1
+        return 0
+
+
+
+    # Get the generation of the device states cached with respect to other
+    # clients of the MCU command broker. Outside of exclusive, other clients
+    # may access the MCU at any time, so a new generation is returned on each
+    # call and cached states are never reused.
+    def broker_generation(self):
+        if self.brokerPort and not self.exclusiveDepth:
+            self.brokerGeneration += 1
+        return self.brokerGeneration
+
+
+
+    # Start capturing the MCU communication to a file.
+    def capture_start(self, fileName):
+        self.capture_stop()
+        capture = McuCapture.McuCapture()
+        capture.debugLevel = self.debugLevel
+        port = self.ser.port if not self.simulateHwAccess else ""
+        if capture.open(fileName, port):
+            self.errorCount += 1
+            return -1
+        self.capture = capture
+        return 0
+
+
+
+    # Stop capturing the MCU communication.
+    def capture_stop(self):
+        if self.capture:
+            self.capture.close()
+            self.capture = None
+        return 0
+
+
+
+    # ===============================================================
+    # Response timeouts.
+    # ===============================================================
+
+    # Load the calibrated response timeouts or calibrate them if they are not
+    # available yet. The timeouts are saved again at exit. Replayed sessions
+    # are served from the capture file, so their timeouts are not calibrated.
+    def timeout_init(self):
+        if self.simulateHwAccess or McuReplay.McuReplay.is_replay_port(self.ser.port):
+            return 0
+        ret = 0
+        if self.timeout_load():
+            if not self.mcuTimeoutCalibrate:
+                return 0
+            ret = self.timeout_calibrate()
+            if ret:
+                return ret
+        # Register a single exit handler for all serial ports.
+        if self not in McuSerial.timeoutSaveSerials:
+            McuSerial.timeoutSaveSerials.append(self)
+        if not McuSerial.timeoutSaveRegistered:
+            atexit.register(McuSerial.timeout_save_all)
+            McuSerial.timeoutSaveRegistered = True
+        return ret
+
+
+
+    # Get the response timeout of an MCU command.
+    def timeout_get(self, cmd):
+        est = self.timeoutEst.get(cmd.partition(" ")[0].lower())
+        if est is None:
+            return self.mcuResponseTimeout
+        timeout = self.mcuTimeoutFactor * (est[0] + self.mcuTimeoutDevFactor * est[1])
+        return min(max(timeout, self.mcuResponseTimeoutMin), self.mcuResponseTimeout)
+
+
+
+    # Adapt the response timeout of an MCU command to an observed latency.
+    def timeout_update(self, cmd, duration):
+        verb = cmd.partition(" ")[0].lower()
+        if verb not in self.mcuCmdExecTime:
+            return
+        est = self.timeoutEst.get(verb)
+        if est is None:
+            self.timeoutEst[verb] = [duration, duration / 2]
+            return
+        err = duration - est[0]
+        est[0] += self.mcuTimeoutGainMean * err
+        est[1] += self.mcuTimeoutGainDev * (abs(err) - est[1])
+
+
+
+    # Double the response timeout of an MCU command after a timeout.
+    def timeout_backoff(self, cmd):
+        est = self.timeoutEst.get(cmd.partition(" ")[0].lower())
+        if est is not None:
+            est[0] = min(2 * est[0], self.mcuResponseTimeout)
+
+
+
+    # Measure the round-trip time and the time per byte of the serial link
+    # and derive the response timeouts of the command classes from them.
+    def timeout_calibrate(self):
+        if self.debugLevel >= 1:
+            print(self.prefixDebug + "Calibrating the response timeouts of the serial port `{0:s}'.".format(self.ser.port))
+        self.clear()
+        latency = {}
+        rawLen = {}
+        for cmd in ["gpio led-user", "info"]:
+            latency[cmd] = []
+            for i in range(self.mcuTimeoutCalibrateCnt):
+                timeStart = time.monotonic()
+                ret = self.send(cmd)
+                if ret:
+                    self.errorCount += 1
+                    print(self.prefixError + "Error calibrating the response timeouts of the serial port `{0:s}'!".\
+                        format(self.ser.port))
+                    return ret
+                latency[cmd].append(time.monotonic() - timeStart)
+                rawLen[cmd] = len(self.mcuResponseRaw)
+        self.linkRtt = min(latency["gpio led-user"])
+        if rawLen["info"] > rawLen["gpio led-user"] and min(latency["info"]) > self.linkRtt:
+            self.linkByteTime = (min(latency["info"]) - self.linkRtt) / (rawLen["info"] - rawLen["gpio led-user"])
+        for verb, execTime in self.mcuCmdExecTime.items():
+            if verb not in self.timeoutEst:
+                latencyExp = self.linkRtt + self.mcuCmdBytesTypical * self.linkByteTime + execTime
+                self.timeoutEst[verb] = [latencyExp, latencyExp / 2]
+        if self.debugLevel >= 1:
+            print(self.prefixDebug + "Round-trip time: {0:.6f} s, byte time: {1:.6f} s".format(self.linkRtt, self.linkByteTime))
+        return self.timeout_save()
+
+
+
+    # Load the calibrated response timeouts from the cache.
+    def timeout_load(self):
+        if not self.cacheKey:
+            return -1
+        entry = McuCache.McuCache(self.mcuTimeoutCache).get(self.cacheKey)
+        try:
+            self.linkRtt = float(entry["link_rtt"])
+            self.linkByteTime = float(entry["link_byte_time"])
+            self.timeoutEst = {verb: [float(est[0]), float(est[1])] for verb, est in entry["latency"].items()}
+        except Exception:
+            return -1
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Loaded calibrated response timeouts of the serial port `{0:s}'.".format(self.ser.port))
+        return 0
+
+
+
+    # Save the calibrated response timeouts to the cache.
+    def timeout_save(self):
+        if not self.cacheKey or self.linkRtt is None:
+            return -1
+        entry = {
+            "link_rtt": self.linkRtt,
+            "link_byte_time": self.linkByteTime,
+            "latency": self.timeoutEst,
+            "time": time.time(),
+        }
+        return McuCache.McuCache(self.mcuTimeoutCache).set(self.cacheKey, entry)
+
+
+
+    # Save the calibrated response timeouts of all serial ports to the cache.
+    @classmethod
+    def timeout_save_all(cls):
+        for mcuSer in cls.timeoutSaveSerials:
+            mcuSer.timeout_save()
+
+
+
+    # Write data to the serial port.
+    def tx_write(self, data):
+        # Work-around for the communication problem seen between the SM SoM and the CM MCU:
+        # - Send the carriage return separately from the command with an
+        #   additional write command and use a flush command after each
+        #   write command.
+        # - This method was empirically found and tested on 03 Apr 2023. It
+        #   improves the reliability of the communication between the SM
+        #   SoM and the CM MCU a lot, but not to 100%.
+        # - The root cause of the problem is unclear.
+        # - This work-around is not necessary when using the front-panel
+        #   UART with a PC.
+        self.bytesWritten += len(data)
+        if len(data) > 1 and data.endswith(b"\r"):
+            self.ser.write(data[:-1])
+            self.ser.flush()
+            data = data[-1:]
+        self.ser.write(data)
+        self.ser.flush()
+
+
+
+    # ===============================================================
+    # Receive engine.
+    # ===============================================================
+
+    # Check if the serial port supports waiting for data with select.
+    def rx_check_selectable(self):
+        try:
+            select.select([self.ser], [], [], 0)
+        except Exception:
+            return False
+        return True
+
+
+
+    # Append the data available on the serial port to the receive buffer. Wait
+    # at most timeout seconds for data to arrive. Return the number of bytes
+    # received.
+    def rx_fill(self, timeout):
+        timeout = max(timeout, 0)
+        if self.rxSelectable:
+            # Block until the serial port is readable instead of polling.
+            if not select.select([self.ser], [], [], timeout)[0]:
+                return 0
+            data = self.ser.read(self.ser.in_waiting or 1)
+        else:
+            # Fall back to a blocking read with timeout.
+            serTimeoutBackup = self.ser.timeout
+            self.ser.timeout = timeout
+            data = self.ser.read(self.ser.in_waiting or 1)
+            self.ser.timeout = serTimeoutBackup
+        self.rxBuffer += data
+        self.bytesRead += len(data)
+        return len(data)
+
+
+
+    # Extract the raw data of one complete MCU response including the echo of
+    # the command and the prompt from the receive buffer. Return None if no
+    # complete response is available yet.
+    def rx_split(self):
+        pos = self.rxBuffer.find(self.mcuCmdPromptEnd)
+        if pos < 0:
+            return None
+        pos += len(self.mcuCmdPromptEnd)
+        raw = bytes(self.rxBuffer[:pos])
+        del self.rxBuffer[:pos]
+        return raw
+
+
+
+    # Receive one complete MCU response. Return None on timeout.
+    def rx_receive(self, timeout):
+        timeEnd = time.monotonic() + timeout
+        while True:
+            raw = self.rx_split()
+            if raw is not None:
+                return raw
+            timeLeft = timeEnd - time.monotonic()
+            if timeLeft <= 0:
+                return None
+            self.rx_fill(timeLeft)
+
+
+
+    # Resynchronize the link to the MCU after a response timeout. The late
+    # response of the outstanding command is awaited until timeEnd
+    # (time.monotonic) at most, so that it is not taken as the response to the
+    # next command. Then, all data is discarded until the serial port is idle.
+    # The cached device states are invalidated, since the outcome of the
+    # command is unknown.
+    def rx_resync(self, timeEnd, pending=1):
+        if self.debugLevel >= 1:
+            print(self.prefixDebug + "Resynchronizing with the MCU. Outstanding responses: {0:d}".format(pending))
+        self.linkGeneration += 1
+        while pending > 0:
+            if self.rx_receive(timeEnd - time.monotonic()) is None:
+                break
+            pending -= 1
+        return self.clear()
+
+
+
+    # Store the raw data of the response to an MCU command sent at timeStart
+    # (time.monotonic) and account for it in the statistics and the capture.
+    # A raw data of None denotes an incomplete response.
+    def rx_account(self, cmd, timeStart, raw):
+        duration = time.monotonic() - timeStart
+        self.power_track(cmd)
+        if raw is None:
+            self.stats.record_timeout(cmd, duration)
+            self.timeout_backoff(cmd)
+            if self.capture:
+                self.capture.record_timeout(cmd, time.time() - duration, duration, bytes(self.rxBuffer))
+            return
+        self.rx_classify(raw)
+        self.stats.record(cmd, duration, self.mcuResponseCode)
+        self.timeout_update(cmd, duration)
+        if self.capture:
+            self.capture.record_response(cmd, time.time() - duration, duration, raw)
+
+
+
+    # Invalidate the cached device states if an MCU command changes the power
+    # of the board. This is done regardless of the response, since the power
+    # may have changed even if the command failed or timed out.
+    def power_track(self, cmd):
+        if not cmd.startswith(("power", "gpio")):
+            return
+        params = cmd.lower().split()
+        if len(params) < 3:
+            return
+        if params[0] in self.mcuCmdPowerVerbs or \
+           (params[0] == "gpio" and params[1] in self.mcuCmdPowerGpioTypes):
+            self.powerGeneration += 1
+
+
+
+    # Store the raw data of an MCU response. Determine the status code and the
+    # position of the payload without decoding or copying the data.
+    def rx_classify(self, raw):
+        self.mcuResponseRaw = raw
+        self.mcuResponseStr = None
+        # The echo of the command ends with the first line break.
+        start = raw.find(b"\n") + 1
+        end = len(raw) - len(self.mcuCmdPrompt)
+        self.mcuResponseCode = self.mcuResponseCodeUnknown
+        for status, code in self.mcuResponseStatusRaw:
+            if raw.startswith(status, start):
+                self.mcuResponseCode = code
+                # Skip the status and the following separator.
+                start += len(status) + 1
+                break
+        whitespace = self.mcuResponseWhitespace
+        while start < end and raw[start] in whitespace:
+            start += 1
+        while end > start and raw[end - 1] in whitespace:
+            end -= 1
+        self.mcuResponsePayloadStart = start
+        self.mcuResponsePayloadEnd = end
+
+
+
+    # Convert the raw data of an MCU response to the response string without
+    # the echo of the command and without the prompt.
+    def rx_parse(self, raw):
+        # The echo of the command ends with the first line break.
+        pos = raw.find(b"\n") + 1
+        response = raw[pos:len(raw) - len(self.mcuCmdPrompt)]
+        return response.decode('utf-8', errors='replace').replace('\r', '')
+
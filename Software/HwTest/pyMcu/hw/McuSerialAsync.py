@@ -0,0 +1,193 @@
+# File: McuSerialAsync.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class for communicating with the TM4C1290NCPDT MCU over a serial port
+# (UART) using asyncio. A single event loop can drive the serial ports of
+# several MCUs at once.
+#
+# Replay ports (see McuReplay class) have no file descriptor which the event
+# loop could wait for. Their commands are executed synchronously by the
+# McuSerial class, which blocks the event loop while a command is replayed
+# (e.g. for the recorded delays of `replay-timed:' ports).
+#
+
+
+
+import asyncio
+import contextlib
+import os
+import time
+import McuReplay
+import McuSerial
+
+
+
+class McuSerialAsync:
+
+    # Message prefixes and separators.
+    prefixDetails       = " - "
+    separatorDetails    = " - "
+    prefixError = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+
+
+    # Initialize the serial port for communication with the MCU. The serial
+    # port is set up and opened by an McuSerial object. Its receive buffer,
+    # response parser and counters are shared with this object.
+    def __init__(self, port):
+        self.mcuSer = McuSerial.McuSerial(port)
+        self.mcuSer.debugLevel = self.debugLevel
+        self.fd = -1
+        # Only one command may be outstanding on the serial port.
+        self.lock = asyncio.Lock()
+        self.lockOwner = None
+        # Replay ports have no file descriptor. They are served synchronously.
+        if not self.mcuSer.simulateHwAccess and not McuReplay.McuReplay.is_replay_port(port):
+            self.fd = self.mcuSer.ser.fileno()
+            os.set_blocking(self.fd, False)
+
+
+
+    # Print details.
+    def print_details(self):
+        self.mcuSer.debugLevel = self.debugLevel
+        return self.mcuSer.print_details()
+
+
+
+    # Get the full MCU response including the status.
+    async def get_full(self):
+        self.mcuSer.debugLevel = self.debugLevel
+        return self.mcuSer.get_full()
+
+
+
+    # Get the MCU response without the status.
+    async def get(self):
+        self.mcuSer.debugLevel = self.debugLevel
+        return self.mcuSer.get()
+
+
+
+    # Evaluate the MCU response.
+    async def eval(self):
+        self.mcuSer.debugLevel = self.debugLevel
+        return self.mcuSer.eval()
+
+
+
+    # Send a MCU command to the serial port and wait for the response.
+    async def send(self, cmd):
+        self.mcuSer.debugLevel = self.debugLevel
+        async with self.exclusive():
+            return await self.send_locked(cmd)
+
+
+
+    # Get exclusive access to the serial port for a sequence of commands, e.g.
+    # an I2C write without stop condition followed by a read with repeated
+    # start. Nested use within the same task is allowed.
+    @contextlib.asynccontextmanager
+    async def exclusive(self):
+        task = asyncio.current_task()
+        if self.lockOwner is task:
+            yield
+            return
+        async with self.lock:
+            self.lockOwner = task
+            try:
+                yield
+            finally:
+                self.lockOwner = None
+
+
+
+    # Send a MCU command to the serial port and wait for the response. The
+    # caller must hold the lock.
+    async def send_locked(self, cmd):
+        mcuSer = self.mcuSer
+        # Clear previous MCU response.
+        mcuSer.mcuResponse = ""
+        if mcuSer.simulateHwAccess or self.fd < 0:
+            return mcuSer.send(cmd)
+        try:
+            if self.debugLevel >= 2:
+                print(self.prefixDebug + "Sending MCU command: " + cmd)
+            # Discard data left over from a previous command.
+            mcuSer.rxBuffer.clear()
+            timeStart = time.monotonic()
+            # Send the carriage return separately. See McuSerial.tx_write.
+            await self.tx_write(cmd.encode('utf-8'))
+            await self.tx_write(b"\r")
+            mcuSer.accessWrite += 1
+        except Exception as e:
+            mcuSer.errorCount += 1
+            print(self.prefixError + "Error writing to serial port `" + mcuSer.ser.portstr + "': " + str(e))
+            return -1
+        try:
+            mcuSer.accessRead += 1
+            # Wait for the prompt, which marks the end of the MCU response.
+            raw = await asyncio.wait_for(self.rx_receive(), mcuSer.timeout_get(cmd))
+            mcuSer.rx_account(cmd, timeStart, raw)
+            return 0
+        except asyncio.TimeoutError:
+            mcuSer.rx_account(cmd, timeStart, None)
+            mcuSer.errorCount += 1
+            print(self.prefixError + "Incomplete response received from the MCU!")
+            return 1
+        except Exception as e:
+            mcuSer.errorCount += 1
+            print(self.prefixError + "Error reading from serial port `" + mcuSer.ser.portstr + "': " + str(e))
+            return -1
+
+
+
+    # Write data to the serial port without blocking the event loop.
+    async def tx_write(self, data):
+        loop = asyncio.get_running_loop()
+        data = memoryview(data)
+        while len(data):
+            try:
+                cnt = os.write(self.fd, data)
+            except BlockingIOError:
+                cnt = 0
+            self.mcuSer.bytesWritten += cnt
+            data = data[cnt:]
+            if len(data):
+                await self.fd_wait(loop.add_writer, loop.remove_writer)
+
+
+
+    # Receive one complete MCU response.
+    async def rx_receive(self):
+        loop = asyncio.get_running_loop()
+        mcuSer = self.mcuSer
+        while True:
+            raw = mcuSer.rx_split()
+            if raw is not None:
+                return raw
+            await self.fd_wait(loop.add_reader, loop.remove_reader)
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                continue
+            mcuSer.rxBuffer += data
+            mcuSer.bytesRead += len(data)
+
+
+
+    # Wait until the file descriptor of the serial port is ready.
+    async def fd_wait(self, addCallback, removeCallback):
+        future = asyncio.get_running_loop().create_future()
+        addCallback(self.fd, lambda: future.done() or future.set_result(None))
+        try:
+            await future
+        finally:
+            removeCallback(self.fd)
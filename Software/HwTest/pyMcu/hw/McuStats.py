@@ -0,0 +1,181 @@
+# File: McuStats.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python class collecting latency histograms and counters of the MCU commands.
+# The statistics are kept per MCU command verb (e.g. `i2c', `power') and per
+# I2C bus and slave address.
+#
+
+
+
+import bisect
+import json
+import time
+
+
+
+class McuStats:
+
+    # Upper limits of the latency histogram buckets in seconds. The last
+    # bucket collects all latencies above the last limit.
+    statsBucketLimits   = [100e-6, 200e-6, 500e-6, 1e-3, 2e-3, 5e-3, 10e-3, 20e-3, 50e-3,
+                           100e-3, 200e-3, 500e-3, 1.0, 2.0, 5.0]
+
+    # Indices of the values of a statistics entry.
+    statsIdxCount       = 0     # Number of commands.
+    statsIdxWarning     = 1     # Number of responses with warning status.
+    statsIdxError       = 2     # Number of responses with error status.
+    statsIdxTimeout     = 3     # Number of incomplete responses.
+    statsIdxTimeTotal   = 4     # Sum of the latencies.
+    statsIdxTimeMin     = 5     # Minimum latency.
+    statsIdxTimeMax     = 6     # Maximum latency.
+    statsIdxHist        = 7     # Latency histogram.
+
+    # MCU response codes (see McuSerial class).
+    mcuResponseCodeWarning  = 1
+    mcuResponseCodeError    = 2
+
+    # MCU command verbs with I2C bus and slave address as first parameters.
+    mcuCmdVerbsI2C      = ["i2c", "i2c-bw"]
+
+
+
+    # Initialize the statistics.
+    def __init__(self):
+        self.reset()
+
+
+
+    # Reset the statistics.
+    def reset(self):
+        self.statsVerb = {}
+        self.statsI2C = {}
+        self.timeStart = time.time()
+
+
+
+    # Create a new statistics entry.
+    def entry_new(self):
+        return [0, 0, 0, 0, 0.0, None, 0.0, [0] * (len(self.statsBucketLimits) + 1)]
+
+
+
+    # Get the statistics entries of an MCU command: the one of the verb and
+    # the one of the I2C bus and slave address, if applicable.
+    def entries_get(self, cmd):
+        params = cmd.split(None, 3)
+        if not params:
+            return []
+        verb = params[0].lower()
+        entry = self.statsVerb.get(verb)
+        if entry is None:
+            entry = self.statsVerb[verb] = self.entry_new()
+        entries = [entry]
+        if verb in self.mcuCmdVerbsI2C and len(params) >= 3:
+            try:
+                key = (int(params[1], 0), int(params[2], 0))
+            except ValueError:
+                return entries
+            entry = self.statsI2C.get(key)
+            if entry is None:
+                entry = self.statsI2C[key] = self.entry_new()
+            entries.append(entry)
+        return entries
+
+
+
+    # Record the latency and the response code of an MCU command.
+    def record(self, cmd, duration, responseCode):
+        bucket = bisect.bisect_left(self.statsBucketLimits, duration)
+        for entry in self.entries_get(cmd):
+            entry[self.statsIdxCount] += 1
+            if responseCode == self.mcuResponseCodeWarning:
+                entry[self.statsIdxWarning] += 1
+            elif responseCode == self.mcuResponseCodeError:
+                entry[self.statsIdxError] += 1
+            entry[self.statsIdxTimeTotal] += duration
+            if entry[self.statsIdxTimeMin] is None or duration < entry[self.statsIdxTimeMin]:
+                entry[self.statsIdxTimeMin] = duration
+            if duration > entry[self.statsIdxTimeMax]:
+                entry[self.statsIdxTimeMax] = duration
+            entry[self.statsIdxHist][bucket] += 1
+
+
+
+    # Record an MCU command with incomplete response.
+    def record_timeout(self, cmd, duration):
+        for entry in self.entries_get(cmd):
+            entry[self.statsIdxCount] += 1
+            entry[self.statsIdxTimeout] += 1
+            entry[self.statsIdxTimeTotal] += duration
+
+
+
+    # Convert a statistics entry to a dictionary.
+    def entry_dict(self, entry):
+        cnt = entry[self.statsIdxCount]
+        return {
+            "count": cnt,
+            "warnings": entry[self.statsIdxWarning],
+            "errors": entry[self.statsIdxError],
+            "timeouts": entry[self.statsIdxTimeout],
+            "time_total": entry[self.statsIdxTimeTotal],
+            "time_mean": entry[self.statsIdxTimeTotal] / cnt if cnt else 0.0,
+            "time_min": entry[self.statsIdxTimeMin] if entry[self.statsIdxTimeMin] is not None else 0.0,
+            "time_max": entry[self.statsIdxTimeMax],
+            "histogram": list(entry[self.statsIdxHist]),
+        }
+
+
+
+    # Get a snapshot of the statistics.
+    def snapshot(self):
+        return {
+            "time_start": self.timeStart,
+            "time_elapsed": time.time() - self.timeStart,
+            "bucket_limits": list(self.statsBucketLimits),
+            "verb": {verb: self.entry_dict(entry) for verb, entry in sorted(self.statsVerb.items())},
+            "i2c": {"{0:d}:0x{1:02x}".format(port, slaveAddr): self.entry_dict(entry)
+                    for (port, slaveAddr), entry in sorted(self.statsI2C.items())},
+        }
+
+
+
+    # Get the statistics of an I2C bus and optionally a slave address.
+    def snapshot_i2c(self, port, slaveAddr=None):
+        stats = {}
+        for (p, s), entry in sorted(self.statsI2C.items()):
+            if p == port and (slaveAddr is None or s == slaveAddr):
+                stats["{0:d}:0x{1:02x}".format(p, s)] = self.entry_dict(entry)
+        return stats
+
+
+
+    # Dump the statistics in JSON format.
+    def dump_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+
+
+    # Dump the statistics as text.
+    def dump_text(self):
+        snapshot = self.snapshot()
+        lines = ["MCU command statistics over {0:.1f} s:".format(snapshot["time_elapsed"])]
+        header = "{0:<16s} {1:>8s} {2:>6s} {3:>6s} {4:>6s} {5:>10s} {6:>10s} {7:>10s} {8:>10s}".\
+            format("", "count", "warn", "error", "tmout", "total [s]", "mean [ms]", "min [ms]", "max [ms]")
+        for title, stats in [("Command", snapshot["verb"]), ("I2C bus:slave", snapshot["i2c"])]:
+            if not stats:
+                continue
+            lines.append(title + header[len(title):])
+            for key, s in stats.items():
+                lines.append("{0:<16s} {1:8d} {2:6d} {3:6d} {4:6d} {5:10.3f} {6:10.3f} {7:10.3f} {8:10.3f}".\
+                    format(key, s["count"], s["warnings"], s["errors"], s["timeouts"], s["time_total"],
+                           s["time_mean"] * 1e3, s["time_min"] * 1e3, s["time_max"] * 1e3))
+        lines.append("Latency histograms (upper bucket limits in ms: " + \
+            " ".join("{0:g}".format(limit * 1e3) for limit in self.statsBucketLimits) + " inf):")
+        for key, s in list(snapshot["verb"].items()) + list(snapshot["i2c"].items()):
+            lines.append("{0:<16s} ".format(key) + " ".join("{0:d}".format(cnt) for cnt in s["histogram"]))
+        return "\n".join(lines)
@@ -2,13 +2,14 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 31 Mar 2020
-# Rev.: 04 Aug 2020
+# Rev.: 17 Oct 2026
 #
 # Python class for using the UART ports of the TM4C1290NCPDT MCU.
 #
 
 
 
+import McuCodec
 import McuSerial
 
 
@@ -29,6 +30,7 @@ class McuUart:
     hwBaudMax           = 15000000
     hwParity            = ['none', 'even', 'odd', 'one', 'zero']
     hwMarkData          = "Data:"
+    hwMarkDataRaw       = hwMarkData.encode()
 
     # Default values.
     hwBaudDefault       = 115200
@@ -146,9 +148,7 @@ class McuUart:
             if self.debugLevel >= 1:
                 print(self.prefixError + "At least one data byte must be provided!")
             return -1
-        cmd = "uart {0:d} 0".format(self.port)
-        for datum in data:
-            cmd += " 0x{0:02x}".format(datum & 0xff)
+        cmd = "uart {0:d} 0".format(self.port) + McuCodec.McuCodec.encode(data)
         if self.debugLevel >= 2:
             print(self.prefixDebug + "Writing data to the UART port {0:d}.".format(self.port), end='')
             print(self.separatorDetails + "Data:", end='')
@@ -185,12 +185,10 @@ class McuUart:
         ret = self.send_cmd(cmd)
         if ret:
             return ret, []
-        # Get response.
-        dataStr = self.mcuSer.get()
-        # Find position of data.
-        dataPos = dataStr.find(self.hwMarkData)
+        # Parse the data out of the response.
+        data = McuCodec.McuCodec.decode_after(*self.mcuSer.get_raw(), self.hwMarkDataRaw)
         # No data available.
-        if dataPos < 0:
+        if data is None:
             self.errorCount += 1
             print(self.prefixError + "Error parsing data read from the UART port {0:d}!".format(self.port))
             if self.debugLevel >= 1:
@@ -198,11 +196,6 @@ class McuUart:
                 print(self.prefixError + "Response from MCU:")
                 print(self.mcuSer.get_full())
             return -1, []
-        # Get sub-string containing the data. Add the length of hwMarkData to
-        # point beyond the data mark.
-        dataStr = dataStr[dataPos+len(self.hwMarkData):].strip()
-        # Convert data string to list of data bytes.
-        data = [int(i, 0) for i in filter(None, dataStr.split(" "))]
         if self.debugLevel >= 2:
             print(self.prefixDebug + "Data read:", end='')
             for datum in data:
@@ -233,18 +226,11 @@ class McuUart:
                 print(self.prefixError + "Response from MCU:")
                 print(self.mcuSer.get_full())
             return ret, []
-        # Get response.
-        dataStr = self.mcuSer.get()
-        # Find position of data.
-        dataPos = dataStr.find(self.hwMarkData)
+        # Parse the data out of the response.
+        data = McuCodec.McuCodec.decode_after(*self.mcuSer.get_raw(), self.hwMarkDataRaw)
         # No data available.
-        if dataPos < 0:
+        if data is None:
             return self.mcuSer.mcuResponseCodeWarning, []   # Return code indicating a warning.
-        # Get sub-string containing the data. Add the length of hwMarkData to
-        # point beyond the data mark.
-        dataStr = dataStr[dataPos+len(self.hwMarkData):].strip()
-        # Convert data string to list of data bytes.
-        data = [int(i, 0) for i in filter(None, dataStr.split(" "))]
         if self.debugLevel >= 2:
             print(self.prefixDebug + "Data read:", end='')
             for datum in data:
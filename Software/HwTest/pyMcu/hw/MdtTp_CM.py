@@ -4,7 +4,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 04 Aug 2020
-# Rev.: 24 Jun 2026
+# Rev.: 17 Oct 2026
 #
 # Python class for accessing the ATLAS MDT Trigger Processor (TP) Command
 # Module (CM) via the TI Tiva TM4C1290 MCU UART.
@@ -28,6 +28,8 @@ import I2C_PCA9547
 import I2C_Si53xx
 import I2C_TCA6424A
 import I2C_FireFly
+import I2CScheduler
+import I2CWriteBatcher
 
 
 
@@ -48,6 +50,9 @@ class MdtTp_CM:
     i2cBusNum           = 10
     fireFlyNum          = 8
 
+    # Clock IC configuration.
+    clkVerifyRegs       = True  # Compare all registers, not only the design ID, to skip configured clock ICs.
+
 
 
     # Initialize the Command Module class.
@@ -56,6 +61,9 @@ class MdtTp_CM:
         self.debugLevel = debugLevel
         self.warningCount = 0
         self.errorCount = 0
+        # Validated serial number of the CM: (device family code, serial
+        # number, CRC). It identifies the board, so it is read only once.
+        self.serialNumberCached = None
         self.define_hw()
 
 
@@ -144,13 +152,25 @@ class MdtTp_CM:
 
 
 
-    # Read the serial number of the board.
-    def serial_number(self):
+    # Get the serial number of the board: (device family code, serial number,
+    # CRC, CRC error flag). A serial number with valid CRC is read only once.
+    def serial_number_get(self):
+        if self.serialNumberCached:
+            return (0,) + self.serialNumberCached + (False,)
         if self.debugLevel >= 1:
-            print(self.prefixDebug + "Reading the serial number from {0:s}.", self.i2cDevice_IC114_DS28CM00.deviceName)
+            print(self.prefixDebug + "Reading the serial number from {0:s}.".format(self.i2cDevice_IC114_DS28CM00.deviceName))
         ret, deviceFamilyCode, serialNumber, crc, crcError = self.i2cDevice_IC114_DS28CM00.read_all()
+        if not ret and not crcError:
+            self.serialNumberCached = (deviceFamilyCode, serialNumber, crc)
+        return ret, deviceFamilyCode, serialNumber, crc, crcError
+
+
+
+    # Read the serial number of the board.
+    def serial_number(self):
+        ret, deviceFamilyCode, serialNumber, crc, crcError = self.serial_number_get()
         if ret:
-            print(self.prefixError + "Error reading the serial number from {0:s}!", self.i2cDevice_IC114_DS28CM00.deviceName)
+            print(self.prefixError + "Error reading the serial number from {0:s}!".format(self.i2cDevice_IC114_DS28CM00.deviceName))
             return ret
         print("Device family code: 0x{0:02x}".format(deviceFamilyCode))
         print("Serial number: 0x{0:012x}".format(serialNumber))
@@ -185,13 +205,14 @@ class MdtTp_CM:
             print(self.prefixDebug + "{0:s} product ID: 0x{1:02x}".format(self.i2cDevice_IC39_MCP9903.deviceName, self.i2cDevice_IC39_MCP9903.read_product_id()[1]))
             print(self.prefixDebug + "{0:s} manufacturer ID: 0x{1:02x}".format(self.i2cDevice_IC39_MCP9903.deviceName, self.i2cDevice_IC39_MCP9903.read_manufacturer_id()[1]))
             print(self.prefixDebug + "{0:s} revision: 0x{1:02x}".format(self.i2cDevice_IC39_MCP9903.deviceName, self.i2cDevice_IC39_MCP9903.read_revision()[1]))
-        # Read the temperatures.
-        print("KU15P  : {0:19s}: {1:6.3f} degC".format(self.i2cDevice_IC39_MCP9903.deviceName, self.i2cDevice_IC39_MCP9903.read_temp_ext_1()[1]))
-        print("ZU11EG : {0:19s}: {1:6.3f} degC".format(self.i2cDevice_IC39_MCP9903.deviceName, self.i2cDevice_IC39_MCP9903.read_temp_ext_2()[1]))
+        # Read the temperatures of all channels at once.
+        ret, temperatures = self.i2cDevice_IC39_MCP9903.read_all_temperatures()
+        print("KU15P  : {0:19s}: {1:6.3f} degC".format(self.i2cDevice_IC39_MCP9903.deviceName, temperatures[self.i2cDevice_IC39_MCP9903.tempIdxExt1]))
+        print("ZU11EG : {0:19s}: {1:6.3f} degC".format(self.i2cDevice_IC39_MCP9903.deviceName, temperatures[self.i2cDevice_IC39_MCP9903.tempIdxExt2]))
         # Board temperatures.
         if self.debugLevel >= 1:
             print(self.prefixDebug + "Reading the temperatures from local sensors on the board.")
-        print("Board 1: {0:19s}: {1:6.3f} degC".format(self.i2cDevice_IC39_MCP9903.deviceName, self.i2cDevice_IC39_MCP9903.read_temp_int()[1]))
+        print("Board 1: {0:19s}: {1:6.3f} degC".format(self.i2cDevice_IC39_MCP9903.deviceName, temperatures[self.i2cDevice_IC39_MCP9903.tempIdxInt]))
         if self.debugLevel >= 2:
             # Read the manufacturer and device ID.
             print(self.prefixDebug + "{0:s} manufacturer ID: 0x{1:04x}".format(self.i2cDevice_IC34_MCP9808.deviceName, self.i2cDevice_IC34_MCP9808.read_manufacturer_id()[1]))
@@ -295,56 +316,67 @@ class MdtTp_CM:
         # IC54 (Si5341A): I2C port 3, slave address 0x74
         self.i2cDevice_IC54_Si5341A = I2C_Si53xx.I2C_Si53xx(self.mcuI2C[3], 0x74, "IC54 (Si5341A)")
         self.i2cDevice_IC54_Si5341A.muxChannel = 0
+        self.i2cDevice_IC54_Si5341A.mux = self.i2cDevice_IC55_PCA9547PW
         self.i2cDevice_IC54_Si5341A.regMapFile = os.path.join("config", "clock", "IC54_h74_240M-Registers.txt")
         self.i2cDevice_IC54_Si5341A.debugLevel = self.debugLevel
         # IC56 (Si5345A): I2C port 3, slave address 0x68, clock I2C mux port 0
         self.i2cDevice_IC56_Si5345A = I2C_Si53xx.I2C_Si53xx(self.mcuI2C[3], 0x68, "IC56 (Si5345A)")
         self.i2cDevice_IC56_Si5345A.muxChannel = 0
+        self.i2cDevice_IC56_Si5345A.mux = self.i2cDevice_IC55_PCA9547PW
         self.i2cDevice_IC56_Si5345A.regMapFile = os.path.join("config", "clock", "IC56_h68_IN0-240M_O-240M-Registers.txt")
         self.i2cDevice_IC56_Si5345A.debugLevel = self.debugLevel
         # IC60 (Si5345A): I2C port 3, slave address 0x6B, clock I2C mux port 0
         self.i2cDevice_IC60_Si5345A = I2C_Si53xx.I2C_Si53xx(self.mcuI2C[3], 0x6b, "IC60 (Si5345A)")
         self.i2cDevice_IC60_Si5345A.muxChannel = 0
+        self.i2cDevice_IC60_Si5345A.mux = self.i2cDevice_IC55_PCA9547PW
         self.i2cDevice_IC60_Si5345A.regMapFile = os.path.join("config", "clock", "IC60_h6B_IN0-240M_O-240M-Registers.txt")
         self.i2cDevice_IC60_Si5345A.debugLevel = self.debugLevel
         # IC61 (Si5342A): I2C port 3, slave address 0x68, clock I2C mux port 1
         self.i2cDevice_IC61_Si5342A = I2C_Si53xx.I2C_Si53xx(self.mcuI2C[3], 0x68, "IC61 (Si5342A)")
         self.i2cDevice_IC61_Si5342A.muxChannel = 1
+        self.i2cDevice_IC61_Si5342A.mux = self.i2cDevice_IC55_PCA9547PW
         self.i2cDevice_IC61_Si5342A.regMapFile = os.path.join("config", "clock", "IC61_h68_IN0-240M_O-240M-Registers.txt")
         self.i2cDevice_IC61_Si5342A.debugLevel = self.debugLevel
         # IC62 (Si5345A): I2C port 3, slave address 0x69, clock I2C mux port 1
         self.i2cDevice_IC62_Si5345A = I2C_Si53xx.I2C_Si53xx(self.mcuI2C[3], 0x69, "IC62 (Si5345A)")
         self.i2cDevice_IC62_Si5345A.muxChannel = 1
+        self.i2cDevice_IC62_Si5345A.mux = self.i2cDevice_IC55_PCA9547PW
         self.i2cDevice_IC62_Si5345A.regMapFile = os.path.join("config", "clock", "IC62_h69_IN0-240M_O-240M-Registers.txt")
         self.i2cDevice_IC62_Si5345A.debugLevel = self.debugLevel
         # IC63 (Si5345A): I2C port 3, slave address 0x6A, clock I2C mux port 1
         self.i2cDevice_IC63_Si5345A = I2C_Si53xx.I2C_Si53xx(self.mcuI2C[3], 0x6a, "IC63 (Si5345A)")
         self.i2cDevice_IC63_Si5345A.muxChannel = 1
+        self.i2cDevice_IC63_Si5345A.mux = self.i2cDevice_IC55_PCA9547PW
         self.i2cDevice_IC63_Si5345A.regMapFile = os.path.join("config", "clock", "IC63_h6A_IN0-240M_O-240M-Registers.txt")
         self.i2cDevice_IC63_Si5345A.debugLevel = self.debugLevel
         # IC81 (Si5342A): I2C port 3, slave address 0x6B, clock I2C mux port 1
         self.i2cDevice_IC81_Si5342A = I2C_Si53xx.I2C_Si53xx(self.mcuI2C[3], 0x6b, "IC81 (Si5342A)")
         self.i2cDevice_IC81_Si5342A.muxChannel = 1
+        self.i2cDevice_IC81_Si5342A.mux = self.i2cDevice_IC55_PCA9547PW
         self.i2cDevice_IC81_Si5342A.regMapFile = os.path.join("config", "clock", "IC81_h6B_IN0-240M_O-240M-Registers.txt")
         self.i2cDevice_IC81_Si5342A.debugLevel = self.debugLevel
         # IC82 (Si5344A): I2C port 3, slave address 0x6A, clock I2C mux port 0
         self.i2cDevice_IC82_Si5344A = I2C_Si53xx.I2C_Si53xx(self.mcuI2C[3], 0x6a, "IC82 (Si5344A)")
         self.i2cDevice_IC82_Si5344A.muxChannel = 0
+        self.i2cDevice_IC82_Si5344A.mux = self.i2cDevice_IC55_PCA9547PW
         self.i2cDevice_IC82_Si5344A.regMapFile = os.path.join("config", "clock", "IC82_h6A_IN0-240M_O-240M-Registers.txt")
         self.i2cDevice_IC82_Si5344A.debugLevel = self.debugLevel
         # IC83 (Si5342A): I2C port 3, slave address 0x68, clock I2C mux port 2
         self.i2cDevice_IC83_Si5342A = I2C_Si53xx.I2C_Si53xx(self.mcuI2C[3], 0x68, "IC83 (Si5342A)")
         self.i2cDevice_IC83_Si5342A.muxChannel = 2
+        self.i2cDevice_IC83_Si5342A.mux = self.i2cDevice_IC55_PCA9547PW
         self.i2cDevice_IC83_Si5342A.regMapFile = os.path.join("config", "clock", "IC83_h68_IN0-240M_O-240M-Registers.txt")
         self.i2cDevice_IC83_Si5342A.debugLevel = self.debugLevel
         # IC84 (Si5345A): I2C port 3, slave address 0x69, clock I2C mux port 2
         self.i2cDevice_IC84_Si5345A = I2C_Si53xx.I2C_Si53xx(self.mcuI2C[3], 0x69, "IC84 (Si5345A)")
         self.i2cDevice_IC84_Si5345A.muxChannel = 2
+        self.i2cDevice_IC84_Si5345A.mux = self.i2cDevice_IC55_PCA9547PW
         self.i2cDevice_IC84_Si5345A.regMapFile = os.path.join("config", "clock", "IC84_h69_IN0-240M_O-240M-Registers.txt")
         self.i2cDevice_IC84_Si5345A.debugLevel = self.debugLevel
         # IC85 (Si5345A): I2C port 3, slave address 0x6A, clock I2C mux port 2
         self.i2cDevice_IC85_Si5345A = I2C_Si53xx.I2C_Si53xx(self.mcuI2C[3], 0x6a, "IC85 (Si5345A)")
         self.i2cDevice_IC85_Si5345A.muxChannel = 2
+        self.i2cDevice_IC85_Si5345A.mux = self.i2cDevice_IC55_PCA9547PW
         self.i2cDevice_IC85_Si5345A.regMapFile = os.path.join("config", "clock", "IC85_h6A_IN0-240M_O-240M-Registers.txt")
         self.i2cDevice_IC85_Si5345A.debugLevel = self.debugLevel
 
@@ -356,6 +388,7 @@ class MdtTp_CM:
         self.i2cDevice_FireFly_RX = []
         for i in range(0, self.fireFlyNum):
             self.i2cDevice_FireFly_RX.append(I2C_FireFly.I2C_FireFly(self.mcuI2C[2], 0x54, "FireFly {0:d} RX".format(i+1), I2C_FireFly.I2C_FireFly.deviceTypeRX))
+            self.i2cDevice_FireFly_RX[i].mux = self.i2cDevice_IC24_PCA9547PW
             self.i2cDevice_FireFly_RX[i].muxChannel = i
             self.i2cDevice_FireFly_RX[i].debugLevel = self.debugLevel
 
@@ -367,6 +400,7 @@ class MdtTp_CM:
         self.i2cDevice_FireFly_TX = []
         for i in range(0, self.fireFlyNum):
             self.i2cDevice_FireFly_TX.append(I2C_FireFly.I2C_FireFly(self.mcuI2C[2], 0x50, "FireFly {0:d} TX".format(i+1), I2C_FireFly.I2C_FireFly.deviceTypeTX))
+            self.i2cDevice_FireFly_TX[i].mux = self.i2cDevice_IC25_PCA9547PW
             self.i2cDevice_FireFly_TX[i].muxChannel = i
             self.i2cDevice_FireFly_TX[i].debugLevel = self.debugLevel
 
@@ -378,37 +412,44 @@ class MdtTp_CM:
         for i in range(0, self.i2cBusNum):
             self.mcuI2C[i].ms_reset_bus()
 
+        # Send all configuration writes with as few MCU commands as possible.
+        batch = I2CWriteBatcher.I2CWriteBatcher(self.mcuSer)
+        batch.debugLevel = self.debugLevel
+
         # MCP9808 digital temperature sensor ICs.
-        # Set up the configuration registers.
-        self.i2cDevice_IC34_MCP9808.write_config(0x0000)
-        self.i2cDevice_IC35_MCP9808.write_config(0x0000)
-        self.i2cDevice_IC36_MCP9808.write_config(0x0000)
-        self.i2cDevice_IC37_MCP9808.write_config(0x0000)
-        self.i2cDevice_IC38_MCP9808.write_config(0x0000)
-        # Set up the resolution registers.
-        self.i2cDevice_IC34_MCP9808.write_resolution(0x0003)
-        self.i2cDevice_IC35_MCP9808.write_resolution(0x0003)
-        self.i2cDevice_IC36_MCP9808.write_resolution(0x0003)
-        self.i2cDevice_IC37_MCP9808.write_resolution(0x0003)
-        self.i2cDevice_IC38_MCP9808.write_resolution(0x0003)
+        # Set up the configuration and resolution registers.
+        for device in [self.i2cDevice_IC34_MCP9808, self.i2cDevice_IC35_MCP9808, self.i2cDevice_IC36_MCP9808,
+                       self.i2cDevice_IC37_MCP9808, self.i2cDevice_IC38_MCP9808]:
+            batch.add_write(device, [device.hwPointerConfig, 0x00, 0x00])
+            batch.add_write(device, [device.hwPointerResolution, 0x03])
 
         # IC39: MCP9903 multi-channel low-temperature remote diode sensor IC.
         # Set up the configuration registers.
-        self.i2cDevice_IC39_MCP9903.write_config_0(0x00)
-        self.i2cDevice_IC39_MCP9903.write_config_1(0x00)
-
-        # Set write protection for all power ICs.
-        self.i2cDevice_IC26_LTC2977.wp_level_1()
-        self.i2cDevice_IC27_LTC2977.wp_level_1()
-        self.i2cDevice_IC49_LTC2977.wp_level_1()
-        self.i2cDevice_IC50_LTC2977.wp_level_1()
-        self.i2cDevice_IC51_LTC2977.wp_level_1()
-        self.i2cDevice_IC52_LTC2977.wp_level_1()
-        self.i2cDevice_IC76_LTM4700.wp_level_1()
-        self.i2cDevice_IC77_LTM4700.wp_level_1()
-        self.i2cDevice_IC78_LTM4700.wp_level_1()
-        self.i2cDevice_IC79_LTM4700.wp_level_1()
-        self.i2cDevice_IC80_LTM4675.wp_level_1()
+        batch.add_write(self.i2cDevice_IC39_MCP9903, [self.i2cDevice_IC39_MCP9903.hwRegConfig0, 0x00])
+        batch.add_write(self.i2cDevice_IC39_MCP9903, [self.i2cDevice_IC39_MCP9903.hwRegConfig1, 0x00])
+
+        # Set write protection level 1 for all power ICs.
+        for device in [self.i2cDevice_IC26_LTC2977, self.i2cDevice_IC27_LTC2977, self.i2cDevice_IC49_LTC2977,
+                       self.i2cDevice_IC50_LTC2977, self.i2cDevice_IC51_LTC2977, self.i2cDevice_IC52_LTC2977,
+                       self.i2cDevice_IC76_LTM4700, self.i2cDevice_IC77_LTM4700, self.i2cDevice_IC78_LTM4700,
+                       self.i2cDevice_IC79_LTM4700, self.i2cDevice_IC80_LTM4675]:
+            batch.add_write(device, [device.hwCmdCodeWriteProtect, 0x80])
+
+        batch.run()
+
+        # Read the static configuration of all power ICs once, so that the
+        # monitoring functions do not need to read it again.
+        self.i2cDevice_IC26_LTC2977.config_cache_fill()
+        self.i2cDevice_IC27_LTC2977.config_cache_fill()
+        self.i2cDevice_IC49_LTC2977.config_cache_fill()
+        self.i2cDevice_IC50_LTC2977.config_cache_fill()
+        self.i2cDevice_IC51_LTC2977.config_cache_fill()
+        self.i2cDevice_IC52_LTC2977.config_cache_fill()
+        self.i2cDevice_IC76_LTM4700.config_cache_fill()
+        self.i2cDevice_IC77_LTM4700.config_cache_fill()
+        self.i2cDevice_IC78_LTM4700.config_cache_fill()
+        self.i2cDevice_IC79_LTM4700.config_cache_fill()
+        self.i2cDevice_IC80_LTM4675.config_cache_fill()
 
 
 
@@ -869,27 +910,95 @@ class MdtTp_CM:
     # Silicon labs clock ICs.
     # ===============================================================
 
-    # Program a single Silicon Labs clock IC from a register map file.
-    def clk_prog_device_file(self, i2cDevice):
-        i2cDevice.debugLevel = self.debugLevel
-        muxChannel = i2cDevice.muxChannel
-        if self.debugLevel >= 1:
-            print(self.prefixDebug + "Setting I2C mux for clock chips {0:s} to channel {1:d}.".format(self.i2cDevice_IC55_PCA9547PW.deviceName, muxChannel))
-        self.i2cDevice_IC55_PCA9547PW.set_channel(muxChannel)
-        self.i2cDevice_IC55_PCA9547PW.debugLevel = self.debugLevel
-        regMapFile = i2cDevice.regMapFile
-        print("Initialitzing {0:s} on I2C port {1:d} with register map file `{2:s}'.".\
-            format(i2cDevice.deviceName, i2cDevice.mcuI2C.port, regMapFile))
-        i2cDevice.debugLevel = self.debugLevel
-        ret = i2cDevice.config_file(fileRegMapName=regMapFile, burstMode=True)
-        if ret != 0:
-            print(self.prefixError + "Could not config clock chip!")
+    # Program Silicon Labs clock ICs from their register map files. In
+    # differential mode, only the registers which differ are written.
+    # Otherwise, an IC is skipped if it already holds the configuration,
+    # unless force is set.
+    # The ICs are programmed together: while an IC waits for the delay of
+    # 300 ms required after the preamble of its register map file, the other
+    # ICs are programmed. ICs on the selected I2C mux channel are preferred, so
+    # that the channel is only switched as needed.
+    def clk_prog_devices(self, i2cDevices, differential=False, force=False):
+        mux = self.i2cDevice_IC55_PCA9547PW
+        mux.debugLevel = self.debugLevel
+        ret = 0
+        # Plan of each IC: [IC, phases, index of the next phase, time when the
+        # next phase may start].
+        plan = []
+        for i2cDevice in i2cDevices:
+            i2cDevice.debugLevel = self.debugLevel
+            regMapFile = i2cDevice.regMapFile
+            if not differential and not force:
+                retLoaded, loaded = i2cDevice.config_is_loaded(regMapFile, self.clkVerifyRegs)
+                if not retLoaded and loaded:
+                    print("{0:s} on I2C port {1:d} already holds the configuration of register map file `{2:s}'. Skipping.".\
+                        format(i2cDevice.deviceName, i2cDevice.mcuI2C.port, regMapFile))
+                    continue
+            print("{0:s} {1:s} on I2C port {2:d} with register map file `{3:s}'.".\
+                format("Updating" if differential else "Initialitzing", i2cDevice.deviceName, i2cDevice.mcuI2C.port, regMapFile))
+            retPhases, phases = i2cDevice.config_phases(regMapFile, differential)
+            if retPhases:
+                print(self.prefixError + "Could not config clock chip {0:s}!".format(i2cDevice.deviceName))
+                ret = -1
+                continue
+            if phases:
+                plan.append([i2cDevice, phases, 0, 0.0])
+        # Execute the phases of all ICs.
+        muxChannel = None
+        while plan:
+            timeNow = time.monotonic()
+            ready = [entry for entry in plan if entry[3] <= timeNow]
+            if not ready:
+                time.sleep(min(entry[3] for entry in plan) - timeNow)
+                continue
+            entry = ready[0]
+            for entryReady in ready:
+                if entryReady[0].muxChannel == muxChannel:
+                    entry = entryReady
+                    break
+            i2cDevice = entry[0]
+            if i2cDevice.muxChannel != muxChannel and self.debugLevel >= 1:
+                print(self.prefixDebug + "Setting I2C mux for clock chips {0:s} to channel {1:d}.".format(mux.deviceName, i2cDevice.muxChannel))
+            # Other clients of the MCU command broker may use the I2C mux
+            # during the delays, so it is set for each phase. Setting the
+            # channel already selected does not access the I2C bus.
+            with self.mcuSer.exclusive():
+                if mux.set_channel(i2cDevice.muxChannel):
+                    print(self.prefixError + "Could not config clock chip {0:s}!".format(i2cDevice.deviceName))
+                    ret = -1
+                    muxChannel = None
+                    plan.remove(entry)
+                    continue
+                muxChannel = i2cDevice.muxChannel
+                if i2cDevice.config_phase(entry[1][entry[2]], True, i2cDevice.regMapFile):
+                    print(self.prefixError + "Could not config clock chip {0:s}!".format(i2cDevice.deviceName))
+                    ret = -1
+                    plan.remove(entry)
+                    continue
+            entry[2] += 1
+            if entry[2] >= len(entry[1]):
+                plan.remove(entry)
+            else:
+                # Delay the next phase of this IC by 300 ms as required
+                # according to the device specification.
+                if self.debugLevel >= 3:
+                    print(self.prefixDebug + "{0:s}: Delaying the next phase by 300 ms.".format(i2cDevice.deviceName))
+                entry[3] = time.monotonic() + i2cDevice.hwDelay
         return ret
 
 
 
+    # Program a single Silicon Labs clock IC from a register map file. In
+    # differential mode, only the registers which differ are written.
+    # Otherwise, the IC is skipped if it already holds the configuration,
+    # unless force is set.
+    def clk_prog_device_file(self, i2cDevice, differential=False, force=False):
+        return self.clk_prog_devices([i2cDevice], differential, force)
+
+
+
     # Program a single Silicon Labs clock IC from a register map file by its name.
-    def clk_prog_device_by_name(self, clkDevName, regMapFile):
+    def clk_prog_device_by_name(self, clkDevName, regMapFile, differential=False, force=False):
         clkDeviceList = [self.i2cDevice_IC54_Si5341A,
                          self.i2cDevice_IC56_Si5345A,
                          self.i2cDevice_IC60_Si5345A,
@@ -913,26 +1022,25 @@ class MdtTp_CM:
                 print(dev.deviceName[0:4] + " ", end='')
             print()
             return -1
-        self.clk_prog_device_file(clkDevice)
-        return 0
+        return self.clk_prog_device_file(clkDevice, differential, force)
 
 
 
     # Program all clock devices.
-    def clk_prog_all(self):
+    def clk_prog_all(self, differential=False, force=False):
         if self.debugLevel >= 1:
             print(self.prefixDebug + "Initialitzing all clock chips.")
-        self.clk_prog_device_file(self.i2cDevice_IC54_Si5341A)
-        self.clk_prog_device_file(self.i2cDevice_IC56_Si5345A)
-        self.clk_prog_device_file(self.i2cDevice_IC60_Si5345A)
-        self.clk_prog_device_file(self.i2cDevice_IC61_Si5342A)
-        self.clk_prog_device_file(self.i2cDevice_IC62_Si5345A)
-        self.clk_prog_device_file(self.i2cDevice_IC63_Si5345A)
-        self.clk_prog_device_file(self.i2cDevice_IC81_Si5342A)
-        self.clk_prog_device_file(self.i2cDevice_IC82_Si5344A)
-        self.clk_prog_device_file(self.i2cDevice_IC83_Si5342A)
-        self.clk_prog_device_file(self.i2cDevice_IC84_Si5345A)
-        self.clk_prog_device_file(self.i2cDevice_IC85_Si5345A)
+        return self.clk_prog_devices([self.i2cDevice_IC54_Si5341A,
+                                      self.i2cDevice_IC56_Si5345A,
+                                      self.i2cDevice_IC60_Si5345A,
+                                      self.i2cDevice_IC61_Si5342A,
+                                      self.i2cDevice_IC62_Si5345A,
+                                      self.i2cDevice_IC63_Si5345A,
+                                      self.i2cDevice_IC81_Si5342A,
+                                      self.i2cDevice_IC82_Si5344A,
+                                      self.i2cDevice_IC83_Si5342A,
+                                      self.i2cDevice_IC84_Si5345A,
+                                      self.i2cDevice_IC85_Si5345A], differential, force)
 
 
 
@@ -942,17 +1050,20 @@ class MdtTp_CM:
 
     # Monitor the FireFly temperatures.
     def firefly_temp(self):
+        # Read the temperatures of all FireFly modules in one go. The
+        # scheduler takes care of the I2C multiplexer channels.
+        scheduler = I2CScheduler.I2CScheduler(self.mcuSer)
+        scheduler.debugLevel = self.debugLevel
+        fireFlyDevices = []
         for i in range(0, self.fireFlyNum):
-            # RX.
-            self.i2cDevice_IC24_PCA9547PW.set_channel(self.i2cDevice_FireFly_RX[i].muxChannel)
-            ret, temperature = self.i2cDevice_FireFly_RX[i].read_temperature()
-            if ret == 0:
-                print("{0:13s}: {1:3d} degC".format(self.i2cDevice_FireFly_RX[i].deviceName, temperature))
-            # TX.
-            self.i2cDevice_IC25_PCA9547PW.set_channel(self.i2cDevice_FireFly_TX[i].muxChannel)
-            ret, temperature = self.i2cDevice_FireFly_TX[i].read_temperature()
-            if ret == 0:
-                print("{0:13s}: {1:3d} degC".format(self.i2cDevice_FireFly_TX[i].deviceName, temperature))
+            fireFlyDevices += [self.i2cDevice_FireFly_RX[i], self.i2cDevice_FireFly_TX[i]]
+        for fireFlyDevice in fireFlyDevices:
+            scheduler.add_read(fireFlyDevice.deviceName, fireFlyDevice, fireFlyDevice.hwRegTemperature, 1)
+        ret, results = scheduler.run()
+        for fireFlyDevice in fireFlyDevices:
+            if results[fireFlyDevice.deviceName] is not None:
+                temperature = fireFlyDevice.raw_to_temperature(results[fireFlyDevice.deviceName][0])
+                print("{0:13s}: {1:3d} degC".format(fireFlyDevice.deviceName, temperature))
 
 
 
@@ -967,71 +1078,69 @@ class MdtTp_CM:
 
     # Get the status of a FireFly module.
     def firefly_status(self, fireFlyNum):
-        if self.firefly_check_num(fireFlyNum):
-            return -1
-        fireFlyNum -= 1
-        # RX.
-        self.i2cDevice_IC24_PCA9547PW.set_channel(self.i2cDevice_FireFly_RX[fireFlyNum].muxChannel)
-        print(self.i2cDevice_FireFly_RX[fireFlyNum].deviceName + ":")
-        ret, temperature = self.i2cDevice_FireFly_RX[fireFlyNum].read_temperature()
-        ret, vcc = self.i2cDevice_FireFly_RX[fireFlyNum].read_vcc()
-        ret, firmwareVersion = self.i2cDevice_FireFly_RX[fireFlyNum].read_firmware_version()
-        ret, vendorName = self.i2cDevice_FireFly_RX[fireFlyNum].read_vendor_name()
-        ret, vendorPartNumber = self.i2cDevice_FireFly_RX[fireFlyNum].read_vendor_part_number()
-        ret, vendorSerialNumber = self.i2cDevice_FireFly_RX[fireFlyNum].read_vendor_serial_number()
-        print("    Temperature          : {0:d} degC".format(temperature))
-        print("    VCC                  : {0:5.3f} V".format(vcc))
-        print("    Firmware version     : {0:s}".format(firmwareVersion))
-        print("    Vendor Name          : {0:s}".format(vendorName))
-        print("    Vendor Part Number   : {0:s}".format(vendorPartNumber))
-        print("    Vendor Serial Number : {0:s}".format(vendorSerialNumber))
-        # TX.
-        self.i2cDevice_IC25_PCA9547PW.set_channel(self.i2cDevice_FireFly_TX[fireFlyNum].muxChannel)
-        print(self.i2cDevice_FireFly_TX[fireFlyNum].deviceName+ ":")
-        ret, temperature = self.i2cDevice_FireFly_TX[fireFlyNum].read_temperature()
-        ret, vcc = self.i2cDevice_FireFly_TX[fireFlyNum].read_vcc()
-        ret, firmwareVersion = self.i2cDevice_FireFly_TX[fireFlyNum].read_firmware_version()
-        ret, vendorName = self.i2cDevice_FireFly_TX[fireFlyNum].read_vendor_name()
-        ret, vendorPartNumber = self.i2cDevice_FireFly_TX[fireFlyNum].read_vendor_part_number()
-        ret, vendorSerialNumber = self.i2cDevice_FireFly_TX[fireFlyNum].read_vendor_serial_number()
-        print("    Temperature          : {0:d} degC".format(temperature))
-        print("    VCC                  : {0:5.3f} V".format(vcc))
-        print("    Firmware version     : {0:s}".format(firmwareVersion))
-        print("    Vendor Name          : {0:s}".format(vendorName))
-        print("    Vendor Part Number   : {0:s}".format(vendorPartNumber))
-        print("    Vendor Serial Number : {0:s}".format(vendorSerialNumber))
-        return 0
+        with self.mcuSer.exclusive():
+            if self.firefly_check_num(fireFlyNum):
+                return -1
+            fireFlyNum -= 1
+            # RX.
+            self.i2cDevice_IC24_PCA9547PW.set_channel(self.i2cDevice_FireFly_RX[fireFlyNum].muxChannel)
+            print(self.i2cDevice_FireFly_RX[fireFlyNum].deviceName + ":")
+            ret, temperature = self.i2cDevice_FireFly_RX[fireFlyNum].read_temperature()
+            ret, vcc = self.i2cDevice_FireFly_RX[fireFlyNum].read_vcc()
+            ret, identity = self.i2cDevice_FireFly_RX[fireFlyNum].read_identity()
+            firmwareVersion, vendorName, vendorPartNumber, vendorSerialNumber = identity
+            print("    Temperature          : {0:d} degC".format(temperature))
+            print("    VCC                  : {0:5.3f} V".format(vcc))
+            print("    Firmware version     : {0:s}".format(firmwareVersion))
+            print("    Vendor Name          : {0:s}".format(vendorName))
+            print("    Vendor Part Number   : {0:s}".format(vendorPartNumber))
+            print("    Vendor Serial Number : {0:s}".format(vendorSerialNumber))
+            # TX.
+            self.i2cDevice_IC25_PCA9547PW.set_channel(self.i2cDevice_FireFly_TX[fireFlyNum].muxChannel)
+            print(self.i2cDevice_FireFly_TX[fireFlyNum].deviceName+ ":")
+            ret, temperature = self.i2cDevice_FireFly_TX[fireFlyNum].read_temperature()
+            ret, vcc = self.i2cDevice_FireFly_TX[fireFlyNum].read_vcc()
+            ret, identity = self.i2cDevice_FireFly_TX[fireFlyNum].read_identity()
+            firmwareVersion, vendorName, vendorPartNumber, vendorSerialNumber = identity
+            print("    Temperature          : {0:d} degC".format(temperature))
+            print("    VCC                  : {0:5.3f} V".format(vcc))
+            print("    Firmware version     : {0:s}".format(firmwareVersion))
+            print("    Vendor Name          : {0:s}".format(vendorName))
+            print("    Vendor Part Number   : {0:s}".format(vendorPartNumber))
+            print("    Vendor Serial Number : {0:s}".format(vendorSerialNumber))
+            return 0
 
 
 
     # Get the time at temperature of a FireFly module.
     def firefly_time_at_temperature(self, fireFlyNum):
-        if self.firefly_check_num(fireFlyNum):
-            return -1
-        fireFlyNum -= 1
-        # RX.
-        self.i2cDevice_IC24_PCA9547PW.set_channel(self.i2cDevice_FireFly_RX[fireFlyNum].muxChannel)
-        print(self.i2cDevice_FireFly_RX[fireFlyNum].deviceName + ":")
-        for i in range(0, 22):
-            ret, timeAtTemperature = self.i2cDevice_FireFly_RX[fireFlyNum].read_time_at_temperature(i)
-            if i == 0:
-                print("       < 0 degC", end='')
-            elif i == 21:
-                print("     > 100 degC", end='')
-            else:
-                print("{0:3d} .. {1:3d} degC".format((i - 1) * 5, i * 5), end='')
-            print(" : {0:10.2f} hours".format(timeAtTemperature))
-        # TX.
-        self.i2cDevice_IC25_PCA9547PW.set_channel(self.i2cDevice_FireFly_TX[fireFlyNum].muxChannel)
-        print(self.i2cDevice_FireFly_TX[fireFlyNum].deviceName + ":")
-        for i in range(0, 22):
-            ret, timeAtTemperature = self.i2cDevice_FireFly_TX[fireFlyNum].read_time_at_temperature(i)
-            if i == 0:
-                print("       < 0 degC", end='')
-            elif i == 21:
-                print("     > 100 degC", end='')
-            else:
-                print("{0:3d} .. {1:3d} degC".format((i - 1) * 5, i * 5), end='')
-            print(" : {0:10.2f} hours".format(timeAtTemperature))
-        return 0
+        with self.mcuSer.exclusive():
+            if self.firefly_check_num(fireFlyNum):
+                return -1
+            fireFlyNum -= 1
+            # RX.
+            self.i2cDevice_IC24_PCA9547PW.set_channel(self.i2cDevice_FireFly_RX[fireFlyNum].muxChannel)
+            print(self.i2cDevice_FireFly_RX[fireFlyNum].deviceName + ":")
+            ret, timeAtTemperatureAll = self.i2cDevice_FireFly_RX[fireFlyNum].read_time_at_temperature_all()
+            for i, timeAtTemperature in enumerate(timeAtTemperatureAll):
+                if i == 0:
+                    print("       < 0 degC", end='')
+                elif i == 21:
+                    print("     > 100 degC", end='')
+                else:
+                    print("{0:3d} .. {1:3d} degC".format((i - 1) * 5, i * 5), end='')
+                print(" : {0:10.2f} hours".format(timeAtTemperature))
+            # TX.
+            self.i2cDevice_IC25_PCA9547PW.set_channel(self.i2cDevice_FireFly_TX[fireFlyNum].muxChannel)
+            print(self.i2cDevice_FireFly_TX[fireFlyNum].deviceName + ":")
+            ret, timeAtTemperatureAll = self.i2cDevice_FireFly_TX[fireFlyNum].read_time_at_temperature_all()
+            for i, timeAtTemperature in enumerate(timeAtTemperatureAll):
+                if i == 0:
+                    print("       < 0 degC", end='')
+                elif i == 21:
+                    print("     > 100 degC", end='')
+                else:
+                    print("{0:3d} .. {1:3d} degC".format((i - 1) * 5, i * 5), end='')
+                print(" : {0:10.2f} hours".format(timeAtTemperature))
+            return 0
 
@@ -4,7 +4,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 24 Apr 2020
-# Rev.: 28 Oct 2022
+# Rev.: 17 Oct 2026
 #
 # Python script to load and execute a batch of MCU commands from a file on the
 # TI Tiva TM4C1290 MCU on the ATLAS MDT Trigger Processor (TP) Command Module
@@ -48,7 +48,7 @@ mcuCmdDefInfo           = "info"
 
 
 # Load and execute an MCU command batch.
-def exec_batch(serialDevice, batchFileName, stopOnError, verbosity):
+def exec_batch(serialDevice, batchFileName, stopOnError, verbosity, captureFileName=None):
     # Check if batchFileName is a file.
     if not os.path.isfile(batchFileName):
         print(prefixError + "The MCU command batch file parameter `{0:s}' is not a file!".format(batchFileName))
@@ -71,9 +71,8 @@ def exec_batch(serialDevice, batchFileName, stopOnError, verbosity):
     mcuSer = McuSerial.McuSerial(serialDevice)
     mcuSer.debugLevel = 0
     mcuSer.clear()
-    # Increase the maximum number of lines and the timeout value.
-    mcuSer.ser.mcuReadLineMax = 200
-    mcuSer.ser.timeout = 0.05
+    if captureFileName and mcuSer.capture_start(captureFileName):
+        return 1
 
     # Read and process the batch command file.
     with open(batchFileName) as fileBatch:
@@ -193,6 +192,9 @@ if __name__ == "__main__":
     parser.add_argument('-d', '--device', action='store', type=str,
                         dest='serialDevice', default='/dev/ttyUL1',
                         help='Serial device to access the MCU.')
+    parser.add_argument('-C', '--capture', action='store', type=str,
+                        dest='captureFileName', default=None, metavar='CAPTURE_FILE',
+                        help='Capture the MCU communication to a file. Replay it with `-d replay:CAPTURE_FILE\'.')
     parser.add_argument('-f', '--file', action='store', type=str,
                         dest='batchFileName', default='mcu.cmd', required=True,
                         help='Batch file containing MCU commands.')
@@ -205,5 +207,5 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     # Load and execute the MCU command batch file.
-    exit(exec_batch(args.serialDevice, args.batchFileName, args.stopOnError, args.verbosity))
+    exit(exec_batch(args.serialDevice, args.batchFileName, args.stopOnError, args.verbosity, args.captureFileName))
 
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+#
+# File: pyMcuBroker.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python script implementing an MCU command broker for the TI Tiva TM4C1290 MCU
+# on the ATLAS MDT Trigger Processor (TP) Command Module (CM). The broker owns
+# the serial port (UART) of the MCU and accepts MCU commands from several local
+# clients over a Unix socket. The commands of the clients are executed one at a
+# time in round-robin order and the raw MCU responses are relayed to the
+# clients. A client can group a sequence of commands into a transaction (see
+# McuBrokerClient class). While a client is in a transaction, only its
+# commands are executed. To use the broker, pass `unix:<broker socket>' as
+# serial device to the McuSerial class, e.g.:
+# ./pyMcuBroker.py -d /dev/ttyUL1 -s /tmp/pyMcuBroker-ttyUL1.sock &
+# ./pyMcuCm.py -d unix:/tmp/pyMcuBroker-ttyUL1.sock -c status
+#
+
+
+
+# Append hardware classes folder to Python path.
+import os
+import sys
+sys.path.append(os.path.relpath(os.path.join(os.path.dirname(__file__), 'hw')))
+
+
+
+# System modules.
+import collections
+import selectors
+import socket
+
+
+
+# Hardware classes.
+import McuBrokerClient
+import McuSerial
+
+
+
+# Message prefixes and separators.
+prefixWarning           = "WARNING: {0:s}: ".format(__file__)
+prefixError             = "ERROR: {0:s}: ".format(__file__)
+prefixDebug             = "DEBUG: {0:s}: ".format(__file__)
+
+# Broker parameters.
+brokerClientsMax        = 32            # Maximum number of pending client connections.
+brokerCmdEnd            = b"\r"         # End of an MCU command sent by a client.
+brokerCmdLenMax         = 255           # Maximum MCU command length (UI_STR_BUF_SIZE - 1).
+
+
+
+# Client connection of the MCU command broker.
+class BrokerClient:
+
+    # Initialize the client connection.
+    def __init__(self, sock, clientId):
+        self.sock = sock
+        self.clientId = clientId
+        self.rxData = bytearray()               # Data received from the client.
+        self.txData = bytearray()               # Data to be sent to the client.
+        self.cmds = collections.deque()         # Pending MCU commands.
+        self.cmdCountSeen = 0                   # MCU command count after the last command of this client.
+
+
+
+    # Extract the complete MCU commands from the data received from the client.
+    def split_cmds(self):
+        while True:
+            pos = self.rxData.find(brokerCmdEnd)
+            if pos < 0:
+                break
+            cmd = self.rxData[:pos].decode('utf-8', errors='replace').strip('\n')
+            del self.rxData[:pos + len(brokerCmdEnd)]
+            self.cmds.append(cmd)
+        return len(self.cmds)
+
+
+
+# Run the MCU command broker.
+def run_broker(serialDevice, socketPath, verbosity):
+    # Open the MCU serial interface.
+    mcuSer = McuSerial.McuSerial(serialDevice)
+    mcuSer.debugLevel = max(verbosity - 2, 0)
+    mcuSer.clear()
+
+    # Create the Unix socket for the clients.
+    if os.path.exists(socketPath):
+        os.unlink(socketPath)
+    sockListen = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sockListen.bind(socketPath)
+    sockListen.listen(brokerClientsMax)
+    sockListen.setblocking(False)
+    if verbosity >= 1:
+        print("MCU command broker for serial device `{0:s}' listening on `{1:s}'.".format(serialDevice, socketPath))
+
+    sel = selectors.DefaultSelector()
+    sel.register(sockListen, selectors.EVENT_READ, None)
+    # Clients with pending MCU commands in round-robin order.
+    clientsReady = collections.deque()
+    clientCount = 0
+    cmdCount = 0
+    # Client in a transaction.
+    clientLock = None
+
+    # Close a client connection.
+    def client_close(client):
+        nonlocal clientLock
+        if verbosity >= 2:
+            print("Client {0:d} disconnected.".format(client.clientId))
+        sel.unregister(client.sock)
+        client.sock.close()
+        client.cmds.clear()
+        if client in clientsReady:
+            clientsReady.remove(client)
+        # End the transaction of the client.
+        if clientLock is client:
+            clientLock = None
+
+    # Get the next client whose MCU command is executed. While a client is
+    # in a transaction, only this client is served.
+    def client_next():
+        if clientLock is not None:
+            return clientLock if clientLock.cmds else None
+        return clientsReady[0] if clientsReady else None
+
+    # Send pending data to a client.
+    def client_send(client):
+        try:
+            cnt = client.sock.send(client.txData)
+        except BlockingIOError:
+            cnt = 0
+        except OSError:
+            client_close(client)
+            return
+        del client.txData[:cnt]
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.txData else 0)
+        sel.modify(client.sock, events, client)
+
+    try:
+        while True:
+            # Do not block if there are MCU commands to execute.
+            for key, events in sel.select(0 if client_next() else None):
+                client = key.data
+                # New client connection.
+                if client is None:
+                    sock, _ = sockListen.accept()
+                    sock.setblocking(False)
+                    clientCount += 1
+                    client = BrokerClient(sock, clientCount)
+                    sel.register(sock, selectors.EVENT_READ, client)
+                    if verbosity >= 2:
+                        print("Client {0:d} connected.".format(client.clientId))
+                    continue
+                if events & selectors.EVENT_WRITE:
+                    client_send(client)
+                if events & selectors.EVENT_READ:
+                    try:
+                        data = client.sock.recv(4096)
+                    except OSError:
+                        data = b""
+                    if not data:
+                        client_close(client)
+                        continue
+                    client.rxData += data
+                    if len(client.rxData) > brokerCmdLenMax and client.rxData.find(brokerCmdEnd) < 0:
+                        print(prefixWarning + "Client {0:d}: MCU command too long. Discarding {1:d} bytes.".\
+                            format(client.clientId, len(client.rxData)))
+                        client.rxData.clear()
+                    if client.split_cmds() and client not in clientsReady:
+                        clientsReady.append(client)
+            # Execute one MCU command of the next client in turn.
+            client = client_next()
+            if client:
+                clientsReady.remove(client)
+                cmd = client.cmds.popleft()
+                if client.cmds:
+                    clientsReady.append(client)
+                # Commands of the broker.
+                if cmd == McuBrokerClient.McuBrokerClient.brokerCmdBegin:
+                    clientLock = client
+                    if verbosity >= 3:
+                        print(prefixDebug + "Client {0:d}: Transaction started.".format(client.clientId))
+                    client.txData += "{0:s}\r\r\n{1:s}: {2:d}\r\n{3:s}".format(cmd, mcuSer.mcuResponseOk,
+                        cmdCount - client.cmdCountSeen, mcuSer.mcuCmdPrompt).encode('utf-8')
+                    client_send(client)
+                    continue
+                if cmd == McuBrokerClient.McuBrokerClient.brokerCmdEnd:
+                    if clientLock is client:
+                        clientLock = None
+                    if verbosity >= 3:
+                        print(prefixDebug + "Client {0:d}: Transaction ended.".format(client.clientId))
+                    continue
+                cmdCount += 1
+                client.cmdCountSeen = cmdCount
+                if verbosity >= 3:
+                    print(prefixDebug + "Client {0:d}: MCU command: {1:s}".format(client.clientId, cmd))
+                ret = mcuSer.send(cmd)
+                if ret:
+                    print(prefixError + "Client {0:d}: Error sending command `{1:s}' to MCU! Error code: {2:d}".\
+                        format(client.clientId, cmd, ret))
+                    # Relay an error response, so that the client does not
+                    # run into its response timeout.
+                    client.txData += "{0:s}\r\r\n{1:s}: MCU command broker: Error sending command to MCU! Error code: {2:d}\r\n{3:s}".\
+                        format(cmd, mcuSer.mcuResponseError, ret, mcuSer.mcuCmdPrompt).encode('utf-8')
+                else:
+                    client.txData += mcuSer.mcuResponseRaw
+                client_send(client)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sel.close()
+        sockListen.close()
+        if os.path.exists(socketPath):
+            os.unlink(socketPath)
+    if verbosity >= 1:
+        print("MCU commands executed: {0:d}".format(cmdCount))
+    return 0
+
+
+
+# Run the MCU command broker.
+if __name__ == "__main__":
+    # Command line arguments.
+    import argparse
+    parser = argparse.ArgumentParser(description='Share the MCU serial port between several local clients.')
+    parser.add_argument('-d', '--device', action='store', type=str,
+                        dest='serialDevice', default='/dev/ttyUL1', metavar='SERIAL_DEVICE',
+                        help='Serial device to access the MCU.')
+    parser.add_argument('-s', '--socket', action='store', type=str,
+                        dest='socketPath', default=None, metavar='SOCKET',
+                        help='Unix socket for the clients. The default is /tmp/pyMcuBroker-<serial device name>.sock.')
+    parser.add_argument('-v', '--verbosity', action='store', type=int,
+                        dest='verbosity', default="1", choices=range(0, 5),
+                        help='Set the verbosity level. The default is 1.')
+    args = parser.parse_args()
+
+    socketPath = args.socketPath
+    if not socketPath:
+        socketPath = "/tmp/pyMcuBroker-{0:s}.sock".format(os.path.basename(args.serialDevice))
+
+    exit(run_broker(args.serialDevice, socketPath, args.verbosity))
@@ -4,7 +4,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 29 May 2020
-# Rev.: 14 Feb 2023
+# Rev.: 17 Oct 2026
 #
 # Python script to access the ATLAS MDT Trigger Processor (TP) Command Module
 # (CM) via the TI Tiva TM4C1290 MCU.
@@ -48,16 +48,25 @@ if __name__ == "__main__":
                                  'mcu_cmd_raw',
                                  'i2c_reset', 'i2c_detect',
                                  'pm_status', 'pm_status_raw',
-                                 'clk_setup',
+                                 'clk_setup', 'clk_update',
                                  'firefly_temp', 'firefly_temp_time', 'firefly_status'],
                         dest='command', default='status',
                         help='Command to execute on the CM.')
     parser.add_argument('-d', '--device', action='store', type=str,
                         dest='serialDevice', default='/dev/ttyUL1', metavar='SERIAL_DEVICE',
                         help='Serial device to access the MCU.')
+    parser.add_argument('-C', '--capture', action='store', type=str,
+                        dest='captureFileName', default=None, metavar='CAPTURE_FILE',
+                        help='Capture the MCU communication to a file. Replay it with `-d replay:CAPTURE_FILE\'.')
+    parser.add_argument('-S', '--stats', action='store', type=str,
+                        dest='statsFormat', default=None, choices=['text', 'json'],
+                        help='Print the latency histograms and counters of the MCU commands at the end.')
     parser.add_argument('-p', '--parameters', action='store', type=str, nargs='*',
                         dest='commandParameters', default=None, metavar='PARAMETER',
                         help='Parameter(s) for the selected command.')
+    parser.add_argument('-f', '--force', action='store_true',
+                        dest='force', default=False,
+                        help='Program the clock ICs even if they already hold the configuration.')
     parser.add_argument('-v', '--verbosity', action='store', type=int,
                         dest='verbosity', default="1", choices=range(0, 5),
                         help='Set the verbosity level. The default is 1.')
@@ -70,6 +79,8 @@ if __name__ == "__main__":
 
     # Define the Command Module object.
     mdtTp_CM = MdtTp_CM.MdtTp_CM(serialDevice, verbosity)
+    if args.captureFileName and mdtTp_CM.mcuSer.capture_start(args.captureFileName):
+        exit(1)
 
     # Execute requested command.
     if not command:
@@ -85,7 +96,7 @@ if __name__ == "__main__":
     elif command == "init":
         mdtTp_CM.power_up()
         mdtTp_CM.init_hw()
-        mdtTp_CM.clk_prog_all()
+        mdtTp_CM.clk_prog_all(force=args.force)
     elif command == "status":
         print("Board Serial Number")
         print("===================")
@@ -114,15 +125,17 @@ if __name__ == "__main__":
         mdtTp_CM.power_module_status()
     elif command == "pm_status_raw":
         mdtTp_CM.power_module_status_raw()
-    elif command == "clk_setup":
+    elif command == "clk_setup" or command == "clk_update":
+        # Only write the registers which differ with `clk_update'.
+        differential = command == "clk_update"
         if commandParameters:
             if len(commandParameters) != 2:
                 print(prefixError, "Please specify the clock IC number and the register map file.")
                 print(prefixError, "E.g.: -p IC54 config/clock/IC54_h74_240M-Registers.txt")
             else:
-                mdtTp_CM.clk_prog_device_by_name(commandParameters[0], commandParameters[1])
+                mdtTp_CM.clk_prog_device_by_name(commandParameters[0], commandParameters[1], differential, args.force)
         else:
-            mdtTp_CM.clk_prog_all()
+            mdtTp_CM.clk_prog_all(differential, args.force)
     elif command == "firefly_temp":
         mdtTp_CM.firefly_temp()
     elif command == "firefly_temp_time":
@@ -142,5 +155,12 @@ if __name__ == "__main__":
     else:
         print(prefixError + "Command `{0:s}' not supported!".format(command))
 
+    if args.statsFormat == "text":
+        print()
+        print(mdtTp_CM.mcuSer.stats.dump_text())
+    elif args.statsFormat == "json":
+        print()
+        print(mdtTp_CM.mcuSer.stats.dump_json())
+
     print("\nBye-bye!")
 
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+#
+# File: pyMcuEmu.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 17 Oct 2026
+# Rev.: 17 Oct 2026
+#
+# Python script emulating the TI Tiva TM4C1290 MCU running the cm_mcu_hwtest
+# firmware on the ATLAS MDT Trigger Processor (TP) Command Module (CM). The
+# emulated MCU is served on a pseudo-terminal (pty), which can be used as
+# serial device by all pyMcu scripts and classes, e.g.:
+# ./pyMcuEmu.py -l /tmp/ttyMcuEmu &
+# ./pyMcuCm.py -d /tmp/ttyMcuEmu -c status
+#
+
+
+
+# Append hardware and emulator classes folders to Python path.
+import os
+import sys
+sys.path.append(os.path.relpath(os.path.join(os.path.dirname(__file__), 'hw')))
+sys.path.append(os.path.relpath(os.path.join(os.path.dirname(__file__), 'emu')))
+
+
+
+# System modules.
+import select
+import time
+import tty
+
+
+
+# Emulator classes.
+import EmuMdtTp_CM
+
+
+
+# Message prefixes and separators.
+prefixError             = "ERROR: {0:s}: ".format(__file__)
+prefixDebug             = "DEBUG: {0:s}: ".format(__file__)
+
+# UART user interface parameters.
+uiStrBufSize            = 256           # Size of the command buffer of the firmware.
+uiPrompt                = b"> "
+
+
+
+# Emulated UART user interface of the MCU.
+class EmuUartUi:
+
+    # Initialize the UART user interface.
+    def __init__(self, mcu, fd, baudRate, rxFifoSize, verbosity):
+        self.mcu = mcu
+        self.fd = fd
+        self.baudRate = baudRate
+        self.rxFifoSize = rxFifoSize
+        self.verbosity = verbosity
+        self.rxData = bytearray()       # Received data not yet processed.
+        self.cmdLine = bytearray()      # Command line being entered.
+        self.lastWasCr = False
+        self.overflowCount = 0
+
+
+
+    # Wait for the transmission time of a number of bytes on the UART.
+    def uart_delay(self, cnt):
+        if self.baudRate > 0:
+            time.sleep(cnt * 10 / self.baudRate)
+
+
+
+    # Send data to the UART. Line feeds are converted to CR + LF like the
+    # UARTwrite function of the firmware does.
+    def tx(self, data):
+        data = data.replace(b"\n", b"\r\n")
+        self.uart_delay(len(data))
+        while data:
+            try:
+                cnt = os.write(self.fd, data)
+            except BlockingIOError:
+                select.select([], [self.fd], [])
+                continue
+            data = data[cnt:]
+
+
+
+    # Read all data pending on the pty.
+    def rx_pending(self):
+        data = bytearray()
+        while select.select([self.fd], [], [], 0)[0]:
+            try:
+                chunk = os.read(self.fd, 4096)
+            except OSError:
+                break
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+
+
+    # Execute a command line.
+    def execute(self, cmdLine):
+        timeStart = time.monotonic()
+        output = self.mcu.execute(cmdLine)
+        if self.verbosity >= 3:
+            print(prefixDebug + "MCU command: {0:s}".format(cmdLine))
+        # Emulate the execution time of the command.
+        timeRemaining = self.mcu.execTime - (time.monotonic() - timeStart)
+        if timeRemaining > 0:
+            time.sleep(timeRemaining)
+        # Data received during the command execution which does not fit into
+        # the hardware RX FIFO is lost, as the UART is not buffered.
+        if self.rxFifoSize > 0:
+            data = self.rx_pending()
+            if len(data) > self.rxFifoSize:
+                self.overflowCount += 1
+                if self.verbosity >= 2:
+                    print(prefixError + "UART RX FIFO overflow. Discarding {0:d} bytes.".format(len(data) - self.rxFifoSize))
+                del data[self.rxFifoSize:]
+            self.rxData += data
+        if output:
+            self.tx(output.encode('utf-8') + b"\n")
+        self.tx(uiPrompt)
+
+
+
+    # Process the received characters like the UARTgets function of the
+    # firmware.
+    def process(self):
+        while self.rxData:
+            char = self.rxData[0]
+            del self.rxData[0]
+            # Skip LF directly after CR.
+            if char == 0x0a and self.lastWasCr:
+                self.lastWasCr = False
+                continue
+            self.lastWasCr = False
+            # Backspace.
+            if char == 0x08:
+                if self.cmdLine:
+                    del self.cmdLine[-1]
+                    self.tx(b"\x08 \x08")
+                continue
+            # End of line.
+            if char in (0x0d, 0x0a, 0x1b):
+                self.lastWasCr = char == 0x0d
+                # UARTgets terminates the line with "\r\n", which is sent as
+                # "\r\r\n" by UARTwrite.
+                self.tx(b"\r\n")
+                cmdLine = self.cmdLine.decode('utf-8', errors='replace')
+                self.cmdLine.clear()
+                self.execute(cmdLine)
+                continue
+            # Echo the character if there is space left in the buffer.
+            if len(self.cmdLine) < uiStrBufSize - 1:
+                self.cmdLine.append(char)
+                self.tx(bytes([char]))
+
+
+
+    # Run the UART user interface.
+    def run(self):
+        while True:
+            select.select([self.fd], [], [])
+            data = self.rx_pending()
+            self.uart_delay(len(data))
+            self.rxData += data
+            self.process()
+
+
+
+# Run the MCU emulator.
+def run_emulator(linkPath, baudRate, i2cFreq, i2cOverhead, rxFifoSize, verbosity):
+    mcu = EmuMdtTp_CM.EmuMdtTp_CM()
+    mcu.timeI2CByte = 9 / i2cFreq if i2cFreq > 0 else 0
+    mcu.timeI2CTransaction = i2cOverhead / 1e6
+
+    # Create the pseudo-terminal. The slave side is kept open, so that the
+    # pty persists when clients close it.
+    fdMaster, fdSlave = os.openpty()
+    tty.setraw(fdSlave)
+    os.set_blocking(fdMaster, False)
+    slaveName = os.ttyname(fdSlave)
+    if linkPath:
+        if os.path.islink(linkPath):
+            os.unlink(linkPath)
+        os.symlink(slaveName, linkPath)
+    print(linkPath if linkPath else slaveName, flush=True)
+
+    ui = EmuUartUi(mcu, fdMaster, baudRate, rxFifoSize, verbosity)
+    try:
+        ui.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        os.close(fdMaster)
+        os.close(fdSlave)
+        if linkPath and os.path.islink(linkPath):
+            os.unlink(linkPath)
+    if verbosity >= 1:
+        print("MCU commands executed: {0:d}".format(mcu.cmdCount))
+        if ui.overflowCount:
+            print("UART RX FIFO overflows: {0:d}".format(ui.overflowCount))
+    return 0
+
+
+
+# Run the MCU emulator.
+if __name__ == "__main__":
+    # Command line arguments.
+    import argparse
+    parser = argparse.ArgumentParser(description='Emulate the MCU of the CM on a pseudo-terminal.')
+    parser.add_argument('-l', '--link', action='store', type=str,
+                        dest='linkPath', default=None, metavar='LINK',
+                        help='Create a symbolic link to the pseudo-terminal.')
+    parser.add_argument('-b', '--baud', action='store', type=int,
+                        dest='baudRate', default=0, metavar='BAUD',
+                        help='UART baud rate used to emulate the transmission time. The default is 0 (no delay).')
+    parser.add_argument('-f', '--i2c-freq', action='store', type=float,
+                        dest='i2cFreq', default=0, metavar='FREQ',
+                        help='I2C clock frequency in Hz used to emulate the transfer time. The default is 0 (no delay).')
+    parser.add_argument('-t', '--i2c-overhead', action='store', type=float,
+                        dest='i2cOverhead', default=0, metavar='MICROSECONDS',
+                        help='Overhead per I2C transaction in microseconds. The default is 0.')
+    parser.add_argument('--fifo', action='store', type=int,
+                        dest='rxFifoSize', default=16, metavar='SIZE',
+                        help='Size of the UART RX FIFO. Data exceeding it during a command is lost. 0 disables it. The default is 16.')
+    parser.add_argument('-v', '--verbosity', action='store', type=int,
+                        dest='verbosity', default="1", choices=range(0, 5),
+                        help='Set the verbosity level. The default is 1.')
+    args = parser.parse_args()
+
+    exit(run_emulator(args.linkPath, args.baudRate, args.i2cFreq, args.i2cOverhead, args.rxFifoSize, args.verbosity))
@@ -3,7 +3,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 02 Sep 2020
-# Rev.: 23 Mar 2021
+# Rev.: 17 Oct 2026
 #
 # Simple script to monitor power and temperatures of the ATLAS MDT Trigger
 # Processor (TP) Command Module.
@@ -17,7 +17,9 @@ cd ..
 
 
 PY_MCU_CM="./pyMcuCm.py"
-SERIAL_DEVICE="/dev/ttyUL1"
+# Set SERIAL_DEVICE=unix:/tmp/pyMcuBroker-ttyUL1.sock to use the MCU command
+# broker (pyMcuBroker.py) instead of opening the serial device on every call.
+SERIAL_DEVICE="${SERIAL_DEVICE:-/dev/ttyUL1}"
 VERBOSITY="0"
 
 
@@ -3,7 +3,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 02 Sep 2020
-# Rev.: 26 Mar 2021
+# Rev.: 17 Oct 2026
 #
 # Simple script to monitor temperatures of the ATLAS MDT Trigger Processor (TP)
 # Command Module.
@@ -16,10 +16,16 @@ cd ..
 
 
 
+# Set SERIAL_DEVICE=unix:/tmp/pyMcuBroker-ttyUL1.sock to use the MCU command
+# broker (pyMcuBroker.py) instead of opening the serial device on every call.
+SERIAL_DEVICE="${SERIAL_DEVICE:-/dev/ttyUL1}"
+
+
+
 while [ 1 ]; do
 #    date +"%Y%m%d %H%M%S"
     date +"%d.%m.%Y %H:%M:%S"
-    ./pyMcuCm.py -d "/dev/ttyUL1" -v0 -c mon_temp | grep "KU15P\|ZU11EG"
+    ./pyMcuCm.py -d "${SERIAL_DEVICE}" -v0 -c mon_temp | grep "KU15P\|ZU11EG"
     echo
 done
 